@@ -1,14 +1,23 @@
+import random
 from random import randint, gauss, uniform
 from math import factorial, floor, exp
 from typing import List, Tuple, Set
 
-from use.tools import kthperm
+from use.tools import kthperm, permrank
 from algorithm.MultiObjective import MultiObjective as mo
+from algorithm.Indicators import ConvergenceMonitor
+from algorithm.Seeding import Seeding
+from algorithm.ParetoArchive import ParetoArchive
+from use.checkpoint import save_checkpoint, pack_population, unpack_population
 from models.Solution import Solution
 
 
 class BatAlgorithm():
-    def __init__(self, D, NP, N_Gen, NF, A, r, Alpha, Gama, Qmin, Qmax, scores):
+    def __init__(self, D, NP, N_Gen, NF, A, r, Alpha, Gama, Qmin, Qmax, scores, monitor=None, seeding_rate=0.0, objectives_number=2, archive=None, screening=None, cache=None, trace=None, progressive=None, seeding_min_distance=0.1):
+        if factorial(NF) <= NP * D:
+            # every bat needs its own interval of lexicographic positions
+            raise ValueError("{} fragments have less orderings than the {} bats of the population.".format(
+                NF, NP * D))
         self.D = D  # number of Bats for each individual in the population
         self.NP = NP  # population size
         self.N_Gen = N_Gen  # generations number
@@ -26,9 +35,11 @@ class BatAlgorithm():
         self.Qmax = Qmax  # frequency max
         self.Q = [0] * self.NP  # frequency of Bats for each solutions
 
-        #self.scores = scores
-        self.scores = [i for i in scores]
+        # the scores are only read, a list of lists or a ScoreMatrix
+        self.scores = scores
         self.l = [i for i in range(self.NF)]  # fragments index sequance
+        # the objectives of the domination, 2 (oaf, odf) or 3 (oaf, odf, contigs)
+        self.objectives_number = objectives_number
 
         self.min_index = 0  # the minimum index in lexecographie ordre
         # the maximum index in lexecographie ordre
@@ -43,18 +54,41 @@ class BatAlgorithm():
         # intermediate population used in the non dominated sorting
         self.inter_Population = List[Solution]
         self.inter_Population = [Solution(kthperm(self.l, 0), generation=0)]
-        self.Population, self.Positions = self.init_bat_population(
-            NF, NP)  # the initial population
-
-        for P in self.Population:
-            P.oaf_objective(self.scores)
-            P.odf_objective(self.scores)
+        # the initial population, its first seeded bats are kept by init_bat
+        self.Population, self.Positions, self.seeded = self.init_bat_population(
+            NF, NP, self.scores, seeding_rate, seeding_min_distance)
+
+        # the non dominated solutions found during the whole run, the final result
+        self.archive = archive if archive is not None else ParetoArchive(
+            0, objectives_number)
+        # drops the candidates of the STEP 7.2 that can't be used, None to evaluate them all
+        self.screening = screening
+        # the evaluated solutions of the positions visited, None to evaluate them each time
+        self.cache = cache
+        # the trace of the first front of the generations, None for no trace
+        self.trace = trace
+        # the approximate scores being refined, None if the scores are exact
+        self.progressive = progressive
+        for P, position in zip(self.Population, self.Positions):
+            P.evaluate(self.scores)
+            if self.cache is not None:
+                self.cache.store(position, P)
+        self.archive.update(self.Population)
         self.x_best = Solution("", generation=0)  # the best solution
         self.x_best = self.Update_solution(self.x_best, self.Population[0], 0)
+        self.x_best_pos = self.Positions[0]
+        self.best_bat(0)
+
+        # convergence monitor of the first front, to stop once it stagnates
+        self.monitor = monitor if monitor is not None else ConvergenceMonitor()
+        self.start_generation = 0  # the first generation, not 0 when resuming
 
     @staticmethod
-    def init_bat_population(fragments_number: int, population_size: int) -> Tuple[List[Solution], List[int]]:
+    def init_bat_population(fragments_number: int, population_size: int, scores=None, seeding_rate: float = 0.0, min_distance: float = 0.1) -> Tuple[List[Solution], List[int], int]:
         """This function create the initial population for the Bat algorithm.
+        With the scores, the first seeding_rate of the bats are seeded from the
+        overlap scores (see Seeding), their positions are the lexicographic
+        indexes of the seeded genomes.
 
         ...
 
@@ -66,6 +100,12 @@ class BatAlgorithm():
             of indexes for these fragments, stored in another variable.
         population_size: int
             The size of the wanted initial population.
+        scores: list, optional
+            A list of list(matrix) of float, or a ScoreMatrix, for the seeding.
+        seeding_rate: float, optional
+            The part of the population seeded.
+        min_distance: float, optional
+            The smallest adjacency distance between two seeded solutions.
 
         Returns
         -------
@@ -73,6 +113,8 @@ class BatAlgorithm():
             A list of Solution.
         list
             A list of position of the Solutions in the lexicographie ordre.
+        int
+            The number of seeded Solutions, the first ones.
         """
 
         # STEP 2, generate initial population, and retreving the set of the solutions
@@ -92,7 +134,44 @@ class BatAlgorithm():
             init_sol = Solution(sol, generation=0)
             solutions.append(init_sol)
             position.append(combinaison)
-        return solutions, position
+
+        seeds = list()
+        if scores is not None and seeding_rate > 0:
+            # The seeded bats replace the first random ones.
+            seeds = Seeding.seed_genomes(scores, fragments_number, round(
+                population_size * seeding_rate), set(), min_distance)[:population_size]
+            for i, sol in enumerate(seeds):
+                solutions[i] = Solution(sol, generation=0)
+                position[i] = permrank(l, sol)
+        return solutions, position, len(seeds)
+
+    def evaluate_position(self, position: int, generation: int) -> Solution:
+        """This function returns the evaluated solution of a lexicographic
+        position, from the cache if the position was visited already.
+
+        ...
+
+        Parameters
+        ----------
+        position: int
+            The position in the lexicographic order.
+        generation: int
+            The generation of the solution.
+
+        Returns
+        -------
+        Solution
+            The evaluated solution.
+        """
+        if self.cache is not None:
+            x = self.cache.solution(position, generation)
+            if x is not None:
+                return x
+        x = Solution(kthperm(self.l, position), generation=generation)
+        x.evaluate(self.scores)
+        if self.cache is not None:
+            self.cache.store(position, x)
+        return x
 
     def correct(self, x: int) -> int:
         """This function correct the index of the Bat to avoide 
@@ -143,6 +222,8 @@ class BatAlgorithm():
         sol_1.generation = Generation
         sol_1.odf = sol_2.odf
         sol_1.oaf = sol_2.oaf
+        sol_1.contigs = sol_2.contigs
+        sol_1.orientations = sol_2.orientations
         return sol_1
 
     def best_bat(self, Generation: int):
@@ -165,10 +246,10 @@ class BatAlgorithm():
 
         """
         for i in range(self.NP):
-            cond = mo.domination(self.Population[i], self.x_best)
+            cond = mo.domination(
+                self.Population[i], self.x_best, self.objectives_number)
+            # the contigs are calculated with the other objective functions
             if cond == -1:
-                self.x_best.contigs_number(self.scores)
-                self.Population[i].contigs_number(self.scores)
                 X_nc = self.x_best.contigs
                 P_nc = self.Population[i].contigs
                 if P_nc < X_nc:
@@ -176,8 +257,6 @@ class BatAlgorithm():
                         self.x_best, self.Population[i], Generation)
                     self.x_best_pos = self.Positions[i]
             elif cond == 0:
-                self.x_best.contigs_number(self.scores)
-                self.Population[i].contigs_number(self.scores)
                 if self.Population[i].contigs < self.x_best.contigs:
                     self.x_best = self.Update_solution(
                         self.x_best, self.Population[i], Generation)
@@ -187,6 +266,8 @@ class BatAlgorithm():
         """This function initialise the D Bats for every individual 
         in the initial solution and get the best NP individual after
          using the non dominate sorting algorithme.
+        The seeded individuals are kept, with their first bat on them, the
+        other individuals are the best of the bats.
 
 
         ...
@@ -211,14 +292,17 @@ class BatAlgorithm():
                 self.v[i][j] = 0.0
                 self.Sol[i][j] = randint(
                     i*equal_intervale + j*equal_intervale_bat, i*equal_intervale + (j+1)*equal_intervale_bat-1)
+                if i < self.seeded and j == 0:
+                    self.Sol[i][j] = self.Positions[i]
                 self.Sol[i][j] = self.correct(self.Sol[i][j])
-                x = Solution(kthperm(self.l, self.Sol[i][j]), generation=0)
-                x.oaf_objective(self.scores)
-                x.odf_objective(self.scores)
+                x = self.evaluate_position(self.Sol[i][j], 0)
                 self.inter_Population.append(x)
-        # we get NP first solutions from the K first front
-        inter_population = mo.non_dominate_sorting(self.inter_Population)
-        i = 0
+        # we get NP first solutions from the K first front, after the seeded ones
+        inter_population = mo.non_dominate_sorting(
+            self.inter_Population, self.objectives_number)
+        self.archive.update([self.inter_Population[f]
+                            for f in inter_population[0]])
+        i = self.seeded
         end = False
         for ip in inter_population:
             if end:
@@ -229,18 +313,117 @@ class BatAlgorithm():
                     break
                 Sol_i = f//self.D
                 Sol_j = f % self.D
+                if Sol_i < self.seeded and Sol_j == 0:
+                    # already in the population
+                    continue
                 self.Population[i] = self.Update_solution(
                     self.Population[i], self.inter_Population[f], 0)
                 self.Positions[i] = self.Sol[Sol_i][Sol_j]
                 i += 1
+        self.best_bat(0)
+
+    def refresh(self, Generation: int):
+        """This function evaluates the population, X_best and the archive
+        again, after the scores were refined by use.progressive.
+
+        ...
+
+        Parameters
+        ----------
+        Generation: int
+            the generation of the refinement.
+
+        Returns
+        -------
+
 
-    def move_bat(self):
+        """
+        for P in self.Population:
+            P.evaluate(self.scores)
+        self.x_best.evaluate(self.scores)
+        if self.cache is not None:
+            self.cache.clear()
+        self.archive.refresh(self.scores)
+        self.best_bat(Generation)
+
+    def get_state(self, Generation: int) -> dict:
+        """This function returns the state of the algorithm at the end of
+        a generation, to be saved in a checkpoint.
+
+        ...
+
+        Parameters
+        ----------
+        Generation: int
+            the last generation done.
+
+        Returns
+        -------
+        dict
+            the state of the algorithm.
+
+        """
+        return {
+            "generation": Generation,
+            "v": self.v,
+            "Sol": self.Sol,
+            "A": self.A,
+            "r": self.r,
+            "Q": self.Q,
+            "Positions": self.Positions,
+            "Population": pack_population(self.Population),
+            "x_best": pack_population([self.x_best]),
+            "x_best_pos": self.x_best_pos,
+            "monitor": self.monitor.get_state(),
+            "archive": self.archive.get_state(),
+            "random_state": random.getstate(),
+            # The scores refined so far, the run resumed starts from them.
+            "progressive": self.progressive.get_state() if self.progressive is not None else None,
+        }
+
+    def set_state(self, state: dict):
+        """This function restores a state returned by get_state, move_bat
+        then continues from the generation after the saved one.
+
+        ...
+
+        Parameters
+        ----------
+        state: dict
+            the state of the algorithm.
+
+        Returns
+        -------
+
+
+        """
+        self.v = state["v"]
+        self.Sol = state["Sol"]
+        self.A = state["A"]
+        self.r = state["r"]
+        self.Q = state["Q"]
+        self.Positions = state["Positions"]
+        self.Population = unpack_population(state["Population"])
+        self.x_best = unpack_population(state["x_best"])[0]
+        self.x_best_pos = state["x_best_pos"]
+        self.monitor.set_state(state["monitor"])
+        self.archive.set_state(state["archive"])
+        random.setstate(state["random_state"])
+        self.start_generation = state["generation"] + 1
+
+    def move_bat(self, checkpoint_directory: str = None, checkpoint_interval: int = 0, checkpoint_key: tuple = None):
         """ We apply the Bat Algorithme to solve the DNA FAP
 
         ...
 
         Parameters
         ----------
+        checkpoint_directory: str, optional
+            the directory where the checkpoints are saved.
+        checkpoint_interval: int, optional
+            save a checkpoint every checkpoint_interval generations, 0 never saves.
+        checkpoint_key: tuple, optional
+            what the run is, saved with the checkpoints, see use.checkpoint.
 
         Returns
         -------
@@ -248,16 +431,24 @@ class BatAlgorithm():
 
         """
 
-        # STEP 3, generate initial bats, and retreving the set of the solutions
-        print("STEP-3 :: GENERATING D BATS ARROUNG EACH SOLUTIONS (INITIAL BATS).")
+        # a resumed run already has its bats
+        if self.start_generation == 0:
+            # STEP 3, generate initial bats, and retreving the set of the solutions
+            print("STEP-3 :: GENERATING D BATS ARROUNG EACH SOLUTIONS (INITIAL BATS).")
 
-        # we generate a uniforme distributed set of bats in equal intervals in the search space and compute ODF and OAF fitness
-        self.init_bat()
+            # we generate a uniforme distributed set of bats in equal intervals in the search space and compute ODF and OAF fitness
+            self.init_bat()
 
-        for t in range(self.N_Gen):
+        t = self.start_generation
+        for t in range(self.start_generation, self.N_Gen):
 
             # STEP 4, update Qi,Vi and Xi then move bats to generate a new local solution
             print("GENERATION :: {}".format(t))
+            if self.progressive is not None and self.progressive.refine():
+                print("\tG-{} --> SCORES REFINED ({}), RE-EVALUATING THE POPULATION.".format(
+                    t, self.progressive))
+                self.refresh(t)
+                self.monitor.reset(t)
             print(
                 "\tG-{} --> STEP-4 :: GENERATING NEW SOLUTION AND UPDATING  Qi,Vi AND Xi PARAMETRES.".format(t))
             self.inter_Population = list()
@@ -269,14 +460,13 @@ class BatAlgorithm():
                                                         self.x_best_pos) * self.Q[i]
                     self.Sol[i][j] = self.Sol[i][j] + int(self.v[i][j])
                     self.Sol[i][j] = self.correct(self.Sol[i][j])
-                    x = Solution(kthperm(self.l, self.Sol[i][j]), generation=t)
-                    x.oaf_objective(self.scores)
-                    x.odf_objective(self.scores)
+                    x = self.evaluate_position(self.Sol[i][j], t)
                     self.inter_Population.append(x)
 
             # STEP 5.1, compute ODF and OAF fitness and apply non dominated sorting
             print("\tG-{} --> STEP-5.1 :: APPLY NON DOMINATED SORTING TO GET BEST NP INDIVIDUAL FROM THE LOCAL SOLUTION.".format(t))
-            inter_population = mo.non_dominate_sorting(self.inter_Population)
+            inter_population = mo.non_dominate_sorting(
+                self.inter_Population, self.objectives_number)
 
             # STEP 5.2, get the first NP solution as our new best population
             print("\tG-{} --> STEP-5.2 :: SELECT FIRST NP INDIVIDUAL FROM THE HIGHER FRONT TO BE OUR POPULATION .".format(t))
@@ -300,6 +490,22 @@ class BatAlgorithm():
             print("\tG-{} --> STEP-6 :: SELECTING THE GLOBAL BEST POSITION.".format(t))
             self.best_bat(t)
 
+            # STEP 6.1, check the convergence of the first front
+            front = [self.inter_Population[f] for f in inter_population[0]]
+            self.archive.update(front)
+            if self.screening is not None:
+                self.screening.set_font(front)
+            if self.trace is not None:
+                self.trace.record(t, front)
+            if self.monitor.update(front, t):
+                if self.monitor.out_of_time():
+                    print("TIME LIMIT OF {} SECONDS REACHED, STOPPING.".format(
+                        self.monitor.time_limit))
+                else:
+                    print("NO IMPROVEMENT FOR {} GENERATIONS, STOPPING.".format(
+                        self.monitor.patience))
+                break
+
             # STEP 7.1, generate a local solution arround the global optimum
             print("\tG-{} --> STEP-7.1 :: GENERATE A RANDOM NUMBER AND CREATE A LOCAL SOLUTION ARROND THE BEST SOLUTION.".format(t))
             for i in range(self.NP):
@@ -309,11 +515,10 @@ class BatAlgorithm():
                         new_pos = self.x_best_pos + \
                             self.A[i] // (gauss(-1, 1)**-(1))
                         new_pos = self.correct(new_pos)
-                        x = Solution(kthperm(self.l, new_pos), generation=t)
-                        x.oaf_objective(self.scores)
-                        x.odf_objective(self.scores)
+                        x = self.evaluate_position(new_pos, t)
+                        self.archive.add(x)
 
-                        if mo.domination(self.Population[i], x) == -1:
+                        if mo.domination(self.Population[i], x, self.objectives_number) == -1:
                             self.Population[i] = self.Update_solution(
                                 self.Population[i], x, t)
                             self.Positions[i] = new_pos
@@ -321,28 +526,61 @@ class BatAlgorithm():
                     rnd = int(uniform(0, 100))
                     new_pos = self.Positions[i] + int(rnd)
                     new_pos = self.correct(new_pos)
-                    x = Solution(kthperm(self.l, new_pos), generation=t)
-                    x.oaf_objective(self.scores)
-                    x.odf_objective(self.scores)
+                    # x is only used if it dominates x_best, or by the archive if the
+                    # front doesn't dominate it, so else its odf isn't needed
+                    if self.screening is None:
+                        x = self.evaluate_position(new_pos, t)
+                        kept = True
+                    else:
+                        x = self.cache.solution(
+                            new_pos, t) if self.cache is not None else None
+                        kept = x is not None
+                        if x is None:
+                            x = Solution(kthperm(self.l, new_pos), generation=t)
+                            kept = self.screening.evaluate(
+                                x, self.scores, [self.x_best])
+                            if kept and self.cache is not None:
+                                self.cache.store(new_pos, x)
+                    if kept:
+                        self.archive.add(x)
 
                     # STEP 7.2, if the random number generated < Ai we update Ai and ri
                     print(
                         "\tG-{} --> STEP-7.2 :: GENERATE A RANDOM NUMBER AND UPDATE Ai AND ri if it's < Ai.".format(t))
                     rnd = uniform(0, 1)
-                    if rnd < self.A[i] and mo.domination(x, self.x_best) == -1:
+                    if kept and rnd < self.A[i] and mo.domination(x, self.x_best, self.objectives_number) == -1:
                         self.Population[i] = self.Update_solution(
                             self.Population[i], x, t)
                         self.Positions[i] = new_pos
                         self.A[i] = self.A[i]*self.Alpha
                         self.r[i] = self.r0*(1-exp(-self.Gama*t))
 
-        # STEP 8.1, select the global optimum in the final solution
+            # STEP 7.3, save a checkpoint of the generation
+            if checkpoint_interval and (t + 1) % checkpoint_interval == 0:
+                save_checkpoint(checkpoint_directory, t, self.get_state(t), key=checkpoint_key)
+
+        # STEP 8.1, select the global optimum in the final solution, with
+        # the exact scores
         print("\tG-{} --> STEP-8.1 :: SELECTING THE GLOBAL BEST POSITION.".format(t))
+        if self.progressive is not None:
+            self.progressive.wait()
+            self.refresh(t)
         self.best_bat(t)
 
-        # STEP 8.2, compute the contigue number of the global optimum in the final solution and print the individual
+        # STEP 8.2, print the archived solution with the less contigs, the non dominated
+        # solutions of the whole run are in the archive, x_best included if it isn't dominated
         print("\tG-{} --> STEP-8.2 :: SELECTING THE GLOBAL BEST POSITION.".format(t))
         print("\nSOLUTIONS::\n")
-        self.x_best.contigs_number(self.scores)
-        print(self.x_best)
+        solutions = self.archive.solutions()
+        solutions.sort(key=lambda x: x.contigs)
+        print("ARCHIVE SIZE:: {}".format(len(solutions)))
+        print(solutions[0])
         print("------------")
+        print("HYPERVOLUME PER CPU SECOND:: {}".format(
+            self.monitor.quality_per_cpu_second()))
+        if self.screening is not None:
+            print("SCREENING:: {}".format(self.screening))
+        if self.cache is not None:
+            print("EVALUATION CACHE:: {}".format(self.cache))
+        if self.progressive is not None:
+            print("PROGRESSIVE SCORES:: {}".format(self.progressive))
@@ -0,0 +1,304 @@
+from time import process_time
+from math import sqrt
+from typing import List, Tuple
+
+from models.Solution import Solution
+
+
+class Indicators:
+    @staticmethod
+    def hypervolume(points: List[Tuple[float, float]], reference_point: Tuple[float, float]) -> float:
+        """This function calculates the hypervolume (the dominated area) of a two
+        objective front, where the oaf is maximized and the odf is minimized.
+        The points are sorted once by oaf, then swept while keeping the lowest
+        odf reached so far, so the cost is O(n log n) for n points.
+
+        ...
+
+        Parameters
+        ----------
+        points: list
+            A list of (oaf, odf) tuples.
+        reference_point: tuple
+            The (oaf, odf) point bounding the dominated area, it must be worse
+            than every point of interest, i.e a lower oaf and a higher odf.
+
+        Returns
+        -------
+        float
+            The area dominated by the points, and bounded by the reference point.
+        """
+        ref_oaf, ref_odf = reference_point
+        # Points that don't dominate the reference point add nothing.
+        valid = [p for p in points if p[0] > ref_oaf and p[1] < ref_odf]
+        # Sort by oaf descendant, and by odf ascendant for the ties.
+        valid.sort(key=lambda p: (-p[0], p[1]))
+
+        volume = 0.0
+        current_odf = ref_odf
+        for oaf, odf in valid:
+            # Every point already seen has a greater oaf, so only the strip
+            # under the lowest odf reached so far is new.
+            if odf < current_odf:
+                volume += (oaf - ref_oaf) * (current_odf - odf)
+                current_odf = odf
+
+        return volume
+
+    @staticmethod
+    def igd(points: List[Tuple[float, float]], reference_front: List[Tuple[float, float]]) -> float:
+        """This function calculates the Inverted Generational Distance of a front,
+        i.e the mean distance from each point of the reference front to its closest
+        point in the front. Both objectives are normalized by the ranges of
+        the reference front, so the oaf and the odf weight the same.
+
+        ...
+
+        Parameters
+        ----------
+        points: list
+            A list of (oaf, odf) tuples, the front to evaluate.
+        reference_front: list
+            A list of (oaf, odf) tuples, the best known front.
+
+        Returns
+        -------
+        float
+            The IGD value, the lower the better.
+        """
+        if not points or not reference_front:
+            return float("inf")
+
+        oaf_range = max(p[0] for p in reference_front) - \
+            min(p[0] for p in reference_front) or 1.0
+        odf_range = max(p[1] for p in reference_front) - \
+            min(p[1] for p in reference_front) or 1.0
+
+        total = 0.0
+        for r_oaf, r_odf in reference_front:
+            total += min(sqrt(((r_oaf - oaf) / oaf_range) ** 2 + ((r_odf - odf) / odf_range) ** 2)
+                         for oaf, odf in points)
+
+        return total / len(reference_front)
+
+
+class ConvergenceMonitor:
+    """This is a ConvergenceMonitor class that follows the quality of the
+    rank-1 front from a generation to another, and tells when the search
+    has stagnated.
+
+    ...
+
+    Attributes
+    ----------
+    patience: int
+        The number of generations without hypervolume improvement, after which
+        the search is considered stagnated, 0 disables the early stop.
+    tolerance: float
+        The relative hypervolume gain needed to count as an improvement.
+    reference_point: tuple
+        The (oaf, odf) hypervolume reference point. If None, it is derived from
+        the bounds of the reference front if given, else from the first front
+        at the first update, and again after a reset: such a reference point
+        is only good within a run, the hypervolumes of two runs, or of a run
+        before and after a reset, are then not comparable.
+    reference_front: list
+        A list of (oaf, odf) tuples, the best known front for the IGD, optional.
+    history: list
+        A list of (generation, hypervolume, igd, cpu seconds) tuples.
+    best_hypervolume: float
+        The best hypervolume reached so far.
+    last_improvement: int
+        The generation of the last hypervolume improvement.
+    time_limit: float
+        The CPU seconds after which the search stops, 0 for no limit.
+
+    Methods
+    -------
+    __init__(patience=0, tolerance=1e-6, reference_point=None, reference_front=None, time_limit=0): None
+        The constructor.
+    update(front, generation): bool
+        Records the front of a generation, and tells if the search should stop.
+    out_of_time: bool
+        Tells if the CPU time limit is reached.
+    reset(generation): None
+        Starts the stagnation count again, after the scores changed.
+    quality_per_cpu_second: float
+        The best hypervolume reached, per CPU second used.
+    get_state: dict
+        The state of the monitor, for the checkpoints.
+    set_state(state): None
+        Restores a state returned by get_state.
+    """
+
+    # The margin added to the worst odf of the first front, for the reference point.
+    REFERENCE_MARGIN = 0.1
+
+    def __init__(self, patience=0, tolerance=1e-6, reference_point=None, reference_front=None, time_limit=0):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        patience: int, optional
+            The number of generations without improvement before stopping,
+            0 never stops.
+        tolerance: float, optional
+            The relative hypervolume gain needed to count as an improvement.
+        reference_point: tuple, optional
+            The (oaf, odf) hypervolume reference point, the same one for all
+            the runs of an instance so their hypervolumes compare.
+        reference_front: list, optional
+            A list of (oaf, odf) tuples, the best known front for the IGD.
+        time_limit: float, optional
+            The CPU seconds after which the search stops, 0 for no limit.
+
+        Returns
+        -------
+        None
+        """
+
+        self.patience = patience
+        self.tolerance = tolerance
+        if reference_point is None and reference_front:
+            # The bounds of the best known front, the same for all the runs.
+            reference_point = (0.0, max(p[1] for p in reference_front) *
+                               (1 + self.REFERENCE_MARGIN))
+        self.reference_point = reference_point
+        self.reference_front = reference_front
+        self.history = list()
+        self.best_hypervolume = 0.0
+        self.last_improvement = 0
+        self.time_limit = time_limit
+        # The reference point is set again by reset, unless it was given, or
+        # derived from the reference front.
+        self._given_reference = reference_point is not None
+        self.start = process_time()
+
+    def update(self, front: List[Solution], generation: int) -> bool:
+        """This function records the hypervolume (and the IGD if a reference
+        front is given) of the rank-1 front of a generation.
+
+        ...
+
+        Parameters
+        ----------
+        front: list
+            A list of solutions, the rank-1 front of the generation.
+        generation: int
+            The generation number.
+
+        Returns
+        -------
+        bool
+            True if the search has stagnated for patience generations, or is
+            out of time, False else.
+        """
+        points = [(sol.oaf, sol.odf) for sol in front]
+
+        if self.reference_point is None:
+            self.reference_point = (0.0, max(p[1] for p in points) *
+                                    (1 + self.REFERENCE_MARGIN))
+
+        hypervolume = Indicators.hypervolume(points, self.reference_point)
+        igd = Indicators.igd(
+            points, self.reference_front) if self.reference_front else None
+        self.history.append(
+            (generation, hypervolume, igd, process_time() - self.start))
+
+        if hypervolume > self.best_hypervolume * (1 + self.tolerance):
+            self.best_hypervolume = hypervolume
+            self.last_improvement = generation
+
+        return self.out_of_time() or (self.patience > 0 and generation - self.last_improvement >= self.patience)
+
+    def out_of_time(self) -> bool:
+        """This function tells if the CPU seconds used since the monitor was
+        created passed the time limit.
+
+        ...
+
+        Returns
+        -------
+        bool
+            True if the time limit is reached, False else or without limit.
+        """
+        return self.time_limit > 0 and process_time() - self.start >= self.time_limit
+
+    def reset(self, generation: int) -> None:
+        """This function starts the stagnation count again, from a generation
+        where the objectives changed scale, e.g after the scores were refined
+        by use.progressive, and sets the reference point again at the next
+        update, unless it was given or derived from the reference front.
+
+        ...
+
+        Parameters
+        ----------
+        generation: int
+            The generation number.
+
+        Returns
+        -------
+        None
+        """
+        if not self._given_reference:
+            self.reference_point = None
+        self.best_hypervolume = 0.0
+        self.last_improvement = generation
+
+    def quality_per_cpu_second(self) -> float:
+        """This function returns the best hypervolume reached, per CPU second
+        used since the monitor was created, to compare the algorithms.
+
+        ...
+
+        Returns
+        -------
+        float
+            The best hypervolume per CPU second.
+        """
+        if not self.history:
+            return 0.0
+        return self.best_hypervolume / max(self.history[-1][3], 1e-9)
+
+    def get_state(self) -> dict:
+        """This function returns the state of the monitor, to be saved in
+        the checkpoints.
+
+        ...
+
+        Returns
+        -------
+        dict
+            The state of the monitor.
+        """
+        return {
+            "reference_point": self.reference_point,
+            "history": list(self.history),
+            "best_hypervolume": self.best_hypervolume,
+            "last_improvement": self.last_improvement,
+            "cpu_seconds": process_time() - self.start,
+        }
+
+    def set_state(self, state: dict) -> None:
+        """This function restores a state returned by get_state, the CPU
+        time already spent is carried on.
+
+        ...
+
+        Parameters
+        ----------
+        state: dict
+            The state of the monitor.
+
+        Returns
+        -------
+        None
+        """
+        self.reference_point = state["reference_point"]
+        self.history = list(state["history"])
+        self.best_hypervolume = state["best_hypervolume"]
+        self.last_improvement = state["last_improvement"]
+        self.start = process_time() - state["cpu_seconds"]
@@ -0,0 +1,212 @@
+from time import perf_counter
+from typing import List, Set
+from random import sample, randint, random
+
+from models.Solution import Solution
+
+
+class LocalSearch:
+    """This is a LocalSearch class, a memetic stage for the NSGA-II algorithm,
+    that improves the oaf of some childs before they are evaluated.
+    Two moves are tried at random positions:
+    2-opt, reversing a segment of the genome.
+    Or-opt, moving a block of 1 to 3 fragments somewhere else.
+    Since the scores matrix is symmetric, a move changes at most three
+    adjacent pairs, so its oaf change is calculated in O(1), and the move is
+    done only if the oaf increases. The odf is calculated afterward, with the
+    other objective functions of the child.
+    """
+
+    @staticmethod
+    def two_opt_delta(genome: List[int], scores: List[List[float]], i: int, j: int) -> float:
+        """This function calculates the oaf change of reversing genome[i..j].
+
+        ...
+
+        Parameters
+        ----------
+        genome: list
+            The genome.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        i: int
+            The first index of the segment.
+        j: int
+            The last index of the segment, greater than i.
+
+        Returns
+        -------
+        float
+            The oaf change.
+        """
+        delta = 0.0
+        if i > 0:
+            delta += scores[genome[i - 1]][genome[j]] - \
+                scores[genome[i - 1]][genome[i]]
+        if j < len(genome) - 1:
+            delta += scores[genome[i]][genome[j + 1]] - \
+                scores[genome[j]][genome[j + 1]]
+        return delta * 2
+
+    @staticmethod
+    def or_opt_delta(genome: List[int], scores: List[List[float]], i: int, k: int, p: int) -> float:
+        """This function calculates the oaf change of moving the block
+        genome[i..i+k-1] between genome[p] and genome[p + 1].
+
+        ...
+
+        Parameters
+        ----------
+        genome: list
+            The genome.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        i: int
+            The first index of the block.
+        k: int
+            The lenght of the block.
+        p: int
+            The index the block is put after, -1 for the start of the genome,
+            outside of [i - 1, i + k - 1].
+
+        Returns
+        -------
+        float
+            The oaf change.
+        """
+        last = len(genome) - 1
+        first_block = genome[i]
+        last_block = genome[i + k - 1]
+        before = genome[i - 1] if i > 0 else None
+        after = genome[i + k] if i + k <= last else None
+        left = genome[p] if p >= 0 else None
+        right = genome[p + 1] if p < last else None
+
+        delta = 0.0
+        # The pairs broken.
+        if before is not None:
+            delta -= scores[before][first_block]
+        if after is not None:
+            delta -= scores[last_block][after]
+        if left is not None and right is not None:
+            delta -= scores[left][right]
+        # The pairs made.
+        if before is not None and after is not None:
+            delta += scores[before][after]
+        if left is not None:
+            delta += scores[left][first_block]
+        if right is not None:
+            delta += scores[last_block][right]
+        return delta * 2
+
+    @staticmethod
+    def improve(genome: List[int], scores: List[List[float]], deadline: float, patience: int = 0) -> int:
+        """This function improves the oaf of a genome, in place, with random
+        2-opt and Or-opt moves, untill patience moves in a row don't improve
+        it, or the deadline is reached.
+
+        ...
+
+        Parameters
+        ----------
+        genome: list
+            The genome, changed in place.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        deadline: float
+            The perf_counter time to stop at.
+        patience: int, optional
+            The moves without improvement to stop at, 0 for twice the genome size.
+
+        Returns
+        -------
+        int
+            The number of moves done.
+        """
+        g_len = len(genome)
+        if g_len < 3:
+            return 0
+        patience = patience or 2 * g_len
+
+        moves = 0
+        failures = 0
+        trials = 0
+        while failures < patience:
+            # Reading the clock at each trial would cost more than the trial.
+            trials += 1
+            if trials % 64 == 0 and perf_counter() > deadline:
+                break
+
+            if random() < 0.5:
+                # 2-opt
+                i, j = sorted(sample(range(g_len), 2))
+                if LocalSearch.two_opt_delta(genome, scores, i, j) > 0:
+                    genome[i:j + 1] = genome[i:j + 1][::-1]
+                    moves += 1
+                    failures = 0
+                    continue
+            else:
+                # Or-opt
+                k = randint(1, min(3, g_len - 2))
+                i = randint(0, g_len - k)
+                p = randint(-1, g_len - k - 2)
+                # Skip the block itself, and the place it already is at.
+                if p >= i - 1:
+                    p += k + 1
+                if LocalSearch.or_opt_delta(genome, scores, i, k, p) > 0:
+                    block = genome[i:i + k]
+                    del genome[i:i + k]
+                    position = p + 1 if p < i else p + 1 - k
+                    genome[position:position] = block
+                    moves += 1
+                    failures = 0
+                    continue
+            failures += 1
+
+        return moves
+
+    @staticmethod
+    def improve_childs(childs: List[Solution], scores: List[List[float]], hash_values: Set[int], rate: float, time_limit: float) -> int:
+        """This function improves a part of the childs of a generation, before
+        their objective functions are calculated, within a time limit.
+        An improved genome replaces the child's genome only if it doesn't
+        exist already, its hash value is then added to the hash values.
+
+        ...
+
+        Parameters
+        ----------
+        childs: list
+            A list of solutions, not evaluated yet.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        hash_values: set
+            A set of int, that contains the hash values of the already exists solutions.
+        rate: float
+            The part of the childs improved.
+        time_limit: float
+            The seconds the whole stage can take.
+
+        Returns
+        -------
+        int
+            The number of childs improved.
+        """
+        deadline = perf_counter() + time_limit
+        count = round(len(childs) * rate)
+        improved = 0
+
+        for child in sample(childs, count):
+            if perf_counter() > deadline:
+                break
+            genome = child.genome.copy()
+            if LocalSearch.improve(genome, scores, deadline) == 0:
+                continue
+
+            hash_val = hash(tuple(genome))
+            if hash_val not in hash_values:
+                hash_values.add(hash_val)
+                child.genome = genome
+                improved += 1
+
+        return improved
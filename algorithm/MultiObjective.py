@@ -1,13 +1,18 @@
+from math import factorial
 from typing import List, Tuple, Set
 from random import sample, randint, random
 
 from models.Solution import Solution
+from use.backends import kernels
+from algorithm.Seeding import Seeding
 
 
 class MultiObjective:
     @staticmethod
-    def init_population(fragments_number: int, population_size: int) -> Tuple[List[Solution], Set[int]]:
+    def init_population(fragments_number: int, population_size: int, scores: List[List[float]] = None, seeding_rate: float = 0.0, min_distance: float = 0.1) -> Tuple[List[Solution], Set[int]]:
         """This function create the initial population for the NSGA-II algorithm.
+        With the scores, seeding_rate of the population is seeded from the overlap
+        scores (see Seeding), and the rest is random.
 
         ...
 
@@ -19,12 +24,26 @@ class MultiObjective:
             of indexes for these fragments, stored in another variable.
         population_size: int
             The size of the wanted initial population.
+        scores: list, optional
+            A list of list(matrix) of float, or a ScoreMatrix, for the seeding.
+        seeding_rate: float, optional
+            The part of the population seeded.
+        min_distance: float, optional
+            The smallest adjacency distance between two seeded solutions.
 
         Returns
         -------
         list
             A list of Solution.
+
+        Raises
+        ------
+        ValueError
+            If there are less orderings of the fragments than solutions wanted.
         """
+        if factorial(fragments_number) < population_size:
+            raise ValueError("{} fragments have less orderings than the {} solutions of the population.".format(
+                fragments_number, population_size))
 
         l = [i for i in range(fragments_number)]  # Our fragments, indexes
 
@@ -32,7 +51,12 @@ class MultiObjective:
         hash_values = set()
         solutions = list()  # The list of solutions.
 
-        count = 0  # To check if we've reached the number of the wanted population
+        if scores is not None and seeding_rate > 0:
+            for genome in Seeding.seed_genomes(scores, fragments_number, round(population_size * seeding_rate), hash_values, min_distance):
+                solutions.append(Solution(genome, generation=0))
+
+        # To check if we've reached the number of the wanted population
+        count = len(solutions)
         while count != population_size:
             sol = sample(l, fragments_number)
             # We can't calculate the hash value of mutable objects.
@@ -47,10 +71,12 @@ class MultiObjective:
         return solutions, hash_values
 
     @staticmethod
-    def domination(sol_1: Solution, sol_2: Solution) -> int:
+    def domination(sol_1: Solution, sol_2: Solution, objectives_number: int = 2) -> int:
         """This function test the dominance, between two solutions
         based on the two objective function listed above.
         It is for The Non-Domination Sorting Algorithm.
+        With more objectives, the objectives vectors are compared, a solution
+        dominates another if it is not worse in any objective, and better in one.
 
         ...
 
@@ -60,6 +86,8 @@ class MultiObjective:
             The first solution.
         sol_2: Solution
             The second solution.
+        objectives_number: int, optional
+            The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
 
         Returns
         -------
@@ -69,6 +97,15 @@ class MultiObjective:
             if 1 sol_2 dominates sol_1.
             if 0 neither dominates the other.
         """
+        if objectives_number > 2:
+            vector_1 = sol_1.objectives(objectives_number)
+            vector_2 = sol_2.objectives(objectives_number)
+            if MultiObjective._dominates(vector_1, vector_2):
+                return -1
+            if MultiObjective._dominates(vector_2, vector_1):
+                return 1
+            return 0
+
         if (sol_1.oaf >= sol_2.oaf) and (sol_1.odf < sol_2.odf):
             return -1
         elif (sol_2.oaf >= sol_1.oaf) and (sol_2.odf < sol_1.odf):
@@ -77,10 +114,21 @@ class MultiObjective:
             return 0
 
     @staticmethod
-    def non_dominate_sorting(population: List[Solution]) -> List[List[int]]:
+    def _dominates(vector_1: tuple, vector_2: tuple) -> bool:
+        # The Pareto dominance of two objectives vectors, all minimized.
+        return all(a <= b for a, b in zip(vector_1, vector_2)) and vector_1 != vector_2
+
+    @staticmethod
+    def non_dominate_sorting(population: List[Solution], objectives_number: int = 2) -> List[List[int]]:
         """This fonction is for the non dominate sorting for the NSGA-II Algorithm,
         The how the function works wont be explained here, look at the full Algorithm
         online, or take a look at the research paper.
+        With two objectives, it runs in O(n log n) instead of O(n²), and each font
+        is sorted by index.
+        With more objectives, it uses the Efficient Non-dominated Sort with a binary
+        search (ENS-BS): the solutions are taken in the lexicographic order of their
+        objectives vectors, so a solution comes after all the ones dominating it,
+        and it goes to the first font that has none of them, found by a binary search.
         It returns the fonts, where each font is a list of integers, that represents
         the indexes of the solutions, in the population list.
 
@@ -90,6 +138,8 @@ class MultiObjective:
         ----------
         population: list
             A list of solutions.
+        objectives_number: int, optional
+            The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
 
 
         Returns
@@ -97,49 +147,51 @@ class MultiObjective:
         list
             A list of lists of integers.
         """
-        # It contains all our fonts, in which each solutoin belongs to only one.
-        fonts = [[]]
-        # Each solution my dominate other solutions, in that case they are stores here.
-        dominated = [[] for i in range(len(population))]
-        # In case a solution gets dominated by another solution, we store how many times.
-        dominate_number = [0 for i in range(len(population))]
-
-        # STEP-1: Calculation the first Font.
-        for p in range(len(population)):
-            for q in range(len(population)):
-                # Go to the domination function.
-                d = MultiObjective.domination(population[p], population[q])
-                if d == -1:
-                    dominated[p].append(q)
-                if d == 1:
-                    dominate_number[p] += 1
-            if dominate_number[p] == 0:
-                fonts[0].append(p)
-                # set the rank to one, since it belongs to the first font.
-                population[p].rank = 1
-
-        # STEP-2: Calculating the rest of the Fonts.
-        fonts_counter = 1
-
-        while fonts_counter <= len(fonts):
-            for p in fonts[fonts_counter - 1]:
-                for q in dominated[p]:
-                    dominate_number[q] -= 1
-
-                    # if the solution is no longer dominated, add it to the next Front.
-                    if dominate_number[q] == 0:
-                        # set the rank to one, since it belongs to the next font.
-                        population[q].rank = fonts_counter + 1
-                        if len(fonts) == fonts_counter:
-                            fonts.append([q])
-                        else:
-                            fonts[-1].append(q)
-            fonts_counter += 1
+        if objectives_number > 2:
+            fonts = MultiObjective._efficient_sorting(
+                [sol.objectives(objectives_number) for sol in population])
+            for rank, font in enumerate(fonts, 1):
+                for p in font:
+                    population[p].rank = rank
+            return fonts
+
+        # The fonts come from the fronts kernel of the chosen backend, a sweep of
+        # the solutions sorted by oaf then odf, with the same domination rule.
+        fonts = kernels().fronts([sol.oaf for sol in population],
+                                 [sol.odf for sol in population])
+
+        # set the rank of each solution, one for the first font.
+        for rank, font in enumerate(fonts, 1):
+            for p in font:
+                population[p].rank = rank
 
         return fonts
 
     @staticmethod
-    def crowding_distance(population: List[Solution], fonts: List[List[int]]) -> List[float]:
+    def _efficient_sorting(vectors: List[tuple]) -> List[List[int]]:
+        # ENS-BS, if a font has a solution dominating the current one, all
+        # the fonts before it have one too, so the fonts are binary searched.
+        fonts = list()
+        for k in sorted(range(len(vectors)), key=lambda k: vectors[k]):
+            low, high = 0, len(fonts)
+            while low < high:
+                middle = (low + high) // 2
+                # The last solutions added are the closest ones, so checked first.
+                if any(MultiObjective._dominates(vectors[q], vectors[k]) for q in reversed(fonts[middle])):
+                    low = middle + 1
+                else:
+                    high = middle
+            if low == len(fonts):
+                fonts.append([k])
+            else:
+                fonts[low].append(k)
+
+        for font in fonts:
+            font.sort()
+        return fonts or [[]]
+
+    @staticmethod
+    def crowding_distance(population: List[Solution], fonts: List[List[int]], objectives_number: int = 2) -> List[float]:
         """This function is for calculation the crowding distance of each solution.
         at first we sort the solution, for each front based on oaf values,
         and odf values separately, while odf ascendant dort, and oaf is descendant sort.
@@ -156,6 +208,8 @@ class MultiObjective:
             A list of solutions.
         fonts: list
             A list of Fonts(list of int).
+        objectives_number: int, optional
+            The number of objectives, with more than 2, see m_crowding_distance.
 
 
         Returns
@@ -163,6 +217,9 @@ class MultiObjective:
         list
             A list of integers, that represents the crowding distance of each solution.
         """
+        if objectives_number > 2:
+            return MultiObjective.m_crowding_distance(population, fonts, objectives_number)
+
         # Each fonts, will be sorted first by oaf, then odf
         # while maximize oaf, and minimize odf
         oaf_sorted_fonts = []
@@ -243,3 +300,54 @@ class MultiObjective:
                                                             odf_cwrowding[index])
 
         return crowding
+
+    @staticmethod
+    def m_crowding_distance(population: List[Solution], fonts: List[List[int]], objectives_number: int) -> List[float]:
+        """This function is the crowding distance for any number of objectives.
+        Each font is sorted by each objective, a solution gets the normalized
+        distance between its two neighbours in each sort, summed over the objectives.
+        Like for two objectives, the limits of a sort are set to -1, but an
+        objective with the same value for the whole font is skipped, e.g the
+        contigs of a font all with one contig, it would set them all to -1.
+
+        ...
+
+        Parameters
+        ----------
+        population: list
+            A list of solutions.
+        fonts: list
+            A list of Fonts(list of int).
+        objectives_number: int
+            The number of objectives.
+
+        Returns
+        -------
+        list
+            A list of float, that represents the crowding distance of each solution.
+        """
+        vectors = [sol.objectives(objectives_number) for sol in population]
+        crowding = [0.0 for i in range(len(population))]
+        limits = [False for i in range(len(population))]
+
+        for font in fonts:
+            for objective in range(objectives_number):
+                ordered = sorted(font, key=lambda p: vectors[p][objective])
+                if not ordered:
+                    continue
+                span = vectors[ordered[-1]][objective] - \
+                    vectors[ordered[0]][objective]
+                if span == 0 and len(ordered) > 1:
+                    # All equal, this objective tells no solution apart.
+                    continue
+                limits[ordered[0]] = limits[ordered[-1]] = True
+                for q in range(1, len(ordered) - 1):
+                    crowding[ordered[q]] += (vectors[ordered[q + 1]][objective] -
+                                             vectors[ordered[q - 1]][objective]) / span
+
+        for index in range(len(population)):
+            if limits[index]:
+                crowding[index] = float(-1)
+            population[index].crowding_distance = crowding[index]
+
+        return crowding
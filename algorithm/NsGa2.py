@@ -66,6 +66,38 @@ class NsGa2:
 
         return selection
 
+    @staticmethod
+    def select_pair(population: List[Solution]) -> List[int]:
+        """This function selects two different parents, each one by a binary
+        tournament: of two solutions picked randomly, the one with the lower
+        rank wins, and on a tie, the one with the greater crowding distance,
+        where -1 (the limits of a font) counts as infinite.
+
+        ...
+
+        Parameters
+        ----------
+        population: list
+            A list of solutions, with their rank and crowding distance.
+
+
+        Returns
+        -------
+        list
+            A list of two integers, the indexes of the parents.
+        """
+        def distance(i: int) -> float:
+            crowding = population[i].crowding_distance
+            return float("inf") if crowding == -1 else crowding
+
+        selection = list()
+        while len(selection) != 2:
+            # The second parent is picked among the other solutions.
+            candidates = [i for i in range(len(population)) if i not in selection]
+            pair = sample(candidates, 2) if len(candidates) > 1 else candidates
+            selection.append(min(pair, key=lambda i: (population[i].rank, -distance(i))))
+        return selection
+
     @staticmethod
     def crossover(population: List[Solution], selection: List[int], hash_values: Set[int], generation_counter: int) -> List[Solution]:
         """This function if for operating the cross over operation on the selection pool solutions
@@ -185,3 +217,145 @@ class NsGa2:
                         Solution(sol, generation=generation_counter))
 
         return mutation_childs
+
+    @staticmethod
+    def order_crossover(population: List[Solution], selection: List[int], hash_values: Set[int], generation_counter: int) -> List[Solution]:
+        """This function operates the order crossover (OX) on the selection pool solutions,
+        a child keeps a segment of one parent, and the other fragments in the order of the
+        other parent, so unlike the double point crossover, a child is always a valid solution.
+
+        ...
+
+        Parameters
+        ----------
+        population: list
+            A list of solutions.
+        selectoin: list
+            A list of int(solutions indexes) for the selection pool.
+        hash_values: set
+            A set of int, that contains the hash values of the already exists solutions.
+        generation_counter: int
+            An int, that represents the generation number that the solution will be created at.
+
+
+        Returns
+        -------
+        list
+            A list of solutions, that represents the new created solotions from the crossover process.
+        """
+        cross_childs = list()
+        g_len = len(population[0].genome)
+
+        for p in range(0, len(selection) - 1, 2):
+            p_1 = population[selection[p]].genome
+            p_2 = population[selection[p + 1]].genome
+
+            point_1 = randint(0, g_len - 1)
+            point_2 = randint(0, g_len - 1)
+            if point_1 > point_2:
+                point_1, point_2 = point_2, point_1
+
+            for first, second in [(p_1, p_2), (p_2, p_1)]:
+                # The segment of the first parent, then the other fragments
+                # in the order of the second one, from after the segment.
+                segment = first[point_1:point_2 + 1]
+                kept = set(segment)
+                rest = [f for f in second[point_2 + 1:] + second[:point_2 + 1]
+                        if f not in kept]
+                tail = g_len - point_2 - 1
+                sol = rest[tail:] + segment + rest[:tail]
+
+                hash_val = hash(tuple(sol))
+                if hash_val not in hash_values:
+                    hash_values.add(hash_val)
+                    cross_childs.append(
+                        Solution(sol, generation=generation_counter))
+
+        return cross_childs
+
+    @staticmethod
+    def inversion_mutation(population: List[Solution], selection: List[int], hash_values: Set[int], mutation_probability: float, generation_counter: int) -> List[Solution]:
+        """This function operates the inversion mutation on the selection pool solutions,
+        reversing the fragments between two random points, which changes only two
+        adjacent pairs of the solution.
+
+        ...
+
+        Parameters
+        ----------
+        population: list
+            A list of solutions.
+        selectoin: list
+            A list of int(solutions indexes) for the selection pool.
+        hash_values: set
+            A set of int, that contains the hash values of the already exists solutions.
+        mutation_probability: float
+            A float, to determine the mutation rate.
+        generation_counter: int
+            An int, that represents the generation number that the solution will created at.
+
+
+        Returns
+        -------
+        list
+            A list of solutions, that represents the new created solotions from the mutation process.
+        """
+        mutation_childs = list()
+        g_len = len(population[0].genome)
+
+        for p in selection:
+            if random() < mutation_probability:
+                sol = population[p].genome.copy()
+                point_1, point_2 = sorted(sample(range(g_len), 2))
+                sol[point_1:point_2 + 1] = sol[point_1:point_2 + 1][::-1]
+
+                hash_val = hash(tuple(sol))
+                if hash_val not in hash_values:
+                    hash_values.add(hash_val)
+                    mutation_childs.append(
+                        Solution(sol, generation=generation_counter))
+
+        return mutation_childs
+
+    @staticmethod
+    def insertion_mutation(population: List[Solution], selection: List[int], hash_values: Set[int], mutation_probability: float, generation_counter: int) -> List[Solution]:
+        """This function operates the insertion mutation on the selection pool solutions,
+        moving one random fragment to another random position.
+
+        ...
+
+        Parameters
+        ----------
+        population: list
+            A list of solutions.
+        selectoin: list
+            A list of int(solutions indexes) for the selection pool.
+        hash_values: set
+            A set of int, that contains the hash values of the already exists solutions.
+        mutation_probability: float
+            A float, to determine the mutation rate.
+        generation_counter: int
+            An int, that represents the generation number that the solution will created at.
+
+
+        Returns
+        -------
+        list
+            A list of solutions, that represents the new created solotions from the mutation process.
+        """
+        mutation_childs = list()
+        g_len = len(population[0].genome)
+
+        for p in selection:
+            if random() < mutation_probability:
+                sol = population[p].genome.copy()
+                point_1, point_2 = sample(range(g_len), 2)
+                sol.insert(point_2, sol.pop(point_1))
+
+                hash_val = hash(tuple(sol))
+                if hash_val not in hash_values:
+                    hash_values.add(hash_val)
+                    mutation_childs.append(
+                        Solution(sol, generation=generation_counter))
+
+        return mutation_childs
@@ -0,0 +1,267 @@
+from time import perf_counter
+from random import random
+from typing import List, Set
+
+from models.Solution import Solution
+from algorithm.NsGa2 import NsGa2 as nsga2
+from algorithm.LocalSearch import LocalSearch as ls
+
+
+class OperatorScheduler:
+    """This is an OperatorScheduler class, a multi-armed bandit choosing the
+    variation operator of each pair of parents of the NSGA-II, instead of
+    always operating the same crossover and mutation.
+    Each operator is charged for the CPU seconds of its childs, made and
+    evaluated, and credited for its childs in the first font at the end of the
+    generation. Its quality is a moving average of its credits per CPU second,
+    and the operators are chosen with probabilities matching their quality,
+    each one keeping a minimum probability, so an operator that stopped paying
+    off early can still come back.
+
+    ...
+
+    Attributes
+    ----------
+    operators: list
+        The operators names, among OPERATORS.
+    learning_rate: float
+        The weight of the last generation in the quality of an operator.
+    minimum_probability: float
+        The minimum probability of choosing each operator.
+    local_search_time: float
+        The seconds of one local search.
+    probabilities: dict
+        The probability of choosing each operator.
+    quality: dict
+        The credits per CPU second of each operator, as a moving average.
+    uses: dict
+        The number of times each operator was chosen.
+    credits: dict
+        The number of childs of each operator in the first font.
+    seconds: dict
+        The CPU seconds of each operator.
+
+    Methods
+    -------
+    __init__(operators, learning_rate=0.3, minimum_probability=0.05, local_search_time=0.1): None
+        The constructor.
+    choose: str
+        Chooses an operator.
+    apply(operator, population, pair, hash_values, generation_counter, scores): list
+        Makes the childs of a pair of parents.
+    charge(operator, seconds, childs): None
+        Charges an operator for its childs.
+    credit: None
+        Credits the operators for the childs of the generation in the first font.
+    get_state: dict
+        The state of the scheduler, for the checkpoints.
+    set_state(state): None
+        Restores a state returned by get_state.
+    """
+
+    # The operators: two crossovers, three mutations and the local search,
+    # that improves a copy of each parent.
+    OPERATORS = ("two_point", "order", "swap",
+                 "inversion", "insertion", "local_search")
+
+    def __init__(self, operators: List[str], learning_rate: float = 0.3, minimum_probability: float = 0.05, local_search_time: float = 0.1):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        operators: list
+            The operators names, among OPERATORS.
+        learning_rate: float, optional
+            The weight of the last generation in the quality of an operator.
+        minimum_probability: float, optional
+            The minimum probability of choosing each operator.
+        local_search_time: float, optional
+            The seconds of one local search.
+
+        Returns
+        -------
+        None
+        """
+        for operator in operators:
+            if operator not in self.OPERATORS:
+                raise ValueError("The operator {} is unknown, expected one of {}.".format(
+                    operator, self.OPERATORS))
+        if not operators:
+            raise ValueError("The scheduler needs at least one operator.")
+        self.operators = list(operators)
+        self.learning_rate = learning_rate
+        self.minimum_probability = min(
+            minimum_probability, 1 / len(self.operators))
+        self.local_search_time = local_search_time
+        self.probabilities = {operator: 1 / len(self.operators)
+                              for operator in self.operators}
+        self.quality = {operator: 0.0 for operator in self.operators}
+        self.uses = {operator: 0 for operator in self.operators}
+        self.credits = {operator: 0 for operator in self.operators}
+        self.seconds = {operator: 0.0 for operator in self.operators}
+        # The childs and the CPU seconds of each operator, this generation.
+        self._childs = {operator: list() for operator in self.operators}
+        self._seconds = {operator: 0.0 for operator in self.operators}
+
+    def choose(self) -> str:
+        """This function chooses an operator, with the probabilities.
+
+        ...
+
+        Returns
+        -------
+        str
+            The operator name.
+        """
+        draw = random()
+        for operator in self.operators:
+            draw -= self.probabilities[operator]
+            if draw < 0:
+                break
+        self.uses[operator] += 1
+        return operator
+
+    def apply(self, operator: str, population: List[Solution], pair: List[int], hash_values: Set[int], generation_counter: int, scores: List[List[float]]) -> List[Solution]:
+        """This function makes the childs of a pair of parents with an
+        operator, the childs are not evaluated.
+
+        ...
+
+        Parameters
+        ----------
+        operator: str
+            The operator name.
+        population: list
+            A list of solutions.
+        pair: list
+            The indexes of the two parents.
+        hash_values: set
+            A set of int, that contains the hash values of the already exists solutions.
+        generation_counter: int
+            The generation number that the childs are created at.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+
+        Returns
+        -------
+        list
+            A list of solutions, the new childs.
+        """
+        if operator == "two_point":
+            return nsga2.crossover(population, pair, hash_values, generation_counter)
+        if operator == "order":
+            return nsga2.order_crossover(population, pair, hash_values, generation_counter)
+        if operator == "swap":
+            return nsga2.mutation(population, pair, hash_values, 1.0, generation_counter)
+        if operator == "inversion":
+            return nsga2.inversion_mutation(population, pair, hash_values, 1.0, generation_counter)
+        if operator == "insertion":
+            return nsga2.insertion_mutation(population, pair, hash_values, 1.0, generation_counter)
+
+        childs = list()
+        deadline = perf_counter() + self.local_search_time
+        for p in pair:
+            genome = population[p].genome.copy()
+            if ls.improve(genome, scores, deadline) == 0:
+                continue
+            hash_val = hash(tuple(genome))
+            if hash_val not in hash_values:
+                hash_values.add(hash_val)
+                childs.append(
+                    Solution(genome, generation=generation_counter))
+        return childs
+
+    def charge(self, operator: str, seconds: float, childs: List[Solution]) -> None:
+        """This function charges an operator for the CPU seconds of its
+        childs, made and evaluated, they are credited at the end of the generation.
+
+        ...
+
+        Parameters
+        ----------
+        operator: str
+            The operator name.
+        seconds: float
+            The CPU seconds.
+        childs: list
+            The evaluated childs kept.
+
+        Returns
+        -------
+        None
+        """
+        self._seconds[operator] += seconds
+        self._childs[operator].extend(childs)
+
+    def credit(self) -> None:
+        """This function credits each operator used this generation for its
+        childs in the first font, updates the qualities, and the probabilities.
+
+        ...
+
+        Returns
+        -------
+        None
+        """
+        for operator in self.operators:
+            seconds = self._seconds[operator]
+            if seconds <= 0 and not self._childs[operator]:
+                continue
+            credits = sum(1 for child in self._childs[operator] if child.rank == 1)
+            self.credits[operator] += credits
+            self.seconds[operator] += seconds
+            self.quality[operator] += self.learning_rate * \
+                (credits / max(seconds, 1e-6) - self.quality[operator])
+            self._childs[operator] = list()
+            self._seconds[operator] = 0.0
+
+        total = sum(self.quality.values())
+        share = 1 - self.minimum_probability * len(self.operators)
+        for operator in self.operators:
+            self.probabilities[operator] = self.minimum_probability + share * \
+                (self.quality[operator] / total if total > 0 else 1 / len(self.operators))
+
+    def get_state(self) -> dict:
+        """This function returns the state of the scheduler, to be saved in
+        the checkpoints.
+
+        ...
+
+        Returns
+        -------
+        dict
+            The state of the scheduler.
+        """
+        return {
+            "probabilities": dict(self.probabilities),
+            "quality": dict(self.quality),
+            "uses": dict(self.uses),
+            "credits": dict(self.credits),
+            "seconds": dict(self.seconds),
+        }
+
+    def set_state(self, state: dict) -> None:
+        """This function restores a state returned by get_state.
+
+        ...
+
+        Parameters
+        ----------
+        state: dict
+            The state of the scheduler.
+
+        Returns
+        -------
+        None
+        """
+        for name in ("probabilities", "quality", "uses", "credits", "seconds"):
+            values = getattr(self, name)
+            for operator in self.operators:
+                values[operator] = state[name].get(operator, values[operator])
+
+    def __str__(self):
+        return ", ".join("{}: {:.0%} ({} IN THE FIRST FONT IN {:.2f} S)".format(
+            operator, self.probabilities[operator], self.credits[operator], self.seconds[operator])
+            for operator in self.operators)
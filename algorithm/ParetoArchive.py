@@ -0,0 +1,269 @@
+from bisect import bisect_left, bisect_right
+from typing import List
+
+from models.Solution import Solution
+from algorithm.MultiObjective import MultiObjective as mo
+from use.checkpoint import pack_population, unpack_population
+
+
+class ParetoArchive:
+    """This is a ParetoArchive class, an external archive of the non dominated
+    solutions found during a run, so a good solution lost by the population is
+    still kept. A new solution is added if no archived one dominates it, and
+    the archived ones it dominates are removed.
+    With two objectives, the archive is kept sorted by (odf, oaf), where the oaf
+    never decreases, so a solution is dominated if the last one with a lower odf
+    has an oaf as high, and the ones it dominates are the ones right after its
+    odf with an oaf not higher: both found in O(log n) by binary search.
+    With more objectives, the archive is a list checked in O(n).
+    Once the capacity is passed, the most crowded solution is removed.
+
+    ...
+
+    Attributes
+    ----------
+    capacity: int
+        The maximum number of solutions, 0 for no limit.
+    objectives_number: int
+        The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
+    insertions: int
+        The number of solutions added.
+
+    Methods
+    -------
+    __init__(capacity=0, objectives_number=2): None
+        The constructor.
+    add(solution): bool
+        Adds a solution if it isn't dominated.
+    update(solutions): int
+        Adds many solutions.
+    refresh(scores): None
+        Evaluates the archived solutions again, after the scores changed.
+    solutions: list
+        The archived solutions.
+    get_state: dict
+        The archive, for a checkpoint.
+    set_state(state): None
+        Restores the archive from a checkpoint.
+    """
+
+    def __init__(self, capacity: int = 0, objectives_number: int = 2):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        capacity: int, optional
+            The maximum number of solutions, 0 for no limit.
+        objectives_number: int, optional
+            The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
+
+        Returns
+        -------
+        None
+        """
+        self.capacity = capacity
+        self.objectives_number = objectives_number
+        self.insertions = 0
+        # The archived solutions, and for two objectives their (odf, oaf) keys
+        # and oaf, in the same order.
+        self._solutions = list()
+        self._keys = list()
+        self._oaf = list()
+
+    def __len__(self):
+        return len(self._solutions)
+
+    @staticmethod
+    def _copy(solution: Solution) -> Solution:
+        # The population's solutions are changed in place by the algorithms.
+        copy = Solution(solution.genome, generation=solution.generation)
+        copy.oaf = solution.oaf
+        copy.odf = solution.odf
+        copy.contigs = solution.contigs
+        copy.orientations = solution.orientations
+        copy.rank = 1
+        return copy
+
+    def add(self, solution: Solution) -> bool:
+        """This function adds a copy of an evaluated solution, if no archived
+        solution dominates it, or has the same objectives.
+
+        ...
+
+        Parameters
+        ----------
+        solution: Solution
+            The solution.
+
+        Returns
+        -------
+        bool
+            True if the solution was added.
+        """
+        if self.objectives_number > 2:
+            added = self._add_list(solution)
+        else:
+            added = self._add_sorted(solution)
+
+        if added:
+            self.insertions += 1
+            if self.capacity and len(self._solutions) > self.capacity:
+                self._truncate()
+        return added
+
+    def _add_sorted(self, solution: Solution) -> bool:
+        key = (solution.odf, solution.oaf)
+        start = bisect_left(self._keys, (solution.odf, float("-inf")))
+        # The last solution with a lower odf, it has the highest oaf of them.
+        if start > 0 and self._oaf[start - 1] >= solution.oaf:
+            return False
+
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            return False
+
+        # The solutions with a higher odf, and an oaf not higher, are dominated.
+        first = bisect_right(self._keys, (solution.odf, float("inf")))
+        last = bisect_right(self._oaf, solution.oaf, first)
+        del self._keys[first:last]
+        del self._oaf[first:last]
+        del self._solutions[first:last]
+
+        self._keys.insert(position, key)
+        self._oaf.insert(position, solution.oaf)
+        self._solutions.insert(position, self._copy(solution))
+        return True
+
+    def _add_list(self, solution: Solution) -> bool:
+        vector = solution.objectives(self.objectives_number)
+        kept = list()
+        for archived in self._solutions:
+            other = archived.objectives(self.objectives_number)
+            if other == vector or mo.domination(archived, solution, self.objectives_number) == -1:
+                return False
+            if mo.domination(solution, archived, self.objectives_number) != -1:
+                kept.append(archived)
+        kept.append(self._copy(solution))
+        self._solutions = kept
+        return True
+
+    def _truncate(self) -> None:
+        # Removes the solution with the lowest crowding distance, the limits
+        # of each objective are never removed.
+        if self.objectives_number > 2:
+            mo.m_crowding_distance(self._solutions, [list(
+                range(len(self._solutions)))], self.objectives_number)
+            crowding = [sol.crowding_distance for sol in self._solutions]
+            candidates = [k for k in range(len(crowding)) if crowding[k] != -1]
+            if not candidates:
+                candidates = list(range(len(crowding)))
+            worst = min(candidates, key=lambda k: crowding[k])
+            del self._solutions[worst]
+            return
+
+        size = len(self._keys)
+        if size < 3:
+            worst = size - 1
+            del self._keys[worst]
+            del self._oaf[worst]
+            del self._solutions[worst]
+            return
+        odf_span = (self._keys[-1][0] - self._keys[0][0]) or 1.0
+        oaf_span = (self._oaf[-1] - self._oaf[0]) or 1.0
+        worst = min(range(1, size - 1), key=lambda k:
+                    (self._keys[k + 1][0] - self._keys[k - 1][0]) / odf_span +
+                    (self._oaf[k + 1] - self._oaf[k - 1]) / oaf_span)
+        del self._keys[worst]
+        del self._oaf[worst]
+        del self._solutions[worst]
+
+    def update(self, solutions: List[Solution]) -> int:
+        """This function adds many evaluated solutions.
+
+        ...
+
+        Parameters
+        ----------
+        solutions: list
+            A list of solutions.
+
+        Returns
+        -------
+        int
+            The number of solutions added.
+        """
+        return sum(1 for sol in solutions if self.add(sol))
+
+    def refresh(self, scores: List[List[float]]) -> None:
+        """This function evaluates the archived solutions again, with scores
+        that changed, e.g refined by use.progressive, then keeps the ones
+        still not dominated.
+
+        ...
+
+        Parameters
+        ----------
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+
+        Returns
+        -------
+        None
+        """
+        solutions = self._solutions
+        for sol in solutions:
+            sol.evaluate(scores)
+        insertions = self.insertions
+        self.__init__(self.capacity, self.objectives_number)
+        self.update(solutions)
+        self.insertions = insertions
+
+    def solutions(self) -> List[Solution]:
+        """This function returns the archived solutions, for two objectives
+        sorted by odf.
+
+        ...
+
+        Returns
+        -------
+        list
+            A list of solutions.
+        """
+        return list(self._solutions)
+
+    def get_state(self) -> dict:
+        """This function returns the archive, to be saved in a checkpoint.
+
+        ...
+
+        Returns
+        -------
+        dict
+            The archive state.
+        """
+        return {
+            "capacity": self.capacity,
+            "objectives_number": self.objectives_number,
+            "insertions": self.insertions,
+            "solutions": pack_population(self._solutions),
+        }
+
+    def set_state(self, state: dict) -> None:
+        """This function restores the archive saved by get_state.
+
+        ...
+
+        Parameters
+        ----------
+        state: dict
+            The archive state.
+
+        Returns
+        -------
+        None
+        """
+        self.__init__(state["capacity"], state["objectives_number"])
+        self.update(unpack_population(state["solutions"]))
+        self.insertions = state["insertions"]
@@ -0,0 +1,221 @@
+from bisect import bisect_right
+from math import sqrt
+from typing import List
+
+from models.Solution import Solution
+from models.OrientedScores import OrientedScores
+from use.backends import kernels
+
+
+class Screening:
+    """This is a Screening class, that avoids the O(n²) odf of the candidates
+    that are dominated by the current font anyway.
+    The oaf and the contigs of a candidate are calculated exactly in O(n),
+    the odf is then bounded from below, since the scores are not negative
+    every part of its sum is a lower bound, the error being the terms not
+    added yet: first, the terms of the fragments two positions apart, in O(n),
+    then, bands of distances from the farthest fragments, weighted the most,
+    so half of the odf weight is in the quarter of the terms the farthest apart.
+    Once the lower bound is above the odf of a solution of the font, with an oaf
+    as high (and less contigs with three objectives), the candidate is dominated
+    and dropped, else the odf is exact once all the bands are added.
+    So the estimate never drops a solution that is not dominated, and a kept
+    solution has the same objectives as with Solution.evaluate.
+
+    ...
+
+    Attributes
+    ----------
+    objectives_number: int
+        The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
+    chunks: int
+        The number of bands of distances of the odf.
+    screened: int
+        The number of candidates screened.
+    rejected: int
+        The number of candidates dropped, i.e the exact odf saved.
+    terms: int
+        The number of odf terms of the candidates screened.
+    terms_saved: int
+        The number of odf terms not calculated.
+
+    Methods
+    -------
+    __init__(objectives_number=2, chunks=4): None
+        The constructor.
+    set_font(font): None
+        Sets the font the candidates are screened against.
+    threshold(solution, targets=None): float
+        The odf above which a candidate is dominated.
+    evaluate(solution, scores, targets=None): bool
+        Evaluates a candidate, unless it is dominated.
+    screen(candidates, scores): list
+        Evaluates the candidates, and returns the ones not dominated.
+    """
+
+    def __init__(self, objectives_number: int = 2, chunks: int = 4):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        objectives_number: int, optional
+            The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
+        chunks: int, optional
+            The number of bands of distances, the bound is tested before each one.
+
+        Returns
+        -------
+        None
+        """
+        self.objectives_number = objectives_number
+        self.chunks = max(chunks, 1)
+        self.screened = 0
+        self.rejected = 0
+        self.terms = 0
+        self.terms_saved = 0
+        # The font sorted by oaf descendant, as -oaf, and the lowest odf of
+        # each prefix, with three objectives the font itself.
+        self._oaf = list()
+        self._lowest = list()
+        self._font = list()
+
+    def set_font(self, font: List[Solution]) -> None:
+        """This function sets the font the candidates are screened against,
+        usually the first font of the population.
+
+        ...
+
+        Parameters
+        ----------
+        font: list
+            A list of evaluated solutions.
+
+        Returns
+        -------
+        None
+        """
+        self._font = list(font)
+        ordered = sorted(self._font, key=lambda sol: -sol.oaf)
+        self._oaf = [-sol.oaf for sol in ordered]
+        self._lowest = list()
+        for sol in ordered:
+            self._lowest.append(min(sol.odf, self._lowest[-1])
+                                if self._lowest else sol.odf)
+
+    def threshold(self, solution: Solution, targets: List[Solution] = None) -> float:
+        """This function returns the odf above which a candidate, with its oaf
+        and contigs calculated, is dominated by a solution of the font, and
+        can't dominate one of the targets.
+
+        ...
+
+        Parameters
+        ----------
+        solution: Solution
+            The candidate.
+        targets: list, optional
+            The solutions the candidate must still be compared to.
+
+        Returns
+        -------
+        float
+            The threshold, inf if the candidate is never dominated.
+        """
+        if self.objectives_number > 2:
+            threshold = min((sol.odf for sol in self._font if sol.oaf >= solution.oaf
+                             and sol.contigs <= solution.contigs), default=float("inf"))
+        else:
+            index = bisect_right(self._oaf, -solution.oaf)
+            threshold = self._lowest[index - 1] if index else float("inf")
+
+        # The candidate may dominate a target with a lower oaf, while its odf is lower.
+        for sol in targets or ():
+            if solution.oaf >= sol.oaf:
+                threshold = max(threshold, sol.odf)
+        return threshold
+
+    def evaluate(self, solution: Solution, scores: List[List[float]], targets: List[Solution] = None) -> bool:
+        """This function calculates the objectives of a candidate, unless its
+        odf lower bound shows it is dominated by the font, then its odf is
+        left as it is.
+
+        ...
+
+        Parameters
+        ----------
+        solution: Solution
+            The candidate.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        targets: list, optional
+            The solutions the candidate must still be compared to, it is kept
+            while it may dominate one of them.
+
+        Returns
+        -------
+        bool
+            True if the candidate was evaluated, False if it was dropped.
+        """
+        genome = solution.genome
+        if isinstance(scores, OrientedScores):
+            # The objectives of the strands, in the orientations of the genome.
+            solution.orientations = scores.orient(genome)
+            genome = scores.strand_genome(genome, solution.orientations)
+            scores = scores.strands()
+        size = len(genome)
+        # The odf terms, (size - 1)(size - 2) / 2 pairs two positions apart or more.
+        terms = (size - 1) * (size - 2) // 2 if size > 2 else 0
+        self.screened += 1
+        self.terms += terms
+
+        solution.oaf = kernels().oaf(genome, scores)
+        solution.contigs = kernels().contigs(genome, scores)
+        threshold = self.threshold(solution, targets)
+        # The float sums of the bounds and of the odf are not rounded the same.
+        threshold += abs(threshold) * 1e-9
+
+        # The fragments two positions apart first, in O(n), then the bands of
+        # distances from the farthest ones, each band about as many terms.
+        odf = kernels().odf_band(genome, scores, 2, 3)
+        high = size
+        for band in range(1, self.chunks + 1):
+            if odf > threshold:
+                self.rejected += 1
+                # The terms of the distances 3 to high - 1.
+                self.terms_saved += (high - 3) * size - \
+                    (high * (high - 1) // 2 - 3) if high > 3 else 0
+                return False
+            low = max(3, size - round(size * sqrt(band / self.chunks)))
+            if band == self.chunks:
+                low = 3
+            odf += kernels().odf_band(genome, scores, low, high)
+            high = low
+
+        solution.odf = odf
+        return True
+
+    def screen(self, candidates: List[Solution], scores: List[List[float]]) -> List[Solution]:
+        """This function evaluates the candidates, and returns the ones not
+        dominated by the font.
+
+        ...
+
+        Parameters
+        ----------
+        candidates: list
+            A list of solutions, not evaluated yet.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+
+        Returns
+        -------
+        list
+            The evaluated candidates.
+        """
+        return [sol for sol in candidates if self.evaluate(sol, scores)]
+
+    def __str__(self):
+        return "{} OF {} EXACT ODF SAVED, {:.1%} OF THE ODF TERMS".format(
+            self.rejected, self.screened, self.terms_saved / self.terms if self.terms else 0.0)
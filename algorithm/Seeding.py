@@ -0,0 +1,251 @@
+from typing import List, Set
+from random import sample
+
+
+class Seeding:
+    """This is a Seeding class, that builds good genomes from the overlap
+    scores, to start the algorithms from better solutions than the random ones.
+    Three heuristics are used:
+    greedy chaining, the pairs are taken by decreasing score, a pair is kept if
+    both fragments have less than two neighbours and are not chained already.
+    nearest neighbour, a walk from a fragment to the unvisited fragment with
+    the highest score, from many first fragments.
+    maximum spanning path, the maximum spanning tree of the scores, read in
+    depth first order, from an end of the tree, the heaviest branch first.
+    """
+
+    @staticmethod
+    def greedy_chaining(scores: List[List[float]], fragments_number: int) -> List[int]:
+        """This function builds a genome by greedy chaining.
+
+        ...
+
+        Parameters
+        ----------
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        fragments_number: int
+            The number of the fragments.
+
+        Returns
+        -------
+        list
+            The genome.
+        """
+        pairs = list()
+        for i in range(fragments_number - 1):
+            row = scores[i]
+            for j in range(i + 1, fragments_number):
+                pairs.append((-row[j], i, j))
+        pairs.sort()
+
+        # The chain of each fragment, as a union-find, and its neighbours.
+        parent = list(range(fragments_number))
+        neighbours = [[] for _ in range(fragments_number)]
+
+        def find(k):
+            while parent[k] != k:
+                parent[k] = parent[parent[k]]
+                k = parent[k]
+            return k
+
+        links = 0
+        for _, i, j in pairs:
+            if links == fragments_number - 1:
+                break
+            if len(neighbours[i]) < 2 and len(neighbours[j]) < 2 and find(i) != find(j):
+                parent[find(i)] = find(j)
+                neighbours[i].append(j)
+                neighbours[j].append(i)
+                links += 1
+
+        return Seeding._walk(neighbours, fragments_number)
+
+    @staticmethod
+    def _walk(neighbours: List[List[int]], fragments_number: int) -> List[int]:
+        # Reads a path graph from one of its ends.
+        start = next((k for k in range(fragments_number)
+                      if len(neighbours[k]) < 2), 0)
+        genome = [start]
+        previous = None
+        while len(genome) < fragments_number:
+            following = [k for k in neighbours[genome[-1]] if k != previous]
+            previous = genome[-1]
+            genome.append(following[0])
+        return genome
+
+    @staticmethod
+    def nearest_neighbour(scores: List[List[float]], fragments_number: int, start: int) -> List[int]:
+        """This function builds a genome by a nearest neighbour walk.
+
+        ...
+
+        Parameters
+        ----------
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        fragments_number: int
+            The number of the fragments.
+        start: int
+            The first fragment.
+
+        Returns
+        -------
+        list
+            The genome.
+        """
+        genome = [start]
+        unvisited = set(range(fragments_number))
+        unvisited.discard(start)
+        while unvisited:
+            row = scores[genome[-1]]
+            following = max(unvisited, key=lambda k: (row[k], -k))
+            unvisited.discard(following)
+            genome.append(following)
+        return genome
+
+    @staticmethod
+    def maximum_spanning_path(scores: List[List[float]], fragments_number: int) -> List[int]:
+        """This function builds a genome from the maximum spanning tree, built
+        by the Prim algorithm in O(n²), then read in depth first order.
+
+        ...
+
+        Parameters
+        ----------
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        fragments_number: int
+            The number of the fragments.
+
+        Returns
+        -------
+        list
+            The genome.
+        """
+        if fragments_number == 0:
+            return list()
+
+        # The best score linking each fragment to the tree, and the tree fragment.
+        best = [float("-inf")] * fragments_number
+        link = [-1] * fragments_number
+        in_tree = [False] * fragments_number
+        children = [[] for _ in range(fragments_number)]
+
+        current = 0
+        in_tree[0] = True
+        for _ in range(fragments_number - 1):
+            row = scores[current]
+            for k in range(fragments_number):
+                if not in_tree[k] and row[k] > best[k]:
+                    best[k] = row[k]
+                    link[k] = current
+            current = max((k for k in range(fragments_number) if not in_tree[k]),
+                          key=lambda k: best[k])
+            in_tree[current] = True
+            children[link[current]].append(current)
+
+        # The tree as undirected edges, read from a leaf, heaviest edge first.
+        neighbours = [list(c) for c in children]
+        for k in range(1, fragments_number):
+            neighbours[k].append(link[k])
+        start = next(k for k in range(fragments_number)
+                     if len(neighbours[k]) <= 1)
+
+        genome = list()
+        visited = [False] * fragments_number
+        stack = [start]
+        while stack:
+            k = stack.pop()
+            if visited[k]:
+                continue
+            visited[k] = True
+            genome.append(k)
+            row = scores[k]
+            # The heaviest branch is pushed last, so visited first.
+            for n in sorted((n for n in neighbours[k] if not visited[n]), key=lambda n: row[n]):
+                stack.append(n)
+        return genome
+
+    @staticmethod
+    def adjacency_distance(genome_1: List[int], genome_2: List[int]) -> float:
+        """This function measures how different two genomes are, as the part
+        of the adjacent pairs of the first one, that are not adjacent in the
+        second one, in any direction.
+
+        ...
+
+        Parameters
+        ----------
+        genome_1: list
+            The first genome.
+        genome_2: list
+            The second genome.
+
+        Returns
+        -------
+        float
+            A distance between 0 (same adjacent pairs) and 1.
+        """
+        if len(genome_1) < 2:
+            return 0.0
+        pairs = set()
+        for i in range(len(genome_2) - 1):
+            pairs.add((genome_2[i], genome_2[i + 1]))
+            pairs.add((genome_2[i + 1], genome_2[i]))
+        shared = sum(1 for i in range(len(genome_1) - 1)
+                     if (genome_1[i], genome_1[i + 1]) in pairs)
+        return 1 - shared / (len(genome_1) - 1)
+
+    @staticmethod
+    def seed_genomes(scores: List[List[float]], fragments_number: int, count: int, hash_values: Set[int], min_distance: float = 0.1) -> List[List[int]]:
+        """This function builds up to count seeded genomes: the greedy chain,
+        the maximum spanning path, then nearest neighbour walks from random
+        first fragments. A genome is kept only if it doesn't exist already,
+        and if its adjacency distance to each kept genome is at least
+        min_distance, so the seeds don't take over the population.
+        Its hash value is then added to the hash values.
+        At most 4 * count genomes are built, the walks being O(n²) each.
+
+        ...
+
+        Parameters
+        ----------
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+        fragments_number: int
+            The number of the fragments.
+        count: int
+            The number of genomes wanted.
+        hash_values: set
+            A set of int, that contains the hash values of the already exists solutions.
+        min_distance: float, optional
+            The smallest adjacency distance between two seeded genomes.
+
+        Returns
+        -------
+        list
+            The seeded genomes, maybe less than count.
+        """
+        genomes = list()
+        if count <= 0 or fragments_number < 2:
+            return genomes
+
+        def candidates():
+            yield Seeding.greedy_chaining(scores, fragments_number)
+            yield Seeding.maximum_spanning_path(scores, fragments_number)
+            for start in sample(range(fragments_number), fragments_number):
+                yield Seeding.nearest_neighbour(scores, fragments_number, start)
+
+        for tries, genome in enumerate(candidates()):
+            if len(genomes) == count or tries == 4 * count:
+                break
+            hash_val = hash(tuple(genome))
+            if hash_val in hash_values:
+                continue
+            if any(Seeding.adjacency_distance(genome, other) < min_distance for other in genomes):
+                continue
+            hash_values.add(hash_val)
+            genomes.append(genome)
+
+        return genomes
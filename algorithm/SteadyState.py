@@ -0,0 +1,397 @@
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heappop, heapify
+from typing import List
+
+from models.Solution import Solution
+from algorithm.MultiObjective import MultiObjective as mo
+
+
+class SteadyState:
+    """This is a SteadyState class, the population of a steady state NSGA-II,
+    where each child is inserted, then the worst solution is removed, i.e the
+    most crowded solution of the last font, instead of sorting the merged
+    population at each generation.
+    The fonts are updated incrementally: a child goes to the first font that
+    doesn't dominate it, found by a binary search over the fonts, the solutions
+    of that font it dominates are moved down to the next font, where they move
+    down the ones they dominate, and so on. Removing from the last font never
+    changes the other fonts.
+    With two objectives, each font is kept sorted by oaf descendant, where the
+    odf never increases, so the dominance tests and the dominated solutions of
+    a font are found by binary search, and only the crowding distances around
+    the changes are updated, unless the limits of the font changed. A heap of
+    the crowding distances of each font gives the worst solution in O(log n).
+    With more objectives, the fonts are lists checked in O(n), and the crowding
+    distances of a changed font are calculated again.
+    With two objectives, the crowding distance is the textbook one, the sum of
+    the normalized distances between the two neighbours in each objective, so
+    it is updated locally, whereas MultiObjective.crowding_distance, used by
+    the generational NSGA-II, sums these distances cumulatively along each
+    sort: the two modes don't rank the solutions of a font the same way.
+
+    ...
+
+    Attributes
+    ----------
+    objectives_number: int
+        The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
+    population: list
+        The solutions, with their rank and crowding distance up to date.
+
+    Methods
+    -------
+    __init__(population, objectives_number=2): None
+        The constructor.
+    fonts: list
+        The fonts, as lists of solutions.
+    insert(solution): None
+        Inserts an evaluated solution.
+    remove_worst: Solution
+        Removes the most crowded solution of the last font.
+    step(childs): int
+        Inserts the childs, keeping the size of the population.
+    get_state: dict
+        The order of the fonts and of the heaps, to be saved in a checkpoint.
+    set_state(state, population): None
+        Restores the state saved by get_state.
+    """
+
+    def __init__(self, population: List[Solution], objectives_number: int = 2):
+        """The constructor, the solutions are inserted one by one.
+
+        ...
+
+        Parameters
+        ----------
+        population: list
+            A list of evaluated solutions.
+        objectives_number: int, optional
+            The number of objectives, 2 (oaf, odf) or 3 (oaf, odf, contigs).
+
+        Returns
+        -------
+        None
+        """
+        self.objectives_number = objectives_number
+        self.population = list()
+        # The index of each solution in the population.
+        self._position = dict()
+        # The solutions of each font, and for two objectives their (-oaf, odf)
+        # keys, and their -odf that never decreases, in the same order.
+        self._fonts = list()
+        self._keys = list()
+        self._odf = list()
+        # The crowding distances heap of each font, an entry is valid only if
+        # it is the last one pushed for its solution.
+        self._heaps = list()
+        self._entry = dict()
+        self._counter = 0
+
+        for sol in population:
+            self.insert(sol)
+
+    def fonts(self) -> List[List[Solution]]:
+        """This function returns the fonts, the first one first.
+
+        ...
+
+        Returns
+        -------
+        list
+            A list of fonts(list of solutions).
+        """
+        return [list(font) for font in self._fonts]
+
+    def _dominated(self, f: int, solution: Solution) -> bool:
+        # Is the solution dominated by a solution of the font f.
+        if self.objectives_number > 2:
+            return any(mo.domination(other, solution, self.objectives_number) == -1
+                       for other in self._fonts[f])
+        # The solutions with an oaf as high come first, the last one has the lowest odf.
+        keys = self._keys[f]
+        index = bisect_right(keys, (-solution.oaf, float("inf")))
+        return index > 0 and keys[index - 1][1] < solution.odf
+
+    def insert(self, solution: Solution) -> None:
+        """This function inserts an evaluated solution, and updates the fonts,
+        the ranks and the crowding distances.
+
+        ...
+
+        Parameters
+        ----------
+        solution: Solution
+            The solution.
+
+        Returns
+        -------
+        None
+        """
+        self._position[id(solution)] = len(self.population)
+        self.population.append(solution)
+
+        # The fonts dominating the solution come first.
+        low, high = 0, len(self._fonts)
+        while low < high:
+            middle = (low + high) // 2
+            if self._dominated(middle, solution):
+                low = middle + 1
+            else:
+                high = middle
+
+        block = [solution]
+        f = low
+        while block:
+            if f == len(self._fonts):
+                self._fonts.append(list())
+                self._keys.append(list())
+                self._odf.append(list())
+                self._heaps.append(list())
+            if self.objectives_number > 2:
+                block = self._merge_list(f, block)
+            else:
+                block = self._merge_sorted(f, block)
+            f += 1
+
+    def _merge_sorted(self, f: int, block: List[Solution]) -> List[Solution]:
+        # Adds the block to the font f, and returns the solutions it dominates.
+        # The block is sorted, its solutions don't dominate each other, and
+        # none of the font f dominates them.
+        keys, odf, font = self._keys[f], self._odf[f], self._fonts[f]
+        limits = (keys[0], keys[-1]) if keys else None
+
+        # The solutions dominated by a solution of the block, are the ones
+        # with an oaf not higher and a higher odf, a slice of the font.
+        slices = list()
+        for sol in block:
+            start = bisect_left(keys, (-sol.oaf, float("-inf")))
+            end = bisect_left(odf, -sol.odf, start)
+            if start < end:
+                slices.append((start, end))
+
+        displaced = list()
+        changed = [(-sol.oaf, sol.odf) for sol in block]
+        for start, end in reversed(self._union(slices)):
+            displaced[0:0] = font[start:end]
+            changed.extend(keys[start:end])
+            del keys[start:end]
+            del odf[start:end]
+            del font[start:end]
+
+        for sol in block:
+            key = (-sol.oaf, sol.odf)
+            index = bisect_right(keys, key)
+            keys.insert(index, key)
+            odf.insert(index, -sol.odf)
+            font.insert(index, sol)
+            sol.rank = f + 1
+
+        self._refresh_sorted(f, limits, min(changed), max(changed))
+        return displaced
+
+    @staticmethod
+    def _union(slices: List[tuple]) -> List[tuple]:
+        # The union of the slices, as sorted disjoint slices.
+        union = list()
+        for start, end in sorted(slices):
+            if union and start <= union[-1][1]:
+                union[-1] = (union[-1][0], max(union[-1][1], end))
+            else:
+                union.append((start, end))
+        return union
+
+    def _merge_list(self, f: int, block: List[Solution]) -> List[Solution]:
+        font = self._fonts[f]
+        kept = list()
+        displaced = list()
+        for other in font:
+            if any(mo.domination(sol, other, self.objectives_number) == -1 for sol in block):
+                displaced.append(other)
+            else:
+                kept.append(other)
+        for sol in block:
+            sol.rank = f + 1
+        kept.extend(block)
+        self._fonts[f] = kept
+        self._refresh_list(f)
+        return displaced
+
+    def _crowding(self, f: int, q: int) -> float:
+        # The crowding distance of the q-th solution of a sorted font, -1 for
+        # the limits, and when all the values of an objective are equal.
+        keys = self._keys[f]
+        if q == 0 or q == len(keys) - 1:
+            return float(-1)
+        oaf_span = keys[-1][0] - keys[0][0]
+        odf_span = keys[0][1] - keys[-1][1]
+        if oaf_span == 0 or odf_span == 0:
+            return float(-1)
+        return (keys[q + 1][0] - keys[q - 1][0]) / oaf_span + \
+            (keys[q - 1][1] - keys[q + 1][1]) / odf_span
+
+    def _refresh_sorted(self, f: int, limits: tuple, low: tuple, high: tuple) -> None:
+        # Updates the crowding distances around the keys between low and high,
+        # or of the whole font if its limits changed, since they are the spans.
+        keys = self._keys[f]
+        if not keys:
+            return
+        if limits != (keys[0], keys[-1]):
+            start, stop = 0, len(keys)
+        else:
+            start = max(bisect_left(keys, low) - 1, 0)
+            stop = min(bisect_right(keys, high) + 1, len(keys))
+        for q in range(start, stop):
+            sol = self._fonts[f][q]
+            sol.crowding_distance = self._crowding(f, q)
+            self._push(f, sol)
+
+    def _refresh_list(self, f: int) -> None:
+        font = self._fonts[f]
+        if font:
+            mo.m_crowding_distance(
+                font, [list(range(len(font)))], self.objectives_number)
+
+    def _push(self, f: int, solution: Solution) -> None:
+        # The limits are never the worst, unless the font has only limits.
+        self._counter += 1
+        self._entry[id(solution)] = self._counter
+        crowding = solution.crowding_distance
+        heap = self._heaps[f]
+        heappush(heap, (float("inf") if crowding == -1 else crowding,
+                        self._counter, solution))
+        # Drop the entries that are not valid anymore, once they are too many.
+        if len(heap) > 2 * len(self._fonts[f]) + 32:
+            heap[:] = [entry for entry in heap if self._entry.get(
+                id(entry[2])) == entry[1]]
+            heapify(heap)
+
+    def remove_worst(self) -> Solution:
+        """This function removes the worst solution, i.e the solution of the
+        last font with the lowest crowding distance, the limits last.
+
+        ...
+
+        Returns
+        -------
+        Solution
+            The removed solution.
+        """
+        f = len(self._fonts) - 1
+        font = self._fonts[f]
+
+        if self.objectives_number > 2:
+            index = min(range(len(font)), key=lambda q: float("inf")
+                        if font[q].crowding_distance == -1 else font[q].crowding_distance)
+            worst = font.pop(index)
+            self._refresh_list(f)
+        else:
+            heap = self._heaps[f]
+            while True:
+                _, counter, worst = heappop(heap)
+                if self._entry.get(id(worst)) == counter:
+                    break
+            del self._entry[id(worst)]
+
+            keys = self._keys[f]
+            limits = (keys[0], keys[-1])
+            key = (-worst.oaf, worst.odf)
+            index = bisect_left(keys, key)
+            while font[index] is not worst:
+                index += 1
+            del keys[index]
+            del self._odf[f][index]
+            del font[index]
+            self._refresh_sorted(f, limits, key, key)
+
+        if not font:
+            for lists in (self._fonts, self._keys, self._odf, self._heaps):
+                lists.pop()
+
+        # The last solution takes the place of the removed one.
+        index = self._position.pop(id(worst))
+        last = self.population.pop()
+        if last is not worst:
+            self.population[index] = last
+            self._position[id(last)] = index
+        return worst
+
+    def step(self, childs: List[Solution]) -> int:
+        """This function inserts evaluated childs one by one, each time
+        removing the worst solution, so the population keeps its size.
+
+        ...
+
+        Parameters
+        ----------
+        childs: list
+            A list of evaluated solutions.
+
+        Returns
+        -------
+        int
+            The number of childs still in the population.
+        """
+        removed = list()
+        for child in childs:
+            self.insert(child)
+            removed.append(self.remove_worst())
+        removed = set(id(sol) for sol in removed)
+        return sum(1 for child in childs if id(child) not in removed)
+
+    def get_state(self) -> dict:
+        """This function returns the order of the solutions in each font, and
+        the tie-break counter of each one in the heaps, as indexes in the
+        population, to be saved in a checkpoint with the population. Inserting
+        the solutions again would give other orders, and another solution
+        removed when the crowding distances tie.
+
+        ...
+
+        Returns
+        -------
+        dict
+            The state.
+        """
+        return {
+            "fonts": [[self._position[id(sol)] for sol in font] for font in self._fonts],
+            "entries": [self._entry.get(id(sol), 0) for sol in self.population],
+            "counter": self._counter,
+        }
+
+    def set_state(self, state: dict, population: List[Solution]) -> None:
+        """This function restores the state saved by get_state, the solutions
+        with their rank and crowding distance restored, in the same order.
+
+        ...
+
+        Parameters
+        ----------
+        state: dict
+            The state.
+        population: list
+            The population saved with the state.
+
+        Returns
+        -------
+        None
+        """
+        self.population = population
+        self._position = {id(sol): index for index, sol in enumerate(population)}
+        self._fonts = [[population[index] for index in font] for font in state["fonts"]]
+        self._keys = [[(-sol.oaf, sol.odf) for sol in font] for font in self._fonts]
+        self._odf = [[-sol.odf for sol in font] for font in self._fonts]
+        # Only the valid entries, the others are never popped, and the heaps
+        # pop the same entries in the same order, whatever their layout.
+        self._entry = dict()
+        self._heaps = list()
+        for font in state["fonts"]:
+            heap = list()
+            if self.objectives_number <= 2:
+                for index in font:
+                    sol = population[index]
+                    self._entry[id(sol)] = state["entries"][index]
+                    heap.append((float("inf") if sol.crowding_distance == -1 else sol.crowding_distance,
+                                 state["entries"][index], sol))
+                heapify(heap)
+            self._heaps.append(heap)
+        self._counter = state["counter"]
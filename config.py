@@ -15,12 +15,78 @@ benchmarks = [
 # Variables for the NSGA-II Algorithm
 CROSS_OVER_PROBABILITY = 0.8
 MUTATION_PROBABILITY = 0.8
+# Improve LOCAL_SEARCH_RATE of the childs of each generation with 2-opt and Or-opt
+# moves, for at most LOCAL_SEARCH_TIME_LIMIT seconds per generation.
+LOCAL_SEARCH = False
+LOCAL_SEARCH_RATE = 0.2
+LOCAL_SEARCH_TIME_LIMIT = 1.0
+# Choose the operator of each pair of parents among OPERATORS, with a multi-armed bandit
+# crediting each operator for its childs in the first font per CPU second, instead of
+# the crossover, then the mutation with MUTATION_PROBABILITY. The local search operator
+# gets LOCAL_SEARCH_TIME_LIMIT seconds per generation, shared by the pairs.
+ADAPTIVE_OPERATORS = False
+OPERATORS = ["two_point", "order", "swap", "inversion", "insertion", "local_search"]
+OPERATOR_LEARNING_RATE = 0.3
+OPERATOR_MINIMUM_PROBABILITY = 0.05
 GENERATIONS_NUMBER = 2000
 NSGA_POPULATION_SIZE = 100
+# Insert the childs one by one, each time removing the worst solution, with the fonts
+# and crowding distances updated incrementally, instead of sorting the merged population.
+# With two objectives, its crowding distance is the textbook one (the normalized distance
+# between the neighbours), not the cumulative sum of the generational NSGA-II.
+STEADY_STATE = False
+# Drop the childs, and the MOBA candidates of the STEP 7.2, proven dominated by the first
+# font from a lower bound of their odf, before the odf is complete, tested SCREENING_CHUNKS times.
+SCREENING = False
+SCREENING_CHUNKS = 4
+# The memory of the MOBA cache of the evaluated solutions by position, in MB, 0 for no cache.
+EVALUATION_CACHE_MB = 64
+# 2 for (oaf, odf), or 3 to also minimize the number of contigs, used by both algorithms.
 OVECTIVE_FUNCTIONS_NUMBER = 2
 MATCH_SCORE = 1
 MISMATCH_SCORE = -1
 GAP_COST = -1.33
+# The storage of the overlap scores, None for a list of lists, or a ScoreMatrix
+# storage: "dense", "condensed" (upper triangle) or "sparse" (scores > SCORE_THRESHOLD).
+# The numpy and numba kernels read a dense ScoreMatrix in place, and copy a list at each call,
+# KERNEL_BACKEND "auto" times the kernels on this storage, and keeps python for a list.
+SCORE_STORAGE = "dense"
+SCORE_THRESHOLD = 0.0
+# The pairs with an exact suffix-prefix overlap of at least this lenght are scored
+# lenght * MATCH_SCORE from a suffix array, without alignment, 0 to align all the pairs.
+# It changes the objectives, not only the time: the alignment score of a pair is the
+# last cell of its matrix, not its overlap lenght, so these pairs weigh more in the oaf.
+EXACT_OVERLAP_MIN_LENGTH = 0
+# Align both strands of each pair of fragments, each fragment of a solution is then taken
+# as read or reverse complemented, whichever suits its order best (see OrientedScores).
+# The scores are then dense and in memory, the options above and PROGRESSIVE_SCORES are not used.
+# It takes about 7 * N^2 float32 for N fragments (28 MB for 1000 fragments): the N^2 matrix of
+# the best combination of each pair, the 2 * N^2 combinations, and the (2N)^2 matrix of the strands.
+ORIENTED_SCORES = False
+# The backend of the hot kernels (alignment, objectives, fronts): "python", "numpy",
+# "numba", or "auto" for the fastest one here, measured by a short micro-benchmark.
+KERNEL_BACKEND = "auto"
+# A file keeping the scores between the runs, only the pairs with new fragments
+# are then aligned, None to always compute all the scores.
+SCORE_STORE = None
+# A memory mapped file for computing the scores tile by tile, an interrupted run
+# continues from the last finished tile, None to compute the scores in memory.
+TILED_SCORES = None
+TILE_SIZE = 256
+# Hand the tiles to workers over TCP, with DISTRIBUTED_WORKERS local worker processes,
+# workers on other machines run "python -m use.distributed HOST PORT".
+DISTRIBUTED = False
+DISTRIBUTED_WORKERS = 4
+COORDINATOR_HOST = "127.0.0.1"
+COORDINATOR_PORT = 0
+# Start the search on scores approximated from the shared k-mers of lenght PROGRESSIVE_KMER,
+# while PROGRESSIVE_WORKERS processes (0 for one per CPU but the search's) align the pairs,
+# the solutions being evaluated again each time the scores changed by PROGRESSIVE_REFRESH
+# of their sum, and the result once all are exact. The matrix is always dense.
+PROGRESSIVE_SCORES = False
+PROGRESSIVE_KMER = 12
+PROGRESSIVE_WORKERS = 0
+PROGRESSIVE_REFRESH = 0.05
 
 # Variables for the MOBA Algorithm
 DIMENTION_NUMBER = 20
@@ -32,4 +98,103 @@ GAMA = 0.9
 MINIMUM_FREQUANCY = 0
 MAXIMUM_FREQUANCY = 15
 
+# Variables for the convergence detection, used by both algorithms
+# The generations without hypervolume improvement before stopping, 0 never stops.
+STAGNATION_PATIENCE = 0
+STAGNATION_TOLERANCE = 1e-6
+# Stop after TIME_LIMIT CPU seconds, 0 for no limit.
+TIME_LIMIT = 0
+# A list of (oaf, odf) tuples of the best known front, to compute the IGD.
+REFERENCE_FRONT = None
+# The (oaf, odf) reference point of the hypervolume, the same for all the runs of an
+# instance, so their hypervolumes compare. None derives it from the bounds of
+# REFERENCE_FRONT if given, else from the first front of each run: the hypervolumes
+# are then only good within a run, and not after the scores are refined.
+REFERENCE_POINT = None
+
+# The capacity of the archive of the non dominated solutions, the result of both
+# algorithms, 0 for no limit.
+ARCHIVE_SIZE = 100
+
+# Variables for the seeding of the initial population, used by both algorithms
+# The part of the initial population built from the overlap scores (greedy chaining,
+# maximum spanning path, nearest neighbour walks), two seeded solutions must differ
+# by at least SEEDING_MIN_DISTANCE of their adjacent pairs.
+SEEDING_RATE = 0.0
+SEEDING_MIN_DISTANCE = 0.1
+
 BECHMARK_FILE = benchmarks[1]
+
+# Variables for the checkpoints, used by both algorithms
+# Save a checkpoint every CHECKPOINT_INTERVAL generations, 0 disables the checkpoints.
+CHECKPOINT_INTERVAL = 0
+CHECKPOINT_DIRECTORY = "checkpoints"
+# Continue from the latest checkpoint found in CHECKPOINT_DIRECTORY, of the same algorithm
+# and scores (benchmark and scoring values), the checkpoints of other runs are ignored.
+RESUME = False
+
+# Variables for the trace of the first front, used by both algorithms
+# A binary file where the first front of one generation every TRACE_EVERY is appended
+# (objectives and genome ids, each genome written once), at most TRACE_MAX_SIZE
+# solutions of each front, 0 for all, read with use.trace.read_trace. None for no trace.
+TRACE_FILE = None
+TRACE_EVERY = 1
+TRACE_MAX_SIZE = 0
+
+# Variables for the experiments (run_experiments.py)
+# Each algorithm runs with each parameters set and each seed on each instance, a
+# parameters set replacing some variables of this config, e.g {"MUTATION_PROBABILITY": 0.1}.
+EXPERIMENT_INSTANCES = [benchmarks[1], benchmarks[2]]
+EXPERIMENT_ALGORITHMS = ["NSGA-II", "MOBA"]
+EXPERIMENT_PARAMETERS = [{}]
+EXPERIMENT_SEEDS = [1, 2, 3]
+# The number of worker processes, 0 for one per CPU.
+EXPERIMENT_WORKERS = 0
+# One JSON line per run, the runs already in the file are not run again.
+EXPERIMENT_RESULTS = "experiments/results.jsonl"
+# The overlap scores of each instance, computed once for all the runs.
+EXPERIMENT_DIRECTORY = "experiments"
+
+# Variables for the parameters tuning (run_tuning.py)
+# A race (F-race) of TUNING_CANDIDATES configurations drawn from the grid of
+# TUNING_SPACES[TUNING_ALGORITHM], the config as it is included: the configurations run
+# on an instance and a seed after another, for TUNING_TIME_LIMIT CPU seconds, and after
+# TUNING_FIRST_TEST of them, the ones the Friedman test finds worse than the best at
+# TUNING_CONFIDENCE are dropped. At most TUNING_BUDGET runs, 0 for no limit.
+TUNING_ALGORITHM = "NSGA-II"
+TUNING_SPACES = {
+    "NSGA-II": {"NSGA_POPULATION_SIZE": [50, 100, 200],
+                "CROSS_OVER_PROBABILITY": [0.6, 0.8, 0.9],
+                "MUTATION_PROBABILITY": [0.2, 0.5, 0.8]},
+    "MOBA": {"DIMENTION_NUMBER": [10, 20, 40],
+             "MOBA_POPULATION_SIZE": [10, 20],
+             "LOUDNESS": [5, 9, 15],
+             "MAXIMUM_FREQUANCY": [5, 15, 30]},
+}
+TUNING_INSTANCES = [benchmarks[1], benchmarks[2], benchmarks[3]]
+TUNING_SEEDS = list(range(1, 11))
+TUNING_CANDIDATES = 32
+TUNING_TIME_LIMIT = 10
+TUNING_FIRST_TEST = 5
+TUNING_CONFIDENCE = 0.95
+TUNING_BUDGET = 0
+# The number of worker processes, 0 for one per CPU, the scores are saved in
+# EXPERIMENT_DIRECTORY, and the best configuration in TUNING_RESULTS.
+TUNING_WORKERS = 0
+TUNING_RESULTS = "experiments/tuning.json"
+
+# Variables for the job service (run_service.py)
+# Jobs are posted as JSON to http://SERVICE_HOST:SERVICE_PORT/jobs, and their
+# results read from /jobs/<id>, see use/service.py.
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8642
+# The number of worker processes, 0 for one per CPU, and of the jobs that can wait.
+SERVICE_WORKERS = 0
+SERVICE_QUEUE_SIZE = 64
+# The score matrices each worker keeps in memory, the others are loaded again
+# from SERVICE_DIRECTORY, where the scores of each fragments set are saved once.
+SERVICE_WARM_INSTANCES = 4
+SERVICE_DIRECTORY = "service"
+# The seconds a job may take in a worker, for its scores and for its run, before it
+# fails, 0 for no limit. The worker is only free again once the job returns.
+SERVICE_JOB_TIMEOUT = 3600
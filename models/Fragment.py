@@ -1,3 +1,6 @@
+from models.PackedSequence import PackedSequence
+
+
 class Fragment:
     """This is a Fragment class that represent a Fragment for the
     dna sequencing problem.
@@ -9,7 +12,11 @@ class Fragment:
     Attributes
     ----------
     sequence: str
-        This is the DNA sequence of the fragment.
+        This is the DNA sequence of the fragment, read in its orientation,
+        i.e as read, or its reverse complement, it's decoded from the packed
+        sequence at each access, in O(lenght), read it once in a loop.
+    packed: PackedSequence
+        The DNA sequence stored with 2 bits per nucleotide, from left to right.
     lenght: int
         The lenght of the read DNA sequence.
     index: int
@@ -18,8 +25,8 @@ class Fragment:
         for the execution, nor the presentation,
         but for debugging(the solution's validity) needs. 
     orientation: bool
-        Durring the run time, we need to know the orientation of the fragment
-        from left to right if True, False else.
+        Durring the run time, we need to know the orientation of the fragment,
+        as read if True, its reverse complement, the other strand, if False.
 
     Methods
     -------
@@ -28,7 +35,11 @@ class Fragment:
     __str__: str
         The print formating method.
     inverse:
-        For inversing the DNA sequence string.
+        For taking the other strand, the reverse complement.
+    codes: bytes
+        The nucleotides codes, in the fragment's orientation, for the alignment kernels.
+    reverse_complement_codes: bytes
+        The nucleotides codes of the reverse complement sequence.
 
     """
 
@@ -55,17 +66,51 @@ class Fragment:
         None
         """
 
-        self.sequence = sequence
+        self.packed = PackedSequence(sequence)
         self.lenght = lenght
         self.index = index
         self.orientation = True
 
+    @property
+    def sequence(self):
+        """The DNA sequence string, decoded in the fragment's orientation."""
+
+        packed = self.packed if self.orientation else self.packed.reverse_complement()
+        return packed.decode()
+
+    @sequence.setter
+    def sequence(self, sequence):
+        packed = PackedSequence(sequence)
+        self.packed = packed if self.orientation else packed.reverse_complement()
+
     def inverse(self):
-        """The inverse method inverses the DNA sequence string."""
-        
-        self.sequence = self.sequence[::-1]
+        """The inverse method takes the other strand of the fragment, its
+        reverse complement, only the orientation changes, the packed
+        sequence is kept as is. It is the orientation False of OrientedScores.
+        """
+
         self.orientation = not self.orientation
 
+    def codes(self):
+        """This method returns the nucleotides codes of the fragment in its
+        orientation, one byte each, to be read directly by the alignment kernels.
+        They are unpacked at each call (see PackedSequence.codes), the callers
+        unpack the codes of all the fragments once, before comparing them.
+        """
+
+        packed = self.packed if self.orientation else self.packed.reverse_complement()
+        return packed.codes()
+
+    def reverse_complement_codes(self):
+        """This method returns the nucleotides codes of the reverse complement
+        of the fragment in its orientation, i.e of its other strand, the
+        reverse complement sequence is packed once and kept, but its codes
+        are unpacked at each call, as codes.
+        """
+
+        packed = self.packed.reverse_complement() if self.orientation else self.packed
+        return packed.codes()
+
     def __str__(self):
         """This method returns the formating print format, to print out
         a fragment, while all the details all printed.
@@ -73,8 +118,8 @@ class Fragment:
 
         out = "* Sequence:: {}\n* The Lenght:: {}\n* The Index:: {}\n"
         if self.orientation:
-            out += "* From Left to Right."
+            out += "* As Read."
         else:
-            out += "* From Right to Left."
+            out += "* Reverse Complement."
 
         return out.format(self.sequence, self.lenght, self.index)
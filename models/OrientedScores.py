@@ -0,0 +1,267 @@
+from array import array
+from typing import List, Tuple
+
+from models.ScoreMatrix import ScoreMatrix
+from use.backends import kernels
+
+
+class OrientedScores(ScoreMatrix):
+    """This is an OrientedScores class that stores the overlap scores
+    of every pair of fragments, for the four strands combinations.
+    Since score(a, b) == score(b, a), only the pairs i < j are stored,
+    with their four combinations one after another, as float32.
+    An orientation True means the fragment as read, False means its
+    reverse complement, as Fragment.inverse does.
+    It is also a dense ScoreMatrix of the best combination of each pair,
+    read by the seeding and the local search, while the objectives of a
+    solution are calculated with the orientations that suit its order
+    best (see evaluate), on the matrix of the strands.
+    The combinations are the compact scores, the dense matrix (N^2) and the
+    matrix of the strands ((2N)^2, built once by strands) are views of them
+    kept for speed, about 7 * N^2 float32 in all for N fragments.
+
+    ...
+
+    Attributes
+    ----------
+    combinations: array
+        The scores, 4 values for each pair i < j, in the order of the pairs
+        (0, 1), (0, 2), ..., (1, 2), ..., and for each pair the combinations
+        (True, True), (True, False), (False, True), (False, False).
+
+    Methods
+    -------
+    __init__(size): None
+        The constructor.
+    set_combinations(i, j, combinations): None
+        Stores the four scores of a pair.
+    score(i, orientation_i, j, orientation_j): float
+        The score of two fragments in the given orientations.
+    matrix(orientations): list
+        The scores matrix for an orientation of each fragment.
+    strands: ScoreMatrix
+        The scores matrix of the 2 * size strands.
+    orient(genome): list
+        The orientations of the fragments that suit an order best.
+    strand_genome(genome, orientations): list
+        An order of the fragments as an order of the strands.
+    evaluate(genome): tuple
+        The objectives of an order, with its best orientations.
+    """
+
+    def __init__(self, size: int):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        size: int
+            The number of fragments.
+
+        Rturns
+        ------
+        None
+        """
+
+        super().__init__(size, "dense")
+        self.combinations = array(
+            "f", bytes(4 * 4 * (size * (size - 1) // 2)))
+        self._strands = None
+
+    def _offset(self, i: int, j: int) -> int:
+        # The index of the first value of the pair i < j.
+        return 4 * (i * (2 * self.size - i - 1) // 2 + j - i - 1)
+
+    def set_combinations(self, i: int, j: int, combinations: List[float]) -> None:
+        """This function stores the four scores of the pair i < j, and the
+        best of them as its score in the matrix.
+
+        ...
+
+        Parameters
+        ----------
+        i: int
+            The index of the first fragment.
+        j: int
+            The index of the second fragment, greater than i.
+        combinations: list
+            The scores of the combinations (True, True), (True, False),
+            (False, True) and (False, False).
+
+        Rturns
+        ------
+        None
+        """
+
+        offset = self._offset(i, j)
+        self.combinations[offset:offset + 4] = array("f", combinations)
+        self.set(i, j, max(combinations))
+        self._strands = None
+
+    def score(self, i: int, orientation_i: bool, j: int, orientation_j: bool) -> float:
+        """This function returns the score of two fragments, each one in
+        its orientation, the score of a fragment with itself is -1.
+
+        ...
+
+        Parameters
+        ----------
+        i: int
+            The index of the first fragment.
+        orientation_i: bool
+            The orientation of the first fragment.
+        j: int
+            The index of the second fragment.
+        orientation_j: bool
+            The orientation of the second fragment.
+
+        Rturns
+        ------
+        float
+            The overlap score.
+        """
+
+        if i == j:
+            return -1.0
+        if i > j:
+            i, j = j, i
+            orientation_i, orientation_j = orientation_j, orientation_i
+        return self.combinations[self._offset(i, j) + 2 * (not orientation_i) + (not orientation_j)]
+
+    def matrix(self, orientations: List[bool]) -> List[List[float]]:
+        """This function returns the scores matrix of the fragments, each
+        one taken in its orientation, in the same format as overlap_scores.
+
+        ...
+
+        Parameters
+        ----------
+        orientations: list
+            A list of bool, the orientation of each fragment.
+
+        Rturns
+        ------
+        list
+            A list of lists(matrix) of float, that contains the overlaping scores.
+        """
+
+        scores = [[-1.0 for i in range(self.size)] for j in range(self.size)]
+        for i in range(self.size - 1):
+            for j in range(i + 1, self.size):
+                scores[i][j] = scores[j][i] = self.score(
+                    i, orientations[i], j, orientations[j])
+        return scores
+
+    def strands(self) -> ScoreMatrix:
+        """This function returns the scores matrix of the strands, where the
+        strand 2 * i is the fragment i as read, and 2 * i + 1 its reverse
+        complement, built once.
+
+        ...
+
+        Rturns
+        ------
+        ScoreMatrix
+            The dense matrix of the 2 * size strands.
+        """
+
+        if self._strands is None:
+            strands = ScoreMatrix(2 * self.size, "dense")
+            for i in range(self.size - 1):
+                for j in range(i + 1, self.size):
+                    offset = self._offset(i, j)
+                    for combination in range(4):
+                        strands.set(2 * i + combination // 2, 2 * j + combination % 2,
+                                    self.combinations[offset + combination])
+            for i in range(self.size):
+                strands.set(2 * i, 2 * i + 1, -1.0)
+            self._strands = strands
+        return self._strands
+
+    def orient(self, genome: List[int]) -> List[bool]:
+        """This function chooses the orientation of each fragment of an
+        order, that maximizes the scores of the adjacent fragments, i.e the
+        oaf, with a dynamic programming over the order, in O(n).
+
+        ...
+
+        Parameters
+        ----------
+        genome: list
+            The order of the fragments.
+
+        Rturns
+        ------
+        list
+            A list of bool, the orientation of each fragment of the genome,
+            in the genome's order.
+        """
+
+        if not genome:
+            return list()
+        # The best sum of the adjacent scores up to the fragment, for each of
+        # its orientations, and the orientation of the previous one it comes from.
+        best = [0.0, 0.0]
+        previous = list()
+        for k in range(1, len(genome)):
+            step = [0.0, 0.0]
+            come = [True, True]
+            for current in (0, 1):
+                forward = best[0] + self.score(genome[k - 1], True, genome[k], current == 0)
+                backward = best[1] + self.score(genome[k - 1], False, genome[k], current == 0)
+                step[current], come[current] = (forward, True) if forward >= backward else (backward, False)
+            best = step
+            previous.append(come)
+
+        orientation = best[0] >= best[1]
+        orientations = [orientation]
+        for come in reversed(previous):
+            orientation = come[0 if orientation else 1]
+            orientations.append(orientation)
+        orientations.reverse()
+        return orientations
+
+    @staticmethod
+    def strand_genome(genome: List[int], orientations: List[bool]) -> List[int]:
+        """This function writes an order of the fragments, with their
+        orientations, as an order of the strands of strands().
+
+        ...
+
+        Parameters
+        ----------
+        genome: list
+            The order of the fragments.
+        orientations: list
+            The orientation of each fragment of the genome.
+
+        Rturns
+        ------
+        list
+            The order of the strands.
+        """
+
+        return [2 * fragment + (not orientation) for fragment, orientation in zip(genome, orientations)]
+
+    def evaluate(self, genome: List[int]) -> Tuple[float, float, int, List[bool]]:
+        """This function calculates the oaf, the odf and the contigs of an
+        order of the fragments, each one in the orientation chosen by orient.
+
+        ...
+
+        Parameters
+        ----------
+        genome: list
+            The order of the fragments.
+
+        Rturns
+        ------
+        tuple
+            The oaf, the odf, the contigs, and the orientations.
+        """
+
+        orientations = self.orient(genome)
+        oaf, odf, contigs = kernels().evaluate(
+            self.strand_genome(genome, orientations), self.strands())
+        return oaf, odf, contigs, orientations
@@ -0,0 +1,175 @@
+# The 2 bits code of each nucleotide, any other caracter is masked.
+CODES = {"A": 0, "C": 1, "G": 2, "T": 3}
+BASES = "ACGT"
+# Marks a non ACGT caracter, after the translation of the sequence.
+MASKED = 4
+
+# Translates a sequence into its codes, in one pass.
+_ENCODE = bytes(CODES.get(chr(c).upper(), MASKED) for c in range(256))
+# Translates the codes back to the caracters, the masked codes are the caracters.
+_DECODE = bytes(ord(BASES[c]) if c < MASKED else c for c in range(256))
+# The 4 codes of each possible packed byte.
+_UNPACK = [bytes((b >> shift) & 3 for shift in (0, 2, 4, 6)) for b in range(256)]
+# The complement of each nucleotide.
+_COMPLEMENT = str.maketrans("ACGTacgt", "TGCAtgca")
+
+
+class PackedSequence:
+    """This is a PackedSequence class that stores a DNA sequence with
+    2 bits per nucleotide, 4 nucleotides in each byte.
+    The caracters other than A, C, G and T are marked in a side bit mask,
+    and kept aside in the order they appear.
+
+    ...
+
+    Attributes
+    ----------
+    length: int
+        The number of nucleotides.
+    packed: bytes
+        The 2 bits codes, the nucleotide k is stored in the bits 2*(k%4)
+        and 2*(k%4)+1 of the byte k//4.
+    mask: bytes
+        A bit mask of the non ACGT caracters positions, None if there is none.
+    exceptions: bytes
+        The non ACGT caracters, in the order they appear, None if there is none.
+
+    Methods
+    -------
+    __init__(sequence): None
+        The constructor.
+    codes: bytes
+        One code per nucleotide, to be read by the alignment kernels,
+        unpacked again at each call.
+    reverse_codes(codes=None): memoryview
+        A reversed view of the codes, without copying them.
+    reverse_complement: PackedSequence
+        The reverse complement sequence, computed once.
+    decode: str
+        The DNA sequence as a string.
+    """
+
+    __slots__ = ("length", "packed", "mask", "exceptions", "_reverse_complement")
+
+    def __init__(self, sequence: str):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        sequence: str
+            The DNA sequence.
+
+        Rturns
+        ------
+        None
+        """
+
+        raw = sequence.encode("ascii")
+        codes = raw.translate(_ENCODE)
+
+        self.length = len(codes)
+        self.mask = None
+        self.exceptions = None
+        self._reverse_complement = None
+
+        if MASKED in codes:
+            mask = bytearray((self.length + 7) // 8)
+            exceptions = bytearray()
+            for position in range(self.length):
+                if codes[position] == MASKED:
+                    mask[position >> 3] |= 1 << (position & 7)
+                    exceptions.append(raw[position])
+            self.mask = bytes(mask)
+            self.exceptions = bytes(exceptions)
+            # The masked positions are packed as A, the mask tells them apart.
+            codes = codes.replace(bytes([MASKED]), b"\x00")
+
+        # Pad to a multiple of 4 nucleotides, then pack them by 4.
+        codes += bytes(-self.length % 4)
+        self.packed = bytes(codes[k] | (codes[k + 1] << 2) | (codes[k + 2] << 4) | (codes[k + 3] << 6)
+                            for k in range(0, len(codes), 4))
+
+    def __len__(self):
+        return self.length
+
+    def codes(self) -> bytes:
+        """This function unpacks the sequence to one code per nucleotide,
+        0 to 3 for A, C, G and T, and the caracter itself (its ascii value)
+        for the masked ones, so two codes are equal only if the caracters are.
+        The codes are not kept, they would take 4 times the packed sequence:
+        each call unpacks them again, in O(length), so the callers reading
+        them more than once unpack them once, and keep them for as long as
+        they need them, as overlap_scores does.
+
+        ...
+
+        Rturns
+        ------
+        bytes
+            A uint8 buffer of lenght codes.
+        """
+
+        codes = b"".join([_UNPACK[b] for b in self.packed])[:self.length]
+        if self.mask is None:
+            return codes
+
+        codes = bytearray(codes)
+        count = 0
+        for byte_index, byte in enumerate(self.mask):
+            while byte:
+                low = byte & -byte
+                codes[(byte_index << 3) + low.bit_length() - 1] = self.exceptions[count]
+                count += 1
+                byte ^= low
+        return bytes(codes)
+
+    def reverse_codes(self, codes: bytes = None) -> memoryview:
+        """This function returns the codes read from right to left, as a view
+        of the codes buffer, nothing is copied.
+
+        ...
+
+        Parameters
+        ----------
+        codes: bytes, optional
+            The codes returned by codes, to avoid unpacking them again.
+
+        Rturns
+        ------
+        memoryview
+            The reversed view of the codes.
+        """
+
+        return memoryview(self.codes() if codes is None else codes)[::-1]
+
+    def reverse_complement(self) -> "PackedSequence":
+        """This function returns the reverse complement of the sequence,
+        it is computed at the first call, then kept.
+
+        ...
+
+        Rturns
+        ------
+        PackedSequence
+            The reverse complement sequence.
+        """
+
+        if self._reverse_complement is None:
+            self._reverse_complement = PackedSequence(
+                self.decode().translate(_COMPLEMENT)[::-1])
+        return self._reverse_complement
+
+    def decode(self) -> str:
+        """This function returns the DNA sequence as a string.
+
+        ...
+
+        Rturns
+        ------
+        str
+            The DNA sequence.
+        """
+
+        return self.codes().translate(_DECODE).decode("ascii")
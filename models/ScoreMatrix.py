@@ -0,0 +1,286 @@
+from array import array
+from bisect import bisect_left
+from typing import List, Union
+
+
+STORAGES = ("dense", "condensed", "sparse")
+
+
+class ScoreMatrix:
+    """This is a ScoreMatrix class that stores the overlap scores matrix
+    as float32, in one of three storages:
+    dense, the whole N×N matrix, row after row.
+    condensed, only the upper triangle i < j, since the matrix is symmetric.
+    sparse, the rows in the CSR format, keeping only the scores greater
+    than a threshold, the others are read as 0.
+    The score of a fragment with itself is always -1.
+    The scores are read as scores[i][j], like the lists of lists returned by
+    overlap_scores, or as scores[i, j].
+
+    ...
+
+    Attributes
+    ----------
+    size: int
+        The number of fragments.
+    storage: str
+        The storage, dense, condensed or sparse.
+    threshold: float
+        The scores lower or equal to it are not stored in the sparse storage.
+    values: array
+        The float32 scores, contiguous.
+    indptr: array
+        For the sparse storage, the start of each row in values.
+    indices: array
+        For the sparse storage, the column of each value.
+
+    Methods
+    -------
+    __init__(size, storage="dense", threshold=0.0): None
+        The constructor.
+    from_scores(scores, storage="dense", threshold=0.0): ScoreMatrix
+        Builds the matrix from a list of lists, or another ScoreMatrix.
+    from_buffer(size, buffer): ScoreMatrix
+        A dense matrix over an existing buffer, like a memory mapped file.
+    get(i, j): float
+        The score of two fragments.
+    set(i, j, value): None
+        Stores the score of two fragments, for the dense and condensed storages.
+    tolist: list
+        The matrix as a list of lists.
+    """
+
+    def __init__(self, size: int, storage: str = "dense", threshold: float = 0.0):
+        """The constructor, the scores are all 0 at first.
+
+        ...
+
+        Parameters
+        ----------
+        size: int
+            The number of fragments.
+        storage: str, optional
+            The storage, dense, condensed or sparse.
+        threshold: float, optional
+            For the sparse storage, the scores kept must be greater than it.
+
+        Rturns
+        ------
+        None
+        """
+
+        if storage not in STORAGES:
+            raise ValueError("Unknown storage {}, expected one of {}.".format(
+                storage, STORAGES))
+
+        self.size = size
+        self.storage = storage
+        self.threshold = threshold
+        self.indptr = None
+        self.indices = None
+        self._view = None
+
+        if storage == "dense":
+            self.values = array("f", bytes(4 * size * size))
+            for i in range(size):
+                self.values[i * size + i] = -1.0
+        elif storage == "condensed":
+            self.values = array("f", bytes(4 * (size * (size - 1) // 2)))
+        else:
+            self.values = array("f")
+            self.indptr = array("l", bytes(array("l").itemsize * (size + 1)))
+            self.indices = array("l")
+
+    @staticmethod
+    def from_scores(scores: Union[List[List[float]], "ScoreMatrix"], storage: str = "dense", threshold: float = 0.0) -> "ScoreMatrix":
+        """This function builds a ScoreMatrix from the scores returned by
+        overlap_scores, or from another ScoreMatrix.
+
+        ...
+
+        Parameters
+        ----------
+        scores: list
+            A list of lists(matrix) of float, or a ScoreMatrix.
+        storage: str, optional
+            The storage, dense, condensed or sparse.
+        threshold: float, optional
+            For the sparse storage, the scores kept must be greater than it.
+
+        Rturns
+        ------
+        ScoreMatrix
+            The new matrix.
+        """
+
+        size = len(scores)
+        matrix = ScoreMatrix(size, storage, threshold)
+
+        if storage == "sparse":
+            for i in range(size):
+                row = scores[i]
+                for j in range(size):
+                    if j != i and row[j] > threshold:
+                        matrix.indices.append(j)
+                        matrix.values.append(row[j])
+                matrix.indptr[i + 1] = len(matrix.values)
+        else:
+            for i in range(size - 1):
+                row = scores[i]
+                for j in range(i + 1, size):
+                    matrix.set(i, j, row[j])
+
+        return matrix
+
+    @staticmethod
+    def from_buffer(size: int, buffer) -> "ScoreMatrix":
+        """This function builds a dense ScoreMatrix over an existing buffer
+        of size×size float32, nothing is copied, so the buffer can be a
+        memory mapped file bigger than the memory.
+
+        ...
+
+        Parameters
+        ----------
+        size: int
+            The number of fragments.
+        buffer: buffer
+            Any writable buffer of size×size float32, e.g a mmap.
+
+        Rturns
+        ------
+        ScoreMatrix
+            The new matrix.
+        """
+
+        matrix = ScoreMatrix(0, "dense")
+        matrix.size = size
+        matrix.values = memoryview(buffer).cast("B").cast("f")
+        return matrix
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.get(*key)
+        if self.storage == "dense":
+            if self._view is None:
+                self._view = memoryview(self.values)
+            return self._view[key * self.size:(key + 1) * self.size]
+        return _Row(self, key)
+
+    def __getstate__(self):
+        # The memoryviews can't be pickled, the views are made again when
+        # needed, and a matrix over a buffer is pickled as an array.
+        state = self.__dict__.copy()
+        state["_view"] = None
+        if isinstance(self.values, memoryview):
+            state["values"] = array("f", self.values.tobytes())
+        return state
+
+    def _condensed_index(self, i: int, j: int) -> int:
+        # The index of the pair i < j in the upper triangle.
+        return i * (2 * self.size - i - 1) // 2 + j - i - 1
+
+    def get(self, i: int, j: int) -> float:
+        """This function returns the score of two fragments.
+
+        ...
+
+        Parameters
+        ----------
+        i: int
+            The index of the first fragment.
+        j: int
+            The index of the second fragment.
+
+        Rturns
+        ------
+        float
+            The overlap score, -1 if i == j.
+        """
+
+        if self.storage == "dense":
+            return self.values[i * self.size + j]
+        if i == j:
+            return -1.0
+        if self.storage == "condensed":
+            if i > j:
+                i, j = j, i
+            return self.values[self._condensed_index(i, j)]
+
+        start = self.indptr[i]
+        end = self.indptr[i + 1]
+        k = bisect_left(self.indices, j, start, end)
+        if k < end and self.indices[k] == j:
+            return self.values[k]
+        return 0.0
+
+    def set(self, i: int, j: int, value: float) -> None:
+        """This function stores the score of two fragments, both scores[i][j]
+        and scores[j][i] are set. The sparse storage is built once, and
+        can't be changed.
+
+        ...
+
+        Parameters
+        ----------
+        i: int
+            The index of the first fragment.
+        j: int
+            The index of the second fragment, other than i.
+        value: float
+            The overlap score.
+
+        Rturns
+        ------
+        None
+        """
+
+        if self.storage == "dense":
+            self.values[i * self.size + j] = self.values[j * self.size + i] = value
+        elif self.storage == "condensed":
+            if i > j:
+                i, j = j, i
+            self.values[self._condensed_index(i, j)] = value
+        else:
+            raise ValueError("The sparse storage can't be changed.")
+
+    def tolist(self) -> List[List[float]]:
+        """This function returns the matrix as a list of lists, in the
+        format of overlap_scores.
+
+        ...
+
+        Rturns
+        ------
+        list
+            A list of lists(matrix) of float, that contains the overlaping scores.
+        """
+
+        return [list(self[i]) for i in range(self.size)]
+
+
+class _Row:
+    """A row of a condensed or sparse ScoreMatrix, read as row[j]."""
+
+    __slots__ = ("matrix", "i")
+
+    def __init__(self, matrix: ScoreMatrix, i: int):
+        self.matrix = matrix
+        self.i = i
+
+    def __len__(self):
+        return self.matrix.size
+
+    def __getitem__(self, j: int) -> float:
+        return self.matrix.get(self.i, j)
+
+    def __iter__(self):
+        for j in range(self.matrix.size):
+            yield self.matrix.get(self.i, j)
@@ -1,5 +1,9 @@
 from typing import List
 
+from use.backends import kernels
+from models.OrientedScores import OrientedScores
+
+
 
 class Solution:
     """This is a Solution class that represent a Solution for the
@@ -30,6 +34,9 @@ class Solution:
         to a generation, based on the font that it belongs to.
     contigs: int
         The number of contigs.
+    orientations: list
+        With OrientedScores, the orientation of each fragment of the genome
+        used by the objectives, None else.
 
     Methods
     -------
@@ -37,6 +44,10 @@ class Solution:
         The constructor.
     __str__: str
         The print formating method.
+    evaluate(scores): None
+        Calculates the three objective functions at once.
+    objectives(objectives_number=2): tuple
+        The objectives vector, to minimize.
     """
 
     def __init__(self, genome, generation=-1):
@@ -66,6 +77,7 @@ class Solution:
         self.rank = -1
         self.crowding_distance = -1
         self.contigs = -1
+        self.orientations = None
 
     def __str__(self):
         """This method returns the formating print format, to print out
@@ -73,7 +85,11 @@ class Solution:
         """
 
         out = "* Genome:: {}\n* Genome size:: {}\n* OAF::{}\n* ODF:: {}\n* Rank:: {}\n* Crowding distance:: {}\n* Contigs number:: {}\n* Generation:: {}"
-        return out.format(self.genome, self.genome_size, self.oaf, self.odf, self.rank, self.crowding_distance, self.contigs, self.generation)
+        out = out.format(self.genome, self.genome_size, self.oaf, self.odf, self.rank, self.crowding_distance, self.contigs, self.generation)
+        if self.orientations is not None:
+            out += "\n* Reverse complemented:: {}".format(
+                [fragment for fragment, orientation in zip(self.genome, self.orientations) if not orientation])
+        return out
 
     def oaf_objective(self, scores: List[List[float]]) -> None:
         """It is  the first objective function, Overlaping Adjacent Fragments.
@@ -83,17 +99,16 @@ class Solution:
         Parameters
         ----------
         scores: list
-            A list of list(matrix) of int, that contains the overlaping scores.
+            A list of list(matrix) of int, that contains the overlaping scores,
+            or a ScoreMatrix.
 
         Returns
         -------
         None
         """
 
-        self.oaf = 0
         # Can't explain, take a look at the research paper(/papers)
-        for i in range(self.genome_size - 1):
-            self.oaf += scores[self.genome[i]][self.genome[i + 1]] * 2
+        self.oaf = kernels().oaf(self.genome, scores)
 
     def odf_objective(self, scores: List[List[float]]) -> None:
         """It is  the second objective function, Overlaping Distant Fragments.
@@ -103,20 +118,16 @@ class Solution:
         Parameters
         ----------
         scores: list
-            A list of list(matrix) of int, that contains the overlaping scores.
+            A list of list(matrix) of int, that contains the overlaping scores,
+            or a ScoreMatrix.
 
         Returns
         -------
             None
         """
 
-        self.odf = 0
         # Can't explain, take a look at the research paper(/papers)
-        for i in range(self.genome_size - 2):
-            p = i
-            for j in range(i + 2, self.genome_size):
-                self.odf += ((j - p) *
-                             scores[self.genome[i]][self.genome[j]]) * 2
+        self.odf = kernels().odf(self.genome, scores)
 
     def contigs_number(self, scores: List[List[float]]) -> None:
         """It is the function that calculates the number of contigs in a solution.
@@ -128,16 +139,53 @@ class Solution:
         Parameters
         ----------
         scores: list
-            A list of list(matrix) of int, that contains the overlaping scores.
+            A list of list(matrix) of int, that contains the overlaping scores,
+            or a ScoreMatrix.
 
         Returns
         -------
         None
         """
-        self.contigs = 1
-
         # If a score between to fragments, is less than a score condition calulated
         # we increment the number of the contigs
-        for index in range(0, self.genome_size - 1):
-            if scores[self.genome[index]][self.genome[index + 1]] == 0:
-                self.contigs += 1
+        self.contigs = kernels().contigs(self.genome, scores)
+
+    def evaluate(self, scores: List[List[float]]) -> None:
+        """It calculates the three objective functions, oaf, odf and the number
+        of contigs, in one pass over the genome. With OrientedScores, each
+        fragment is taken in the orientation that suits the genome best.
+
+        ...
+
+        Parameters
+        ----------
+        scores: list
+            A list of list(matrix) of int, that contains the overlaping scores,
+            or a ScoreMatrix.
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(scores, OrientedScores):
+            self.oaf, self.odf, self.contigs, self.orientations = scores.evaluate(self.genome)
+            return
+        self.oaf, self.odf, self.contigs = kernels().evaluate(self.genome, scores)
+
+    def objectives(self, objectives_number: int = 2) -> tuple:
+        """It returns the objectives vector, where each objective is minimized,
+        i.e (-oaf, odf, contigs), with the first objectives_number of them.
+
+        ...
+
+        Parameters
+        ----------
+        objectives_number: int, optional
+            The number of objectives, 2 or 3.
+
+        Returns
+        -------
+        tuple
+            The objectives vector.
+        """
+        return (-self.oaf, self.odf, self.contigs)[:objectives_number]
@@ -1,16 +1,77 @@
 from time import time
+from typing import List, Union
 
+import config
 from config import *
+from models.ScoreMatrix import ScoreMatrix
 from use.tools import read_fragments
-from use.scoring import *
+from use.backends import select_backend
+from use.instance import scores_key, compute_scores
+from use.checkpoint import latest_checkpoint, load_checkpoint, save_scores, load_scores
 from algorithm.BatAlgorithm import *
+from algorithm.Indicators import ConvergenceMonitor
+from algorithm.ParetoArchive import ParetoArchive
+from algorithm.Screening import Screening
+from use.cache import EvaluationCache
+from use.trace import TraceWriter
+from use.progressive import ProgressiveScores
 
 
-if __name__ == "__main__":
-    # Counting the number of generations
-    generation_counter = 1
+def moba_search(scores: Union[List[List[float]], ScoreMatrix], fragments_number: int, cfg=config, progressive: ProgressiveScores = None) -> BatAlgorithm:
+    """This function runs the MOBA algorithm, with the values of the config,
+    or of another object with the same attributes (see use.experiments).
+
+    ...
+
+    Parameters
+    ----------
+    scores: list
+        A list of list(matrix) of float, or a ScoreMatrix.
+    fragments_number: int
+        The number of the fragments.
+    cfg: module, optional
+        The config module, or an object with the same attributes.
+    progressive: ProgressiveScores, optional
+        The approximate scores being refined, scores being its matrix.
+
+    Returns
+    -------
+    BatAlgorithm
+        The algorithm once done, with its archive and its monitor.
+    """
+    # The checkpoints of this algorithm and these scores only.
+    key = ("MOBA", scores_key(cfg))
+    checkpoint = latest_checkpoint(
+        cfg.CHECKPOINT_DIRECTORY, key) if cfg.RESUME else None
+    state = load_checkpoint(checkpoint, key) if checkpoint is not None else None
 
+    monitor = ConvergenceMonitor(
+        cfg.STAGNATION_PATIENCE, cfg.STAGNATION_TOLERANCE, cfg.REFERENCE_POINT, cfg.REFERENCE_FRONT, cfg.TIME_LIMIT)
+    Algorithm = BatAlgorithm(cfg.DIMENTION_NUMBER, cfg.MOBA_POPULATION_SIZE, cfg.GENERATIONS_NUMBER, fragments_number,
+                             cfg.LOUDNESS, cfg.RATE_PLUSSE, cfg.ALPHA, cfg.GAMA, cfg.MINIMUM_FREQUANCY, cfg.MAXIMUM_FREQUANCY,
+                             scores, monitor, cfg.SEEDING_RATE, cfg.OVECTIVE_FUNCTIONS_NUMBER,
+                             ParetoArchive(cfg.ARCHIVE_SIZE,
+                                           cfg.OVECTIVE_FUNCTIONS_NUMBER),
+                             Screening(cfg.OVECTIVE_FUNCTIONS_NUMBER,
+                                       cfg.SCREENING_CHUNKS) if cfg.SCREENING else None,
+                             EvaluationCache(cfg.EVALUATION_CACHE_MB * 2**20) if cfg.EVALUATION_CACHE_MB else None,
+                             TraceWriter(cfg.TRACE_FILE, cfg.TRACE_EVERY, cfg.TRACE_MAX_SIZE, append=state is not None,
+                                         until=state["generation"] if state is not None else None) if cfg.TRACE_FILE else None,
+                             progressive, cfg.SEEDING_MIN_DISTANCE)
+
+    if state is not None:
+        print("RESUMING FROM THE CHECKPOINT --> {}".format(checkpoint))
+        Algorithm.set_state(state)
+    Algorithm.move_bat(cfg.CHECKPOINT_DIRECTORY, cfg.CHECKPOINT_INTERVAL, key)
+    if Algorithm.trace is not None:
+        Algorithm.trace.close()
+        print("TRACE:: {}".format(Algorithm.trace))
+    return Algorithm
+
+
+if __name__ == "__main__":
     start = time()
+    print("KERNELS :: {}".format(select_backend(KERNEL_BACKEND, SCORE_STORAGE)))
     # STEP 0, reading fragments from file
     print("STEP-0 :: READING FRAGMENTS FROM FILE --> {}".format(BECHMARK_FILE))
     fragments = read_fragments(BECHMARK_FILE)
@@ -19,11 +80,29 @@ if __name__ == "__main__":
 
     # STEP 1, compute pair wise overlap
     print("STEP-1 :: CALCULATING THE OVERLAP SCORES.")
-    scores = overlap_scores(fragments, MATCH_SCORE, MISMATCH_SCORE, GAP_COST)
+    key = scores_key(config)
+    scores = load_scores(CHECKPOINT_DIRECTORY, key) if RESUME else None
+    progressive = None
+    if scores is None and PROGRESSIVE_SCORES and not ORIENTED_SCORES:
+        # Starting on the k-mer scores, or on the scores refined up to the
+        # checkpoint resumed from, refined during the search.
+        checkpoint = latest_checkpoint(CHECKPOINT_DIRECTORY, ("MOBA", key)) if RESUME else None
+        progressive = ProgressiveScores(fragments, MATCH_SCORE, MISMATCH_SCORE, GAP_COST,
+                                        PROGRESSIVE_KMER, PROGRESSIVE_WORKERS, PROGRESSIVE_REFRESH,
+                                        exact_min_length=EXACT_OVERLAP_MIN_LENGTH,
+                                        state=load_checkpoint(checkpoint, ("MOBA", key)).get("progressive")
+                                        if checkpoint is not None else None)
+        scores = progressive.matrix
+    elif scores is None:
+        scores = compute_scores(fragments, config)
+        if CHECKPOINT_INTERVAL:
+            save_scores(CHECKPOINT_DIRECTORY, key, scores)
     # print(scores)
-    Algorithm = BatAlgorithm(DIMENTION_NUMBER, MOBA_POPULATION_SIZE, GENERATIONS_NUMBER, len(fragments),
-                             LOUDNESS, RATE_PLUSSE, ALPHA, GAMA, MINIMUM_FREQUANCY, MAXIMUM_FREQUANCY, scores)
-    Algorithm.move_bat()
+    moba_search(scores, len(fragments), progressive=progressive)
+    if progressive is not None:
+        progressive.close()
+        if CHECKPOINT_INTERVAL:
+            save_scores(CHECKPOINT_DIRECTORY, key, scores)
 
     print("DONE.\n")
     print("EXECTION TIME:: {} Seconds.".format(round(time() - start)))
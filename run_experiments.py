@@ -0,0 +1,17 @@
+from time import time
+
+from config import *
+from use.backends import select_backend
+from use.experiments import run_experiments
+
+
+if __name__ == "__main__":
+    print("RUNNING THE EXPERIMENTS.")
+
+    start = time()
+    print("KERNELS :: {}".format(select_backend(KERNEL_BACKEND, SCORE_STORAGE)))
+    run_experiments(EXPERIMENT_INSTANCES, EXPERIMENT_ALGORITHMS, EXPERIMENT_PARAMETERS, EXPERIMENT_SEEDS,
+                    EXPERIMENT_WORKERS, EXPERIMENT_RESULTS, EXPERIMENT_DIRECTORY)
+
+    print("DONE.\n")
+    print("EXECTION TIME:: {} Seconds.".format(round(time() - start)))
@@ -1,101 +1,341 @@
-from time import time
+import random
+from time import time, process_time
+from typing import List, Union, Tuple
 
+import config
+from config import *
+from models.ScoreMatrix import ScoreMatrix
 from use.tools import read_fragments
-from use.scoring import *
+from use.backends import select_backend
+from use.instance import scores_key, compute_scores
+from use.checkpoint import save_checkpoint, latest_checkpoint, load_checkpoint, save_scores, load_scores, pack_population, unpack_population, pack_hash_values
 from algorithm.MultiObjective import MultiObjective as mo
 from algorithm.NsGa2 import NsGa2 as nsga2
-from config import *
+from algorithm.LocalSearch import LocalSearch as ls
+from algorithm.Indicators import ConvergenceMonitor
+from algorithm.ParetoArchive import ParetoArchive
+from algorithm.SteadyState import SteadyState
+from algorithm.Screening import Screening
+from algorithm.OperatorScheduler import OperatorScheduler
+from use.trace import TraceWriter
+from use.progressive import ProgressiveScores
 
 
-if __name__ == "__main__":
-    print("USING THE NSGA-II Algorithm.")
+def nsga2_search(scores: Union[List[List[float]], ScoreMatrix], fragments_number: int, cfg=config, progressive: ProgressiveScores = None) -> Tuple[ParetoArchive, ConvergenceMonitor]:
+    """This function runs the NSGA-II algorithm, from the STEP 2 to the last
+    generation, with the values of the config, or of another object with the
+    same attributes (see use.experiments).
+
+    ...
+
+    Parameters
+    ----------
+    scores: list
+        A list of list(matrix) of float, or a ScoreMatrix.
+    fragments_number: int
+        The number of the fragments.
+    cfg: module, optional
+        The config module, or an object with the same attributes.
+    progressive: ProgressiveScores, optional
+        The approximate scores being refined, scores being its matrix, the
+        solutions are evaluated again each time they changed enough, and
+        the archive at the end, once all the scores are exact.
+
+    Returns
+    -------
+    ParetoArchive
+        The non dominated solutions of the whole run.
+    ConvergenceMonitor
+        The hypervolume of the first font at each generation.
+    """
     # Counting the number of generations
     generation_counter = 1
 
-    start = time()
-    # STEP 0, reading fragments from file
-    print("STEP-0 :: READING FRAGMENTS FROM FILE --> {}".format(BECHMARK_FILE))
-    fragments = read_fragments(BECHMARK_FILE)
+    # Following the hypervolume of the first font, to stop once it stagnates.
+    monitor = ConvergenceMonitor(
+        cfg.STAGNATION_PATIENCE, cfg.STAGNATION_TOLERANCE, cfg.REFERENCE_POINT, cfg.REFERENCE_FRONT, cfg.TIME_LIMIT)
+    # Keeping every non dominated solution found, even once lost by the population.
+    archive = ParetoArchive(cfg.ARCHIVE_SIZE, cfg.OVECTIVE_FUNCTIONS_NUMBER)
+    # Dropping the childs dominated by the first font, before their odf is complete.
+    screening = Screening(cfg.OVECTIVE_FUNCTIONS_NUMBER,
+                          cfg.SCREENING_CHUNKS) if cfg.SCREENING else None
+    # Choosing the operator of each pair of parents, from its childs in the first font per CPU second.
+    pairs = max(round(cfg.NSGA_POPULATION_SIZE * cfg.CROSS_OVER_PROBABILITY) // 2, 1)
+    scheduler = OperatorScheduler(cfg.OPERATORS, cfg.OPERATOR_LEARNING_RATE, cfg.OPERATOR_MINIMUM_PROBABILITY,
+                                  cfg.LOCAL_SEARCH_TIME_LIMIT / pairs) if cfg.ADAPTIVE_OPERATORS else None
 
-    # STEP 1, compute pair wise overlap²
-    print("STEP-1 :: CALCULATING THE OVERLAP SCORES.")
-    scores = overlap_scores(fragments, MATCH_SCORE, MISMATCH_SCORE, GAP_COST)
+    # The checkpoints of this algorithm and these scores only.
+    key = ("NSGA-II", scores_key(cfg))
+    checkpoint = latest_checkpoint(cfg.CHECKPOINT_DIRECTORY, key) if cfg.RESUME else None
+    if checkpoint is not None:
+        # Continue from the latest checkpoint, the ranks and the crowding
+        # distances are restored with the population, and the random state
+        # makes the rest of the run the same as if it was never stopped.
+        print("STEP-2 :: RESUMING FROM THE CHECKPOINT --> {}".format(checkpoint))
+        state = load_checkpoint(checkpoint, key)
+        population = unpack_population(state["population"])
+        hash_values = set(state["hash_values"])
+        generation_counter = state["generation_counter"]
+        monitor.set_state(state["monitor"])
+        archive.set_state(state["archive"])
+        if scheduler is not None and state.get("scheduler"):
+            scheduler.set_state(state["scheduler"])
+        random.setstate(state["random_state"])
+    else:
+        # STEP 2, generate initial population, and retreving the set of the solutions
+        print("STEP-2 :: GENERATING SOLUTIONS (INITIAL POPULATION).")
+        population, hash_values = mo.init_population(
+            fragments_number, cfg.NSGA_POPULATION_SIZE, scores, cfg.SEEDING_RATE, cfg.SEEDING_MIN_DISTANCE)
+
+        print("STEP-3 :: CALCULATING OBJECTIVE FUNCTIONS.")
+        # STEP 3, compute ODF and OAF fitness, and the contigs
+        for sol in population:
+            sol.evaluate(scores)
+        archive.update(population)
 
-    # STEP 2, generate initial population, and retreving the set of the solutions
-    print("STEP-2 :: GENERATING SOLUTIONS (INITIAL POPULATION).")
-    population, hash_values = mo.init_population(
-        len(fragments), NSGA_POPULATION_SIZE)
+        print("STEP-4 :: CALCULATING AND ATTRIBUTING FONTS.")
+        # STEP 4, calculate the fonts
+        fonts = mo.non_dominate_sorting(population, cfg.OVECTIVE_FUNCTIONS_NUMBER)
 
-    print("STEP-3 :: CALCULATING OBJECTIVE FUNCTIONS.")
-    # STEP 3, compute ODF and OAF fitness
-    for sol in population:
-        sol.oaf_objective(scores)
-        sol.odf_objective(scores)
+        print("STEP-5 :: CALCULATING CROWDING DISTANCES.")
+        # STEP 5, calculate the crowding distances
+        crownding = mo.crowding_distance(
+            population, fonts, cfg.OVECTIVE_FUNCTIONS_NUMBER)
 
-    print("STEP-4 :: CALCULATING AND ATTRIBUTING FONTS.")
-    # STEP 4, calculate the fonts
-    fonts = mo.non_dominate_sorting(population)
+    # Appending the first font of the generations to the trace file, a resumed
+    # run after the records up to its checkpoint.
+    trace = TraceWriter(cfg.TRACE_FILE, cfg.TRACE_EVERY, cfg.TRACE_MAX_SIZE, append=checkpoint is not None,
+                        until=generation_counter - 1) if cfg.TRACE_FILE else None
 
-    print("STEP-5 :: CALCULATING CROWDING DISTANCES.")
-    # STEP 5, calculate the crowding distances
-    crownding = mo.crowding_distance(population, fonts)
+    if cfg.STEADY_STATE:
+        # The fonts and the crowding distances are then updated child by child.
+        if checkpoint is not None and state.get("steady"):
+            # In the order they had, so the ties are broken the same way.
+            steady = SteadyState(list(), cfg.OVECTIVE_FUNCTIONS_NUMBER)
+            steady.set_state(state["steady"], population)
+        else:
+            steady = SteadyState(population, cfg.OVECTIVE_FUNCTIONS_NUMBER)
+        population = steady.population
 
-    while generation_counter <= GENERATIONS_NUMBER:
+    while generation_counter <= cfg.GENERATIONS_NUMBER:
         print("GENERATION :: {}".format(generation_counter))
 
-        print("\tG-{} --> STEP-6 :: SELECTING SOLUTIONS POOL.".format(generation_counter))
-        # STEP 6, select solutions for pool
-        selection = nsga2.select_cross_solutions(
-            population, CROSS_OVER_PROBABILITY)
-
-        # STEP 7, crossover and mutation
-        print("\tG-{} --> STEP-7.1 :: OPERATING CROSSOVER.".format(generation_counter))
-        # STEP 7.1, crossover
-        childs = nsga2.crossover(population, selection,
-                                 hash_values, generation_counter)
-
-        print("\tG-{} --> STEP-7.2 :: OPERATING MUTATION.".format(generation_counter))
-        # STEP 7.2, mutation
-        childs.extend(nsga2.mutation(population, selection,
-                                     hash_values, MUTATION_PROBABILITY, generation_counter))
-
-        # STEP 8, offsoring
-        print("\tG-{} --> STEP-8.1 :: CALCULATING OBJECTIVE FUNCTIONS FOR CHILDS.".format(generation_counter))
-        # STEP 8.1, calculate oaf, odf to the childs
-        for child in childs:
-            child.oaf_objective(scores)
-            child.odf_objective(scores)
-
-        # STEP 8.2, merge child with current population
-        print(
-            "\tG-{} --> STEP-8.2 :: CREATING OFFSPRING POPULATION.".format(generation_counter))
-        # to create offspring population
-        population.extend(childs)
-
-        print("\tG-{} --> STEP-8.3 :: CALCULATING AND ATTRIBUTING FONTS FOR THE OFFSPRING POPULATION.".format(generation_counter))
-        # STEP 8.3, recalculate the fonts for the offspring population
-        fonts = mo.non_dominate_sorting(population)
-
-        print("\tG-{} --> STEP-8.4 :: CALCULATING CROWDING DISTANCES FOR THE OFFSPRING POPULATION.".format(generation_counter))
-        # STEP 8.4, recalculate the crowding distances for the offspring population
-        crownding = mo.crowding_distance(population, fonts)
-
-        print("\tG-{} --> STEP-9 :: PASSING THE FIRST {} OFFSSPRING SOLUTION THE NEXT GENERATION POPULATION.".format(
-            generation_counter, GENERATIONS_NUMBER))
-        # STEP 9, passing the next first POPULATION_SIZE solutions
-        temp = [index for indexes in fonts for index in indexes]
-        population = [population[p] for p in temp[:NSGA_POPULATION_SIZE]]
+        if progressive is not None and progressive.refine():
+            # The scores changed enough since the last evaluation, the fonts
+            # and the hypervolumes are calculated again with them.
+            print("\tG-{} --> SCORES REFINED ({}), RE-EVALUATING THE POPULATION.".format(
+                generation_counter, progressive))
+            for sol in population:
+                sol.evaluate(scores)
+            archive.refresh(scores)
+            monitor.reset(generation_counter)
+            if cfg.STEADY_STATE:
+                steady = SteadyState(population, cfg.OVECTIVE_FUNCTIONS_NUMBER)
+                population = steady.population
+            else:
+                fonts = mo.non_dominate_sorting(population, cfg.OVECTIVE_FUNCTIONS_NUMBER)
+                crownding = mo.crowding_distance(
+                    population, fonts, cfg.OVECTIVE_FUNCTIONS_NUMBER)
+
+        if cfg.STEADY_STATE:
+            # STEP 6 to 9, as many pairs of parents as a generation, each pair
+            # selected by a binary tournament, and its childs inserted at once.
+            print("\tG-{} --> STEP-6..9 :: STEADY STATE, INSERTING THE CHILDS ONE BY ONE.".format(generation_counter))
+            kept = 0
+            if screening is not None:
+                screening.set_font(steady.fonts()[0])
+            for _ in range(pairs):
+                selection = nsga2.select_pair(population)
+                if scheduler is not None:
+                    operator = scheduler.choose()
+                    start = process_time()
+                    childs = scheduler.apply(operator, population, selection,
+                                             hash_values, generation_counter, scores)
+                else:
+                    childs = nsga2.crossover(population, selection,
+                                             hash_values, generation_counter)
+                    childs.extend(nsga2.mutation(population, selection,
+                                                 hash_values, cfg.MUTATION_PROBABILITY, generation_counter))
+                    if cfg.LOCAL_SEARCH:
+                        ls.improve_childs(childs, scores, hash_values,
+                                          cfg.LOCAL_SEARCH_RATE, cfg.LOCAL_SEARCH_TIME_LIMIT / pairs)
+                if screening is not None:
+                    childs = screening.screen(childs, scores)
+                else:
+                    for child in childs:
+                        child.evaluate(scores)
+                if scheduler is not None:
+                    scheduler.charge(operator, process_time() - start, childs)
+                archive.update(childs)
+                kept += steady.step(childs)
+            print("\tG-{} --> STEP-9 :: {} CHILDS KEPT IN THE POPULATION.".format(
+                generation_counter, kept))
+        else:
+            print("\tG-{} --> STEP-6 :: SELECTING SOLUTIONS POOL.".format(generation_counter))
+            # STEP 6, select solutions for pool
+            selection = nsga2.select_cross_solutions(
+                population, cfg.CROSS_OVER_PROBABILITY)
+
+            if screening is not None:
+                screening.set_font([p for p in population if p.rank == 1])
+
+            if scheduler is not None:
+                # STEP 7 and 8.1, the operator of each pair of parents chosen by
+                # the scheduler, and charged for the time of its childs
+                print("\tG-{} --> STEP-7..8.1 :: OPERATING THE SCHEDULED OPERATORS.".format(generation_counter))
+                childs = list()
+                for p in range(0, len(selection) - 1, 2):
+                    operator = scheduler.choose()
+                    start = process_time()
+                    produced = scheduler.apply(operator, population, selection[p:p + 2],
+                                               hash_values, generation_counter, scores)
+                    if screening is not None:
+                        produced = screening.screen(produced, scores)
+                    else:
+                        for child in produced:
+                            child.evaluate(scores)
+                    scheduler.charge(operator, process_time() - start, produced)
+                    childs.extend(produced)
+            else:
+                # STEP 7, crossover and mutation
+                print("\tG-{} --> STEP-7.1 :: OPERATING CROSSOVER.".format(generation_counter))
+                # STEP 7.1, crossover
+                childs = nsga2.crossover(population, selection,
+                                         hash_values, generation_counter)
+
+                print("\tG-{} --> STEP-7.2 :: OPERATING MUTATION.".format(generation_counter))
+                # STEP 7.2, mutation
+                childs.extend(nsga2.mutation(population, selection,
+                                             hash_values, cfg.MUTATION_PROBABILITY, generation_counter))
+
+                if cfg.LOCAL_SEARCH:
+                    # STEP 7.3, improve a part of the childs, before their evaluation
+                    improved = ls.improve_childs(childs, scores, hash_values,
+                                                 cfg.LOCAL_SEARCH_RATE, cfg.LOCAL_SEARCH_TIME_LIMIT)
+                    print("\tG-{} --> STEP-7.3 :: LOCAL SEARCH, {} CHILDS IMPROVED.".format(
+                        generation_counter, improved))
+
+                # STEP 8, offsoring
+                print("\tG-{} --> STEP-8.1 :: CALCULATING OBJECTIVE FUNCTIONS FOR CHILDS.".format(generation_counter))
+                # STEP 8.1, calculate oaf, odf and the contigs of the childs
+                if screening is not None:
+                    childs = screening.screen(childs, scores)
+                else:
+                    for child in childs:
+                        child.evaluate(scores)
+            archive.update(childs)
+
+            # STEP 8.2, merge child with current population
+            print(
+                "\tG-{} --> STEP-8.2 :: CREATING OFFSPRING POPULATION.".format(generation_counter))
+            # to create offspring population
+            population.extend(childs)
+
+            print("\tG-{} --> STEP-8.3 :: CALCULATING AND ATTRIBUTING FONTS FOR THE OFFSPRING POPULATION.".format(generation_counter))
+            # STEP 8.3, recalculate the fonts for the offspring population
+            fonts = mo.non_dominate_sorting(population, cfg.OVECTIVE_FUNCTIONS_NUMBER)
+
+            print("\tG-{} --> STEP-8.4 :: CALCULATING CROWDING DISTANCES FOR THE OFFSPRING POPULATION.".format(generation_counter))
+            # STEP 8.4, recalculate the crowding distances for the offspring population
+            crownding = mo.crowding_distance(
+                population, fonts, cfg.OVECTIVE_FUNCTIONS_NUMBER)
+
+            print("\tG-{} --> STEP-9 :: PASSING THE FIRST {} OFFSSPRING SOLUTION THE NEXT GENERATION POPULATION.".format(
+                generation_counter, cfg.GENERATIONS_NUMBER))
+            # STEP 9, passing the next first POPULATION_SIZE solutions
+            temp = [index for indexes in fonts for index in indexes]
+            population = [population[p] for p in temp[:cfg.NSGA_POPULATION_SIZE]]
+
+        # STEP 10, check the convergence of the first font, and trace it, and
+        # credit the operators for their childs in it
+        if scheduler is not None:
+            scheduler.credit()
+        font = [p for p in population if p.rank == 1]
+        stagnated = monitor.update(font, generation_counter)
+        if trace is not None:
+            trace.record(generation_counter, font)
+        print("\tG-{} --> STEP-10 :: HYPERVOLUME OF THE FIRST FONT = {}.".format(
+            generation_counter, monitor.history[-1][1]))
+        if stagnated:
+            if monitor.out_of_time():
+                print("TIME LIMIT OF {} SECONDS REACHED, STOPPING.".format(
+                    cfg.TIME_LIMIT))
+            else:
+                print("NO IMPROVEMENT FOR {} GENERATIONS, STOPPING.".format(
+                    cfg.STAGNATION_PATIENCE))
+            break
 
         generation_counter += 1
 
+        # STEP 11, save a checkpoint of the generation
+        if cfg.CHECKPOINT_INTERVAL and (generation_counter - 1) % cfg.CHECKPOINT_INTERVAL == 0:
+            save_checkpoint(cfg.CHECKPOINT_DIRECTORY, generation_counter - 1, {
+                "population": pack_population(population),
+                "hash_values": pack_hash_values(hash_values),
+                "generation_counter": generation_counter,
+                "monitor": monitor.get_state(),
+                "archive": archive.get_state(),
+                "scheduler": scheduler.get_state() if scheduler is not None else None,
+                "steady": steady.get_state() if cfg.STEADY_STATE else None,
+                "progressive": progressive.get_state() if progressive is not None else None,
+                "random_state": random.getstate(),
+            }, key=key)
+
+    if progressive is not None:
+        # The archive is given with the exact scores.
+        progressive.wait()
+        archive.refresh(scores)
+        print("PROGRESSIVE SCORES:: {}".format(progressive))
+    if screening is not None:
+        print("SCREENING:: {}".format(screening))
+    if scheduler is not None:
+        print("OPERATORS:: {}".format(scheduler))
+    if trace is not None:
+        trace.close()
+        print("TRACE:: {}".format(trace))
+    return archive, monitor
+
+
+if __name__ == "__main__":
+    print("USING THE NSGA-II Algorithm.")
+
+    start = time()
+    print("KERNELS :: {}".format(select_backend(KERNEL_BACKEND, SCORE_STORAGE)))
+    # STEP 0, reading fragments from file
+    print("STEP-0 :: READING FRAGMENTS FROM FILE --> {}".format(BECHMARK_FILE))
+    fragments = read_fragments(BECHMARK_FILE)
+
+    # STEP 1, compute pair wise overlap², or reload them from the checkpoints
+    print("STEP-1 :: CALCULATING THE OVERLAP SCORES.")
+    key = scores_key(config)
+    scores = load_scores(CHECKPOINT_DIRECTORY, key) if RESUME else None
+    progressive = None
+    if scores is None and PROGRESSIVE_SCORES and not ORIENTED_SCORES:
+        # Starting on the k-mer scores, or on the scores refined up to the
+        # checkpoint resumed from, refined during the search.
+        checkpoint = latest_checkpoint(CHECKPOINT_DIRECTORY, ("NSGA-II", key)) if RESUME else None
+        progressive = ProgressiveScores(fragments, MATCH_SCORE, MISMATCH_SCORE, GAP_COST,
+                                        PROGRESSIVE_KMER, PROGRESSIVE_WORKERS, PROGRESSIVE_REFRESH,
+                                        exact_min_length=EXACT_OVERLAP_MIN_LENGTH,
+                                        state=load_checkpoint(checkpoint, ("NSGA-II", key)).get("progressive")
+                                        if checkpoint is not None else None)
+        scores = progressive.matrix
+    elif scores is None:
+        scores = compute_scores(fragments, config)
+        if CHECKPOINT_INTERVAL:
+            save_scores(CHECKPOINT_DIRECTORY, key, scores)
+
+    archive, monitor = nsga2_search(scores, len(fragments), progressive=progressive)
+    if progressive is not None:
+        progressive.close()
+        if CHECKPOINT_INTERVAL:
+            save_scores(CHECKPOINT_DIRECTORY, key, scores)
+
     # Gtting the somution
     print("\nSOLUTIONS::\n")
-    # Take only the elemnts of the first fonts i.e rnak=1
-    population = [p for p in population if p.rank == 1]
-
-    # Calculate the number of contigs
-    for p in population:
-        p.contigs_number(scores)
+    # Take the non dominated solutions of the whole run, from the archive
+    population = archive.solutions()
+    print("ARCHIVE SIZE:: {}".format(len(population)))
 
     # Sort population by the number of contigs
     population.sort(key=lambda x: x.contigs)
@@ -109,5 +349,7 @@ if __name__ == "__main__":
     #     print(p)
     #     print("------------")
 
+    print("HYPERVOLUME PER CPU SECOND:: {}".format(
+        monitor.quality_per_cpu_second()))
     print("DONE.\n")
     print("EXECTION TIME:: {} Seconds.".format(round(time() - start)))
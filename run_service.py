@@ -0,0 +1,11 @@
+from config import *
+from use.backends import select_backend
+from use.service import serve
+
+
+if __name__ == "__main__":
+    print("RUNNING THE ASSEMBLY JOB SERVICE.")
+
+    print("KERNELS :: {}".format(select_backend(KERNEL_BACKEND, SCORE_STORAGE)))
+    serve(SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS, SERVICE_QUEUE_SIZE,
+          SERVICE_WARM_INSTANCES, SERVICE_DIRECTORY, SERVICE_JOB_TIMEOUT)
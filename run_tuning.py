@@ -0,0 +1,18 @@
+from time import time
+
+from config import *
+from use.backends import select_backend
+from use.tuning import race
+
+
+if __name__ == "__main__":
+    print("TUNING THE {} Algorithm.".format(TUNING_ALGORITHM))
+
+    start = time()
+    print("KERNELS :: {}".format(select_backend(KERNEL_BACKEND, SCORE_STORAGE)))
+    race(TUNING_ALGORITHM, TUNING_SPACES[TUNING_ALGORITHM], TUNING_INSTANCES, TUNING_SEEDS, TUNING_CANDIDATES,
+         TUNING_TIME_LIMIT, TUNING_FIRST_TEST, TUNING_CONFIDENCE, TUNING_BUDGET, TUNING_WORKERS,
+         TUNING_RESULTS, EXPERIMENT_DIRECTORY)
+
+    print("DONE.\n")
+    print("EXECTION TIME:: {} Seconds.".format(round(time() - start)))
@@ -0,0 +1,558 @@
+import random
+from time import perf_counter
+from bisect import bisect_left
+from typing import List, Tuple, Sequence, Callable, Dict, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from models.ScoreMatrix import ScoreMatrix
+
+
+# The hot functions, evaluate being oaf, odf and contigs at once, and odf_band
+# the part of the odf of the fragments some distances apart, each one has a
+# python kernel, and a numpy and a numba one when the library is installed.
+KERNELS = ("waterman", "oaf", "odf", "odf_band",
+           "contigs", "evaluate", "fronts")
+BACKENDS = ("python", "numpy", "numba")
+
+
+# ------------------------------------------------------------------ python
+
+
+def python_waterman(str_1: Sequence, str_2: Sequence, match_score: float, mismatch_score: float, gap_cost: float) -> float:
+    # The waterman_algorithm, the whole matrix is kept like in the paper.
+    len_1 = len(str_1)
+    len_2 = len(str_2)
+    result = 0.0
+
+    H = [[0.0 for k in range(len_2 + 1)] for l in range(len_1 + 1)]
+    for i in range(len_1 + 1):
+        for j in range(len_2 + 1):
+            if (i == 0) or (j == 0):
+                H[i][j] = 0.0
+            else:
+                match = H[i - 1][j - 1] + \
+                    (match_score if str_1[i - 1] ==
+                     str_2[j - 1] else + mismatch_score)
+                delete = H[i - 1][j] + gap_cost
+                insert = H[i][j - 1] + gap_cost
+                result = H[i][j] = max(match, delete, insert, 0.0)
+
+    return result
+
+
+def python_oaf(genome: List[int], scores) -> float:
+    oaf = 0
+    for i in range(len(genome) - 1):
+        oaf += scores[genome[i]][genome[i + 1]] * 2
+    return oaf
+
+
+def python_odf(genome: List[int], scores) -> float:
+    odf = 0
+    size = len(genome)
+    for i in range(size - 2):
+        # The row is looked up once, and not for each j.
+        row = scores[genome[i]]
+        for j in range(i + 2, size):
+            odf += ((j - i) * row[genome[j]]) * 2
+    return odf
+
+
+def python_odf_band(genome: List[int], scores, low: int, high: int) -> float:
+    # The odf terms of the fragments low to high - 1 positions apart.
+    odf = 0
+    size = len(genome)
+    for distance in range(max(low, 2), min(high, size)):
+        for i in range(size - distance):
+            odf += (distance * scores[genome[i]][genome[i + distance]]) * 2
+    return odf
+
+
+def python_contigs(genome: List[int], scores) -> int:
+    contigs = 1
+    for index in range(len(genome) - 1):
+        if scores[genome[index]][genome[index + 1]] == 0:
+            contigs += 1
+    return contigs
+
+
+def python_evaluate(genome: List[int], scores) -> Tuple[float, float, int]:
+    # The oaf, the odf and the contigs in one pass, each row is looked up once.
+    oaf = 0
+    odf = 0
+    contigs = 1
+    size = len(genome)
+    for i in range(size - 1):
+        row = scores[genome[i]]
+        adjacent = row[genome[i + 1]]
+        oaf += adjacent * 2
+        if adjacent == 0:
+            contigs += 1
+        for j in range(i + 2, size):
+            odf += ((j - i) * row[genome[j]]) * 2
+    return oaf, odf, contigs
+
+
+def _sweep_fronts(order: List[int], odf: Sequence[float]) -> List[List[int]]:
+    # The solutions come by oaf descending, then odf ascending, so all the
+    # solutions dominating one come before it. A solution goes to the first
+    # front with no lower odf, found by a binary search on the lowest odf of
+    # each front, that increases from a front to the next.
+    fronts = list()
+    lowest = list()
+    for k in order:
+        f = bisect_left(lowest, odf[k])
+        if f == len(lowest):
+            lowest.append(odf[k])
+            fronts.append([k])
+        else:
+            lowest[f] = odf[k]
+            fronts[f].append(k)
+
+    for front in fronts:
+        front.sort()
+    return fronts or [[]]
+
+
+def python_fronts(oaf: Sequence[float], odf: Sequence[float]) -> List[List[int]]:
+    order = sorted(range(len(oaf)), key=lambda k: (-oaf[k], odf[k]))
+    return _sweep_fronts(order, odf)
+
+
+# ------------------------------------------------------------------- numpy
+
+
+# The last dense ScoreMatrix viewed as an array, and the odf weights for a genome size.
+_ARRAY_CACHE = [None, None]
+_WEIGHTS_CACHE = dict()
+_BAND_CACHE = dict()
+
+
+def _as_array(scores):
+    # The scores as a 2D array, a dense ScoreMatrix is viewed and not copied,
+    # so the view follows its changes and is kept. A list of lists is copied
+    # at each call, a kept copy would miss the changes made in place, the
+    # runs keep their scores in a ScoreMatrix (SCORE_STORAGE) instead. The
+    # other storages are not supported.
+    if _ARRAY_CACHE[0] is scores:
+        return _ARRAY_CACHE[1]
+    if isinstance(scores, list):
+        return np.asarray(scores, dtype=np.float64)
+    if not isinstance(scores, ScoreMatrix) or scores.storage != "dense":
+        return None
+    matrix = np.frombuffer(scores.values, dtype=np.float32).reshape(
+        scores.size, scores.size)
+    _ARRAY_CACHE[0] = scores
+    _ARRAY_CACHE[1] = matrix
+    return matrix
+
+
+def _odf_weights(size: int):
+    # The distance j - i of the odf terms, 0 for j < i + 2.
+    if size not in _WEIGHTS_CACHE:
+        distance = np.arange(size)[None, :] - np.arange(size)[:, None]
+        _WEIGHTS_CACHE[size] = np.triu(distance, 2).astype(np.float64)
+    return _WEIGHTS_CACHE[size]
+
+
+def _band(size: int, low: int, high: int):
+    # The positions (i, i + distance) of the distances low to high - 1, and the distances.
+    key = (size, low, high)
+    if key not in _BAND_CACHE:
+        distances = np.arange(max(low, 2), min(high, size))
+        counts = size - distances
+        weights = np.repeat(distances, counts).astype(np.float64)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        rows = np.arange(int(counts.sum())) - starts
+        if len(_BAND_CACHE) > 64:
+            _BAND_CACHE.clear()
+        _BAND_CACHE[key] = (rows, rows + np.repeat(distances, counts), weights)
+    return _BAND_CACHE[key]
+
+
+def _as_codes(sequence: Sequence):
+    if isinstance(sequence, (bytes, bytearray, memoryview)):
+        return np.frombuffer(sequence, dtype=np.uint8)
+    return None
+
+
+def numpy_waterman(str_1: Sequence, str_2: Sequence, match_score: float, mismatch_score: float, gap_cost: float) -> float:
+    # Row by row, with a linear gap H[i][j] = max over k <= j of T[k] + gap_cost*(j - k).
+    rows = _as_codes(str_1)
+    columns = _as_codes(str_2)
+    if rows is None or columns is None:
+        return python_waterman(str_1, str_2, match_score, mismatch_score, gap_cost)
+    if len(rows) == 0 or len(columns) == 0:
+        return 0.0
+
+    gaps = gap_cost * np.arange(1, len(columns) + 1)
+    H = np.zeros(len(columns) + 1)
+    for code in rows:
+        substitution = np.where(code == columns, match_score, mismatch_score)
+        T = np.maximum(np.maximum(H[:-1] + substitution, H[1:] + gap_cost), 0.0)
+        H[1:] = np.maximum.accumulate(T - gaps) + gaps
+    return float(H[-1])
+
+
+def numpy_oaf(genome: List[int], scores) -> float:
+    matrix = _as_array(scores)
+    if matrix is None:
+        return python_oaf(genome, scores)
+    genome = np.asarray(genome)
+    return float(matrix[genome[:-1], genome[1:]].sum(dtype=np.float64) * 2)
+
+
+def numpy_odf(genome: List[int], scores) -> float:
+    matrix = _as_array(scores)
+    if matrix is None:
+        return python_odf(genome, scores)
+    genome = np.asarray(genome)
+    pairs = matrix[genome[:, None], genome[None, :]]
+    return float((pairs * _odf_weights(len(genome))).sum() * 2)
+
+
+def numpy_odf_band(genome: List[int], scores, low: int, high: int) -> float:
+    matrix = _as_array(scores)
+    if matrix is None:
+        return python_odf_band(genome, scores, low, high)
+    rows, columns, weights = _band(len(genome), low, high)
+    genome = np.asarray(genome)
+    return float((matrix[genome[rows], genome[columns]] * weights).sum() * 2)
+
+
+def numpy_contigs(genome: List[int], scores) -> int:
+    matrix = _as_array(scores)
+    if matrix is None:
+        return python_contigs(genome, scores)
+    genome = np.asarray(genome)
+    return int(np.count_nonzero(matrix[genome[:-1], genome[1:]] == 0)) + 1
+
+
+def numpy_evaluate(genome: List[int], scores) -> Tuple[float, float, int]:
+    matrix = _as_array(scores)
+    if matrix is None:
+        return python_evaluate(genome, scores)
+    adjacent = matrix[np.asarray(genome[:-1]), np.asarray(genome[1:])]
+    return (float(adjacent.sum(dtype=np.float64) * 2), numpy_odf(genome, scores),
+            int(np.count_nonzero(adjacent == 0)) + 1)
+
+
+def numpy_fronts(oaf: Sequence[float], odf: Sequence[float]) -> List[List[int]]:
+    oaf = np.asarray(oaf, dtype=np.float64)
+    order = np.lexsort((np.asarray(odf, dtype=np.float64), -oaf))
+    return _sweep_fronts(order.tolist(), odf)
+
+
+# ------------------------------------------------------------------- numba
+
+
+if numba is not None and np is not None:
+    @numba.njit(cache=True)
+    def _numba_waterman(rows, columns, match_score, mismatch_score, gap_cost):
+        previous = np.zeros(len(columns) + 1)
+        current = np.zeros(len(columns) + 1)
+        for i in range(len(rows)):
+            current[0] = 0.0
+            for j in range(1, len(columns) + 1):
+                value = previous[j - 1] + \
+                    (match_score if rows[i] == columns[j - 1] else mismatch_score)
+                value = max(value, previous[j] + gap_cost,
+                            current[j - 1] + gap_cost, 0.0)
+                current[j] = value
+            previous, current = current, previous
+        return previous[len(columns)] if len(rows) > 0 else 0.0
+
+    @numba.njit(cache=True)
+    def _numba_oaf(genome, matrix):
+        oaf = 0.0
+        for i in range(len(genome) - 1):
+            oaf += matrix[genome[i], genome[i + 1]] * 2
+        return oaf
+
+    @numba.njit(cache=True)
+    def _numba_odf(genome, matrix):
+        odf = 0.0
+        size = len(genome)
+        for i in range(size - 2):
+            for j in range(i + 2, size):
+                odf += ((j - i) * matrix[genome[i], genome[j]]) * 2
+        return odf
+
+    @numba.njit(cache=True)
+    def _numba_odf_band(genome, matrix, low, high):
+        odf = 0.0
+        size = len(genome)
+        for distance in range(max(low, 2), min(high, size)):
+            for i in range(size - distance):
+                odf += (distance * matrix[genome[i], genome[i + distance]]) * 2
+        return odf
+
+    @numba.njit(cache=True)
+    def _numba_contigs(genome, matrix):
+        contigs = 1
+        for i in range(len(genome) - 1):
+            if matrix[genome[i], genome[i + 1]] == 0:
+                contigs += 1
+        return contigs
+
+    @numba.njit(cache=True)
+    def _numba_evaluate(genome, matrix):
+        oaf = 0.0
+        odf = 0.0
+        contigs = 1
+        size = len(genome)
+        for i in range(size - 1):
+            adjacent = matrix[genome[i], genome[i + 1]]
+            oaf += adjacent * 2
+            if adjacent == 0:
+                contigs += 1
+            for j in range(i + 2, size):
+                odf += ((j - i) * matrix[genome[i], genome[j]]) * 2
+        return oaf, odf, contigs
+
+    @numba.njit(cache=True)
+    def _numba_ranks(oaf, odf):
+        order = np.lexsort((odf, -oaf))
+        ranks = np.zeros(len(oaf), dtype=np.int64)
+        lowest = np.empty(len(oaf))
+        count = 0
+        for k in order:
+            f = np.searchsorted(lowest[:count], odf[k])
+            if f == count:
+                count += 1
+            lowest[f] = odf[k]
+            ranks[k] = f
+        return ranks, count
+
+    def numba_waterman(str_1: Sequence, str_2: Sequence, match_score: float, mismatch_score: float, gap_cost: float) -> float:
+        rows = _as_codes(str_1)
+        columns = _as_codes(str_2)
+        if rows is None or columns is None:
+            return python_waterman(str_1, str_2, match_score, mismatch_score, gap_cost)
+        return float(_numba_waterman(rows, columns, float(match_score), float(mismatch_score), float(gap_cost)))
+
+    def numba_oaf(genome: List[int], scores) -> float:
+        matrix = _as_array(scores)
+        if matrix is None:
+            return python_oaf(genome, scores)
+        return float(_numba_oaf(np.asarray(genome, dtype=np.int64), matrix))
+
+    def numba_odf(genome: List[int], scores) -> float:
+        matrix = _as_array(scores)
+        if matrix is None:
+            return python_odf(genome, scores)
+        return float(_numba_odf(np.asarray(genome, dtype=np.int64), matrix))
+
+    def numba_odf_band(genome: List[int], scores, low: int, high: int) -> float:
+        matrix = _as_array(scores)
+        if matrix is None:
+            return python_odf_band(genome, scores, low, high)
+        return float(_numba_odf_band(np.asarray(genome, dtype=np.int64), matrix, low, high))
+
+    def numba_contigs(genome: List[int], scores) -> int:
+        matrix = _as_array(scores)
+        if matrix is None:
+            return python_contigs(genome, scores)
+        return int(_numba_contigs(np.asarray(genome, dtype=np.int64), matrix))
+
+    def numba_evaluate(genome: List[int], scores) -> Tuple[float, float, int]:
+        matrix = _as_array(scores)
+        if matrix is None:
+            return python_evaluate(genome, scores)
+        oaf, odf, contigs = _numba_evaluate(
+            np.asarray(genome, dtype=np.int64), matrix)
+        return float(oaf), float(odf), int(contigs)
+
+    def numba_fronts(oaf: Sequence[float], odf: Sequence[float]) -> List[List[int]]:
+        ranks, count = _numba_ranks(np.asarray(oaf, dtype=np.float64),
+                                    np.asarray(odf, dtype=np.float64))
+        fronts = [[] for _ in range(count)]
+        for k, f in enumerate(ranks.tolist()):
+            fronts[f].append(k)
+        return fronts or [[]]
+
+
+def available_backends() -> List[str]:
+    """This function lists the backends that can run here, the numpy
+    backend needs NumPy, and the numba one needs both NumPy and Numba.
+
+    ...
+
+    Returns
+    -------
+    list
+        The names of the available backends.
+    """
+    backends = ["python"]
+    if np is not None:
+        backends.append("numpy")
+        if numba is not None:
+            backends.append("numba")
+    return backends
+
+
+def backend_functions(backend: str) -> Dict[str, Callable]:
+    """This function returns the kernels of a backend.
+
+    ...
+
+    Parameters
+    ----------
+    backend: str
+        The backend, python, numpy or numba.
+
+    Returns
+    -------
+    dict
+        A dict {kernel name: function}.
+    """
+    if backend not in available_backends():
+        raise ValueError("The backend {} is not available, expected one of {}.".format(
+            backend, available_backends()))
+    return {kernel: globals()["{}_{}".format(backend, kernel)] for kernel in KERNELS}
+
+
+class Kernels:
+    """This is a Kernels class, the functions chosen for the hot kernels,
+    read as kernels.waterman, kernels.oaf, kernels.odf, kernels.odf_band,
+    kernels.contigs, kernels.evaluate and kernels.fronts, each one may come
+    from another backend.
+    All the backends return the same values, up to the float rounding, and
+    the same fronts, each one sorted by index.
+
+    ...
+
+    Attributes
+    ----------
+    names: dict
+        The backend of each kernel.
+    timings: dict
+        The micro-benchmark seconds of each kernel and backend, if measured.
+    """
+
+    def __init__(self, names: Dict[str, str], timings: Dict[str, Dict[str, float]] = None):
+        self.names = dict(names)
+        self.timings = timings or dict()
+        for kernel, backend in self.names.items():
+            setattr(self, kernel, backend_functions(backend)[kernel])
+
+    def __str__(self):
+        return ", ".join("{}: {}".format(kernel, self.names[kernel]) for kernel in KERNELS)
+
+
+def _benchmark_inputs(storage: str = "dense") -> Dict[str, tuple]:
+    # A small instance, the same for all the backends, its scores stored as
+    # the run stores them, a list of lists for None.
+    generator = random.Random(0)
+    size = 150
+    str_1 = bytes(generator.randrange(4) for _ in range(size))
+    str_2 = bytes(generator.randrange(4) for _ in range(size))
+    scores = ScoreMatrix(size)
+    for i in range(size - 1):
+        for j in range(i + 1, size):
+            scores.set(i, j, generator.choice((0.0, generator.random() * 50)))
+    if storage is None:
+        scores = scores.tolist()
+    elif storage != "dense":
+        scores = ScoreMatrix.from_scores(scores, storage)
+    genome = list(range(size))
+    generator.shuffle(genome)
+    oaf = [float(generator.randrange(50)) for _ in range(2 * size)]
+    odf = [float(generator.randrange(50)) for _ in range(2 * size)]
+    return {
+        "waterman": (str_1, str_2, 1, -1, -1.33),
+        "oaf": (genome, scores),
+        "odf": (genome, scores),
+        "odf_band": (genome, scores, 2, size),
+        "contigs": (genome, scores),
+        "evaluate": (genome, scores),
+        "fronts": (oaf, odf),
+    }
+
+
+def _time(function: Callable, arguments: tuple, repeat: int = 3) -> float:
+    # The best of a few calls, after one call that also compiles the numba kernels.
+    function(*arguments)
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        function(*arguments)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+_SELECTED = None
+
+
+def select_backend(backend: Union[str, Dict[str, str]] = "auto", storage: str = "dense") -> Kernels:
+    """This function chooses the kernels used from now on, either all of one
+    backend, or with auto, for each kernel the fastest available backend,
+    by a short micro-benchmark, e.g numpy or numba on CPython and python on PyPy.
+    The micro-benchmark reads the scores in the storage of the run, since
+    the numpy and numba kernels only read a dense ScoreMatrix in place, and
+    copy a list of lists at each call, far slower than the python kernels.
+    The backend of each kernel may also be given, e.g the names chosen by
+    another process, so both compute with the same functions.
+
+    ...
+
+    Parameters
+    ----------
+    backend: str or dict, optional
+        auto, python, numpy or numba, or a dict {kernel name: backend}.
+    storage: str, optional
+        The storage of the scores of the run, see SCORE_STORAGE, None for a
+        list of lists, used by auto.
+
+    Returns
+    -------
+    Kernels
+        The chosen kernels.
+    """
+    global _SELECTED
+
+    if isinstance(backend, dict):
+        _SELECTED = Kernels({kernel: backend.get(kernel, "python")
+                             for kernel in KERNELS})
+        return _SELECTED
+    if backend != "auto":
+        backend_functions(backend)
+        _SELECTED = Kernels({kernel: backend for kernel in KERNELS})
+        return _SELECTED
+
+    inputs = _benchmark_inputs(storage)
+    timings = {kernel: dict() for kernel in KERNELS}
+    names = dict()
+    for kernel in KERNELS:
+        for name in available_backends():
+            timings[kernel][name] = _time(
+                backend_functions(name)[kernel], inputs[kernel])
+        names[kernel] = min(timings[kernel], key=timings[kernel].get)
+
+    _SELECTED = Kernels(names, timings)
+    return _SELECTED
+
+
+def kernels() -> Kernels:
+    """This function returns the chosen kernels, chosen with auto the first
+    time if select_backend was not called before.
+
+    ...
+
+    Returns
+    -------
+    Kernels
+        The chosen kernels.
+    """
+    if _SELECTED is None:
+        return select_backend("auto")
+    return _SELECTED
@@ -0,0 +1,205 @@
+import sys
+from array import array
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+from models.Solution import Solution
+
+
+class EvaluationCache:
+    """This is an EvaluationCache class, a least recently used cache of the
+    evaluated solutions, keyed by their lexicographic position for the MOBA,
+    or by their genome for the NSGA-II, so a solution visited again is not
+    built and evaluated again.
+    The genomes are stored as arrays of int, and the cache is bounded by an
+    estimate of its memory, the least recently used solutions are removed first.
+
+    ...
+
+    Attributes
+    ----------
+    memory_limit: int
+        The maximum memory of the cache, in bytes.
+    memory: int
+        The estimated memory of the cache, in bytes.
+    hits: int
+        The number of lookups that found a solution.
+    misses: int
+        The number of lookups that didn't.
+    evictions: int
+        The number of solutions removed to keep the memory under the limit.
+
+    Methods
+    -------
+    __init__(memory_limit): None
+        The constructor.
+    solution(key, generation=-1, genome=None): Solution
+        The cached solution of a key, or None.
+    store(key, solution): None
+        Caches an evaluated solution.
+    evaluate(solution, scores): bool
+        Evaluates a solution, from the cache if its genome is there.
+    hit_rate: float
+        The part of the lookups that found a solution.
+    clear: None
+        Removes all the solutions, e.g after the scores changed.
+    """
+
+    # The dict slot, the entry tuple and the objectives of a solution, in bytes.
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, memory_limit: int):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        memory_limit: int
+            The maximum memory of the cache, in bytes.
+
+        Returns
+        -------
+        None
+        """
+        self.memory_limit = memory_limit
+        self.memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key --> (genome, oaf, odf, contigs, size), the least recently used first.
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def solution(self, key: Hashable, generation: int = -1, genome: List[int] = None) -> Optional[Solution]:
+        """This function returns a new solution with the cached genome and
+        objectives of a key, or None if the key is not cached.
+
+        ...
+
+        Parameters
+        ----------
+        key: hashable
+            The position, or the hash value of the genome.
+        generation: int, optional
+            The generation of the returned solution.
+        genome: list, optional
+            The genome expected, a cached solution with another genome under
+            the same hash value is not returned.
+
+        Returns
+        -------
+        Solution
+            The solution, or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or (genome is not None and entry[0] != array(entry[0].typecode, genome)):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        sol = Solution(entry[0].tolist(), generation=generation)
+        sol.oaf, sol.odf, sol.contigs = entry[1], entry[2], entry[3]
+        if entry[5] is not None:
+            sol.orientations = [bool(o) for o in entry[5]]
+        return sol
+
+    def store(self, key: Hashable, solution: Solution) -> None:
+        """This function caches an evaluated solution, and removes the least
+        recently used ones while the memory is above the limit.
+
+        ...
+
+        Parameters
+        ----------
+        key: hashable
+            The position, or the hash value of the genome.
+        solution: Solution
+            The evaluated solution.
+
+        Returns
+        -------
+        None
+        """
+        if key in self._entries:
+            return
+        genome = array("H" if len(solution.genome) <= 0xFFFF else "I",
+                       solution.genome)
+        size = sys.getsizeof(genome) + sys.getsizeof(key) + \
+            self.ENTRY_OVERHEAD
+        if size > self.memory_limit:
+            return
+
+        # The orientations, with OrientedScores, one byte per fragment.
+        orientations = bytes(solution.orientations) if solution.orientations is not None else None
+        if orientations is not None:
+            size += sys.getsizeof(orientations)
+        self._entries[key] = (genome, solution.oaf,
+                              solution.odf, solution.contigs, size, orientations)
+        self.memory += size
+        while self.memory > self.memory_limit:
+            _, entry = self._entries.popitem(last=False)
+            self.memory -= entry[4]
+            self.evictions += 1
+
+    def evaluate(self, solution: Solution, scores: List[List[float]]) -> bool:
+        """This function sets the objectives of a solution, from the cache if
+        its genome was evaluated already, else it evaluates and caches it.
+
+        ...
+
+        Parameters
+        ----------
+        solution: Solution
+            The solution.
+        scores: list
+            A list of list(matrix) of float, or a ScoreMatrix.
+
+        Returns
+        -------
+        bool
+            True if the objectives came from the cache.
+        """
+        key = hash(tuple(solution.genome))
+        cached = self.solution(key, genome=solution.genome)
+        if cached is not None:
+            solution.oaf, solution.odf, solution.contigs = cached.oaf, cached.odf, cached.contigs
+            solution.orientations = cached.orientations
+            return True
+        solution.evaluate(scores)
+        self.store(key, solution)
+        return False
+
+    def clear(self) -> None:
+        """This function removes all the cached solutions, their objectives
+        being wrong once the scores changed.
+
+        ...
+
+        Returns
+        -------
+        None
+        """
+        self._entries.clear()
+        self.memory = 0
+
+    def hit_rate(self) -> float:
+        """This function returns the part of the lookups that found a solution.
+
+        ...
+
+        Returns
+        -------
+        float
+            The hit rate, 0 before any lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return "{} HITS OF {} LOOKUPS ({:.1%}), {} SOLUTIONS, {:.1f} MB, {} EVICTED".format(
+            self.hits, self.hits + self.misses, self.hit_rate(), len(self._entries),
+            self.memory / 2**20, self.evictions)
@@ -0,0 +1,354 @@
+import os
+import pickle
+import zlib
+from array import array
+from typing import List, Set, Optional, Union
+
+from models.Solution import Solution
+from models.ScoreMatrix import ScoreMatrix
+
+
+# Every checkpoint file starts with this, to reject unrelated files.
+MAGIC = b"PYBOFAA1"
+
+
+def _write(path: str, payload: dict) -> None:
+    """This function writes a payload as a compressed binary file, the file
+    is written aside then renamed, so a killed run never leaves a half
+    written checkpoint behind.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The file's full path.
+    payload: dict
+        The data to write.
+
+    Returns
+    -------
+    None
+    """
+    temp = path + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(MAGIC)
+        file.write(zlib.compress(pickle.dumps(
+            payload, pickle.HIGHEST_PROTOCOL)))
+    os.replace(temp, path)
+
+
+def _read(path: str) -> dict:
+    """This function reads a payload written by _write.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The file's full path.
+
+    Returns
+    -------
+    dict
+        The data read.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a checkpoint file.".format(path))
+        return pickle.loads(zlib.decompress(file.read()))
+
+
+def pack_population(population: List[Solution]) -> dict:
+    """This function packs a list of solutions into flat arrays, all the
+    genomes are stored one after another, in the smallest integer type.
+
+    ...
+
+    Parameters
+    ----------
+    population: list
+        A list of solutions.
+
+    Returns
+    -------
+    dict
+        The packed population.
+    """
+    genome_size = population[0].genome_size if population else 0
+    typecode = "H" if genome_size <= 0xFFFF else "I"
+    genomes = array(typecode)
+    for sol in population:
+        genomes.extend(sol.genome)
+    # The orientations, with OrientedScores, one byte per fragment.
+    oriented = any(sol.orientations is not None for sol in population)
+    orientations = bytes(o for sol in population for o in sol.orientations or [True] * genome_size) if oriented else None
+
+    return {
+        "genome_size": genome_size,
+        "genomes": genomes,
+        "oaf": array("d", [sol.oaf for sol in population]),
+        "odf": array("d", [sol.odf for sol in population]),
+        "contigs": array("l", [sol.contigs for sol in population]),
+        "rank": array("l", [sol.rank for sol in population]),
+        "crowding_distance": array("d", [sol.crowding_distance for sol in population]),
+        "generation": array("l", [sol.generation for sol in population]),
+        "orientations": orientations,
+    }
+
+
+def unpack_population(packed: dict) -> List[Solution]:
+    """This function rebuilds the list of solutions packed by pack_population.
+
+    ...
+
+    Parameters
+    ----------
+    packed: dict
+        The packed population.
+
+    Returns
+    -------
+    list
+        A list of solutions.
+    """
+    size = packed["genome_size"]
+    genomes = packed["genomes"]
+    population = list()
+    for index in range(len(packed["oaf"])):
+        sol = Solution(genomes[index * size:(index + 1) * size].tolist(),
+                       generation=packed["generation"][index])
+        sol.oaf = packed["oaf"][index]
+        sol.odf = packed["odf"][index]
+        sol.contigs = packed["contigs"][index]
+        sol.rank = packed["rank"][index]
+        sol.crowding_distance = packed["crowding_distance"][index]
+        if packed.get("orientations") is not None:
+            sol.orientations = [bool(o) for o in packed["orientations"][index * size:(index + 1) * size]]
+        population.append(sol)
+
+    return population
+
+
+def pack_hash_values(hash_values: Set[int]) -> array:
+    """This function packs the set of the solutions hash values, used to
+    avoid the redundancy, as an array of 64 bits integers.
+
+    ...
+
+    Parameters
+    ----------
+    hash_values: set
+        A set of int.
+
+    Returns
+    -------
+    array
+        The packed hash values.
+    """
+    return array("q", hash_values)
+
+
+def _prefix(key: tuple) -> str:
+    # The checkpoints of a key are named after it, so the runs of another
+    # algorithm or benchmark in the same directory never remove them.
+    if key is None:
+        return "checkpoint_"
+    return "checkpoint_{:08x}_".format(zlib.crc32(repr(key).encode()))
+
+
+def scores_file(key: tuple) -> str:
+    """This function returns the name of the scores file of a key, so the
+    scores of other benchmarks or scoring values, saved in the same
+    directory, never replace them.
+
+    ...
+
+    Parameters
+    ----------
+    key: tuple
+        What the scores were computed from.
+
+    Returns
+    -------
+    str
+        The file name.
+    """
+    return "scores_{:08x}.bin".format(zlib.crc32(repr(key).encode()))
+
+
+def save_checkpoint(directory: str, generation: int, state: dict, keep: int = 2, key: tuple = None) -> str:
+    """This function saves the state of a run at a given generation, and
+    removes the older checkpoints of the same key, only the last keep ones
+    are kept.
+
+    ...
+
+    Parameters
+    ----------
+    directory: str
+        The checkpoints directory.
+    generation: int
+        The generation the state belongs to.
+    state: dict
+        The state of the run, as returned by the algorithm.
+    keep: int, optional
+        The number of checkpoints to keep.
+    key: tuple, optional
+        What the run is (the algorithm, and the key of its scores), saved
+        with the state, to never resume another run.
+
+    Returns
+    -------
+    str
+        The path of the checkpoint written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "{}{:08d}.bin".format(_prefix(key), generation))
+    _write(path, dict(state, key=key))
+
+    for old in list_checkpoints(directory, key)[:-keep]:
+        os.remove(old)
+
+    return path
+
+
+def list_checkpoints(directory: str, key: tuple = None) -> List[str]:
+    """This function lists the checkpoints of a key in a directory, from the
+    oldest to the latest one.
+
+    ...
+
+    Parameters
+    ----------
+    directory: str
+        The checkpoints directory.
+    key: tuple, optional
+        What the run is, as given to save_checkpoint.
+
+    Returns
+    -------
+    list
+        A list of the checkpoints paths.
+    """
+    if not os.path.isdir(directory):
+        return list()
+    prefix = _prefix(key)
+    names = sorted(name for name in os.listdir(directory)
+                   if name.startswith(prefix) and name.endswith(".bin")
+                   and name[len(prefix):-len(".bin")].isdigit())
+    return [os.path.join(directory, name) for name in names]
+
+
+def latest_checkpoint(directory: str, key: tuple = None) -> Optional[str]:
+    """This function returns the path of the latest checkpoint of a key in a
+    directory, or None if there is no checkpoint.
+
+    ...
+
+    Parameters
+    ----------
+    directory: str
+        The checkpoints directory.
+    key: tuple, optional
+        What the run is, as given to save_checkpoint.
+
+    Returns
+    -------
+    str
+        The latest checkpoint path, or None.
+    """
+    checkpoints = list_checkpoints(directory, key)
+    return checkpoints[-1] if checkpoints else None
+
+
+def load_checkpoint(path: str, key: tuple = None) -> dict:
+    """This function loads a state saved by save_checkpoint, and refuses the
+    state of another run.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The checkpoint path.
+    key: tuple, optional
+        What the run is, as given to save_checkpoint.
+
+    Returns
+    -------
+    dict
+        The state of the run.
+    """
+    state = _read(path)
+    if state.get("key") != key:
+        raise ValueError("{} is the checkpoint of another run, {}, not {}.".format(
+            path, state.get("key"), key))
+    return state
+
+
+def save_scores(directory: str, key: tuple, scores: Union[List[List[float]], ScoreMatrix]) -> None:
+    """This function saves the overlap scores matrix aside the checkpoints,
+    in the file of its key (see scores_file), since it doesn't change during
+    the run, it's written only once. The scores being refined by
+    use.progressive are saved with the checkpoints instead.
+
+    ...
+
+    Parameters
+    ----------
+    directory: str
+        The checkpoints directory.
+    key: tuple
+        What the scores were computed from (the file, and the scoring values),
+        to never load the scores of another benchmark.
+    scores: list
+        A list of lists(matrix) of float, that contains the overlaping scores,
+        or a ScoreMatrix, saved as it is.
+
+    Returns
+    -------
+    None
+    """
+    os.makedirs(directory, exist_ok=True)
+    if isinstance(scores, ScoreMatrix):
+        payload = {"key": key, "matrix": scores}
+    else:
+        values = array("d")
+        for row in scores:
+            values.extend(row)
+        payload = {"key": key, "size": len(scores), "values": values}
+    _write(os.path.join(directory, scores_file(key)), payload)
+
+
+def load_scores(directory: str, key: tuple) -> Optional[Union[List[List[float]], ScoreMatrix]]:
+    """This function loads the overlap scores matrix saved by save_scores.
+
+    ...
+
+    Parameters
+    ----------
+    directory: str
+        The checkpoints directory.
+    key: tuple
+        What the scores were computed from.
+
+    Returns
+    -------
+    list
+        A list of lists(matrix) of float, or a ScoreMatrix, as they were saved,
+        or None if there are no scores saved for this key.
+    """
+    path = os.path.join(directory, scores_file(key))
+    if not os.path.isfile(path):
+        return None
+
+    data = _read(path)
+    if data["key"] != key:
+        return None
+    if "matrix" in data:
+        return data["matrix"]
+
+    size = data["size"]
+    values = data["values"]
+    return [values[i * size:(i + 1) * size].tolist() for i in range(size)]
@@ -0,0 +1,462 @@
+import json
+import socket
+import struct
+import threading
+from array import array
+from time import time
+from typing import List, Tuple, Optional
+from multiprocessing import Process
+
+from models.Fragment import Fragment
+from models.ScoreMatrix import ScoreMatrix
+from use.tiled_scoring import TiledJob, compute_tile
+
+
+# Every message is its header length, its payload length, a JSON header, then the payload.
+FRAME = struct.Struct("!II")
+
+
+def send_message(connection: socket.socket, header: dict, payload: bytes = b"") -> None:
+    """This function sends a message of the work queue protocol.
+
+    ...
+
+    Parameters
+    ----------
+    connection: socket
+        The connected socket.
+    header: dict
+        The message header, sent as JSON.
+    payload: bytes, optional
+        The binary data following the header.
+
+    Returns
+    -------
+    None
+    """
+    data = json.dumps(header).encode("utf-8")
+    connection.sendall(FRAME.pack(len(data), len(payload)) + data + payload)
+
+
+def _receive_exactly(connection: socket.socket, length: int) -> bytes:
+    # Reads length bytes, or raises ConnectionError if the peer is gone.
+    chunks = list()
+    while length:
+        chunk = connection.recv(min(length, 1 << 20))
+        if not chunk:
+            raise ConnectionError("The connection was closed.")
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b"".join(chunks)
+
+
+def receive_message(connection: socket.socket) -> Tuple[dict, bytes]:
+    """This function receives a message sent by send_message.
+
+    ...
+
+    Parameters
+    ----------
+    connection: socket
+        The connected socket.
+
+    Returns
+    -------
+    dict
+        The message header.
+    bytes
+        The message payload.
+    """
+    header_length, payload_length = FRAME.unpack(
+        _receive_exactly(connection, FRAME.size))
+    header = json.loads(_receive_exactly(
+        connection, header_length).decode("utf-8"))
+    return header, _receive_exactly(connection, payload_length)
+
+
+class Coordinator:
+    """This is a Coordinator class that hands the tiles of a TiledJob to
+    the workers over TCP, and writes the scores they send back.
+    A worker first gets the fragments and the scores, then asks for a tile,
+    computes it, sends its scores as float32, and asks for another one.
+    A tile given to a worker that disconnects, or doesn't answer within
+    the lease time, goes back to the queue, so another worker computes it.
+    A result whose pairs are not the ones of its tile is refused, and the
+    worker disconnected.
+
+    The protocol messages (JSON headers):
+    worker -> {"type": "hello"}
+    coordinator -> {"type": "job", "match", "mismatch", "gap", "tile_size", "lengths"} + the sequences codes
+    worker -> {"type": "next"}
+    coordinator -> {"type": "tile", "tile", "block_i", "block_j"}, {"type": "wait"} or {"type": "done"}
+    worker -> {"type": "result", "tile", "count"} + count (i, j) uint32 pairs, then count float32 scores
+
+    ...
+
+    Attributes
+    ----------
+    job: TiledJob
+        The job whose tiles are computed.
+    address: tuple
+        The (host, port) the coordinator listens on.
+    lease: float
+        The seconds a worker has to send a tile back.
+    retries: int
+        The number of tiles handed again after a worker was lost.
+    idle: float
+        The seconds without any worker connected, once the local worker
+        processes exited, after which serve gives up.
+
+    Methods
+    -------
+    __init__(job, fragments, match_score, mismatch_score, gap_cost, host="127.0.0.1", port=0, lease=600, idle=60): None
+        The constructor, starts listening.
+    serve(processes=None): ScoreMatrix
+        Hands the tiles untill they are all finished.
+    """
+
+    def __init__(self, job: TiledJob, fragments: List[Fragment], match_score: float, mismatch_score: float, gap_cost: float, host: str = "127.0.0.1", port: int = 0, lease: float = 600, idle: float = 60):
+        """The constructor, the socket is listening once it returns.
+
+        ...
+
+        Parameters
+        ----------
+        job: TiledJob
+            The job whose tiles are computed.
+        fragments: list
+            A list of fragments.
+        match_score: int
+            A positive int, we add in case to caracters match.
+        mismatch_score: int
+            A negative int, we add in case to caracters don't match.
+        gap_cost: int
+            A negative int, for the gap.
+        host: str, optional
+            The interface to listen on.
+        port: int, optional
+            The port to listen on, 0 for any free port.
+        lease: float, optional
+            The seconds a worker has to send a tile back.
+        idle: float, optional
+            The seconds without any worker connected, once the local worker
+            processes exited, after which serve gives up.
+
+        Returns
+        -------
+        None
+        """
+        self.job = job
+        self.lease = lease
+        self.idle = idle
+        self.retries = 0
+
+        self._job_header = {
+            "type": "job",
+            "match": match_score,
+            "mismatch": mismatch_score,
+            "gap": gap_cost,
+            "tile_size": job.tile_size,
+            "lengths": [frag.packed.length for frag in fragments],
+        }
+        # The codes of the sequences, one after another.
+        self._job_payload = b"".join(frag.packed.codes() for frag in fragments)
+
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._queue = job.pending()
+        # The blocks of each tile, to check the results.
+        self._blocks = {tile: blocks for tile, *blocks in self._queue}
+        # The tiles handed to a worker, with their lease end.
+        self._leased = dict()
+        # The workers connected, and since when none is, if none is.
+        self._connected = 0
+        self._alone_since = time()
+        if not self._queue:
+            self._finished.set()
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        self.address = self._server.getsockname()
+
+    def _next_tile(self) -> Optional[tuple]:
+        # The next tile to hand, the expired leases go back first.
+        with self._lock:
+            now = time()
+            for tile, (expiry, blocks) in list(self._leased.items()):
+                if expiry < now:
+                    del self._leased[tile]
+                    self._queue.append((tile,) + blocks)
+                    self.retries += 1
+            if not self._queue:
+                return None
+            tile = self._queue.pop(0)
+            self._leased[tile[0]] = (now + self.lease, tile[1:])
+            return tile
+
+    def _release(self, tiles: set) -> None:
+        # A lost worker's tiles go back to the queue.
+        with self._lock:
+            for tile in tiles:
+                if tile in self._leased:
+                    _, blocks = self._leased.pop(tile)
+                    self._queue.insert(0, (tile,) + blocks)
+                    self.retries += 1
+
+    def _pairs(self, tile: int, count: int, pairs: array) -> None:
+        # Checks that the pairs of a result are the pairs i < j of its tile,
+        # each one once, as compute_tile gives them.
+        if tile not in self._blocks:
+            raise ValueError("The tile {} is not a tile of the job.".format(tile))
+        block_i, block_j = self._blocks[tile]
+        size, tile_size = self.job.size, self.job.tile_size
+        rows = range(block_i * tile_size, min((block_i + 1) * tile_size, size))
+        expected = sum(max(min((block_j + 1) * tile_size, size) - max(block_j * tile_size, i + 1), 0)
+                       for i in rows)
+        if count != expected or len(pairs) != 2 * count:
+            raise ValueError("The tile {} has {} pairs, not {}.".format(tile, expected, count))
+        columns = range(block_j * tile_size, min((block_j + 1) * tile_size, size))
+        seen = set()
+        for k in range(count):
+            i, j = pairs[2 * k], pairs[2 * k + 1]
+            if i not in rows or j not in columns or j <= i or (i, j) in seen:
+                raise ValueError("The pair ({}, {}) is not a pair of the tile {}.".format(i, j, tile))
+            seen.add((i, j))
+
+    def _handle(self, connection: socket.socket) -> None:
+        # Talks with one worker, untill it leaves or the job is finished.
+        held = set()
+        with self._lock:
+            self._connected += 1
+        try:
+            while True:
+                header, payload = receive_message(connection)
+                if header["type"] == "hello":
+                    send_message(connection, self._job_header,
+                                 self._job_payload)
+                elif header["type"] == "next":
+                    if self._finished.is_set():
+                        send_message(connection, {"type": "done"})
+                        return
+                    tile = self._next_tile()
+                    if tile is None:
+                        send_message(connection, {"type": "wait"})
+                    else:
+                        held.add(tile[0])
+                        send_message(connection, {
+                                     "type": "tile", "tile": tile[0], "block_i": tile[1], "block_j": tile[2]})
+                elif header["type"] == "result":
+                    count = header["count"]
+                    if not isinstance(count, int) or count < 0 or len(payload) != 12 * count:
+                        raise ValueError("The result of the tile has a wrong payload.")
+                    pairs = array("I")
+                    pairs.frombytes(payload[:8 * count])
+                    values = array("f")
+                    values.frombytes(payload[8 * count:])
+                    if pairs.itemsize != 4:
+                        raise ValueError("Unsupported platform.")
+                    if not _is_little_endian():
+                        pairs.byteswap()
+                        values.byteswap()
+                    self._pairs(header["tile"], count, pairs)
+                    self._finish(header["tile"], [(pairs[2 * k], pairs[2 * k + 1], values[k])
+                                                  for k in range(count)])
+                    held.discard(header["tile"])
+        except (ConnectionError, OSError, ValueError, KeyError, TypeError):
+            pass
+        finally:
+            self._release(held)
+            connection.close()
+            with self._lock:
+                self._connected -= 1
+                if not self._connected:
+                    self._alone_since = time()
+
+    def _finish(self, tile: int, results: List[Tuple[int, int, float]]) -> None:
+        # Writes a tile once, even if it was computed twice after a retry.
+        with self._lock:
+            if tile in self.job.done:
+                return
+            self._leased.pop(tile, None)
+            self._queue = [t for t in self._queue if t[0] != tile]
+            self.job.write_tile(tile, results)
+            if not self._queue and not self._leased:
+                self._finished.set()
+
+    def _accept(self) -> None:
+        # Accepts the workers, one thread for each.
+        while not self._finished.is_set():
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(
+                connection,), daemon=True).start()
+
+    def serve(self, processes: List[Process] = None) -> ScoreMatrix:
+        """This function hands the tiles to the workers untill all of them
+        are finished, then closes the socket. Without local worker
+        processes, it waits for the remote workers as long as it takes.
+
+        ...
+
+        Parameters
+        ----------
+        processes: list, optional
+            The local worker processes, once they all exited, and no worker
+            was connected for idle seconds, the job can't finish.
+
+        Returns
+        -------
+        ScoreMatrix
+            The scores matrix of the job.
+
+        Raises
+        ------
+        RuntimeError
+            If the local workers exited, and no worker is left.
+        """
+        threading.Thread(target=self._accept, daemon=True).start()
+        while not self._finished.wait(1.0):
+            # Gives back the expired leases, even if no worker asks.
+            with self._lock:
+                expired = [tile for tile, (expiry, _) in self._leased.items()
+                           if expiry < time()]
+                alone = time() - self._alone_since if not self._connected else 0.0
+            self._release(set(expired))
+            if processes and alone > self.idle and not any(process.is_alive() for process in processes):
+                self._server.close()
+                raise RuntimeError("The local workers exited (exit codes {}), and no worker was connected for {} seconds, {} tiles left.".format(
+                    [process.exitcode for process in processes], self.idle, len(self._queue) + len(self._leased)))
+        self._server.close()
+        return self.job.matrix()
+
+
+def _is_little_endian() -> bool:
+    return struct.pack("=I", 1) == struct.pack("<I", 1)
+
+
+def run_worker(host: str, port: int, wait: float = 0.5) -> int:
+    """This function runs a worker: it connects to a coordinator, computes
+    the tiles it's given with waterman_algorithm, and sends the scores back,
+    untill the job is finished.
+
+    ...
+
+    Parameters
+    ----------
+    host: str
+        The coordinator's host.
+    port: int
+        The coordinator's port.
+    wait: float, optional
+        The seconds to wait when all the tiles are leased to other workers.
+
+    Returns
+    -------
+    int
+        The number of tiles computed.
+    """
+    computed = 0
+    with socket.create_connection((host, port)) as connection:
+        send_message(connection, {"type": "hello"})
+        job, payload = receive_message(connection)
+
+        codes = list()
+        start = 0
+        for length in job["lengths"]:
+            codes.append(payload[start:start + length])
+            start += length
+
+        while True:
+            send_message(connection, {"type": "next"})
+            header, _ = receive_message(connection)
+            if header["type"] == "done":
+                return computed
+            if header["type"] == "wait":
+                threading.Event().wait(wait)
+                continue
+
+            results = compute_tile(codes, header["block_i"], header["block_j"],
+                                   job["tile_size"], job["match"], job["mismatch"], job["gap"])
+            pairs = array("I")
+            values = array("f")
+            for i, j, score in results:
+                pairs.append(i)
+                pairs.append(j)
+                values.append(score)
+            if not _is_little_endian():
+                pairs.byteswap()
+                values.byteswap()
+            send_message(connection, {"type": "result", "tile": header["tile"], "count": len(results)},
+                         pairs.tobytes() + values.tobytes())
+            computed += 1
+
+
+def _worker_process(host: str, port: int) -> None:
+    # A local worker process, the coordinator may be gone already.
+    try:
+        run_worker(host, port)
+    except (ConnectionError, OSError):
+        pass
+
+
+def distributed_overlap_scores(fragments: List[Fragment], match_score: int, mismatch_score: int, gap_cost: int, path: str, tile_size: int = 64, local_workers: int = 0, host: str = "127.0.0.1", port: int = 0) -> ScoreMatrix:
+    """This function calculates the overlap scores matrix as a distributed
+    TiledJob: a coordinator hands the tiles to the workers connected to it,
+    from this machine or from any other one running run_worker.
+    Like tiled_overlap_scores, an interrupted job continues from the last
+    finished tile.
+
+    ...
+
+    Parameters
+    ----------
+    fragments: list
+        A list of fragments.
+    match_score: int
+        A positive int, we add in case to caracters match.
+    mismatch_score: int
+        A negative int, we add in case to caracters don't match.
+    gap_cost: int
+        A negative int, for the gap.
+    path: str
+        The result file's full path.
+    tile_size: int, optional
+        The number of rows, and columns, of a tile.
+    local_workers: int, optional
+        The number of worker processes started on this machine.
+    host: str, optional
+        The interface the coordinator listens on, 0.0.0.0 for remote workers.
+    port: int, optional
+        The port the coordinator listens on, 0 for any free port.
+
+    Returns
+    -------
+    ScoreMatrix
+        The dense scores matrix, over the result file.
+    """
+    job = TiledJob(path, fragments, match_score,
+                   mismatch_score, gap_cost, tile_size)
+    coordinator = Coordinator(job, fragments, match_score,
+                              mismatch_score, gap_cost, host, port)
+    worker_host = "127.0.0.1" if host in ("", "0.0.0.0") else host
+
+    workers = [Process(target=_worker_process, args=(worker_host, coordinator.address[1]), daemon=True)
+               for _ in range(local_workers)]
+    for worker in workers:
+        worker.start()
+
+    matrix = coordinator.serve(workers)
+    for worker in workers:
+        worker.join(5)
+    return matrix
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m use.distributed HOST PORT, to run a worker on any machine.
+    run_worker(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,431 @@
+import os
+import json
+import random
+import hashlib
+from time import perf_counter, process_time
+from types import SimpleNamespace
+from collections import OrderedDict
+from statistics import mean
+from contextlib import redirect_stdout
+from multiprocessing import Pool
+from typing import List, Tuple, Dict
+
+import config
+from use.tools import read_fragments
+from use.backends import select_backend, kernels
+from use.instance import scores_key, compute_scores
+from use.checkpoint import save_scores, load_scores, scores_file
+from use.generator import ORDER_EXTENSION, read_order, adjacency_accuracy
+from algorithm.Indicators import Indicators
+
+
+ALGORITHMS = ("NSGA-II", "MOBA")
+
+# The scores loaded by a worker process, key --> scores, the least recently
+# used first, and how many of them it keeps for its next jobs.
+_LOADED = OrderedDict()
+_WARM = 1
+
+
+def settings(overrides: dict = None) -> SimpleNamespace:
+    """This function returns the values of the config, with some of them
+    replaced, as an object read like the config module by nsga2_search and
+    moba_search. The checkpoints and the trace are disabled, each run starts
+    from scratch.
+
+    ...
+
+    Parameters
+    ----------
+    overrides: dict, optional
+        A dict {config name: value}, e.g {"MUTATION_PROBABILITY": 0.1}.
+
+    Returns
+    -------
+    SimpleNamespace
+        The values of the run.
+    """
+    values = {name: getattr(config, name)
+              for name in dir(config) if name.isupper()}
+    for name in overrides or dict():
+        if name not in values:
+            raise ValueError(
+                "The parameter {} is not a variable of the config.".format(name))
+    values.update(overrides or dict())
+    values.update(CHECKPOINT_INTERVAL=0, RESUME=False, TRACE_FILE=None)
+    return SimpleNamespace(**values)
+
+
+def stream_seed(instance: str, algorithm: str, parameters_index: int, seed: int) -> int:
+    """This function returns the seed of the random stream of a run, derived
+    from what the run is, not from the worker nor the order of the runs, so
+    the same run gives the same result again, and two runs never share a stream.
+
+    ...
+
+    Parameters
+    ----------
+    instance: str
+        The benchmark file.
+    algorithm: str
+        NSGA-II or MOBA.
+    parameters_index: int
+        The index of the parameters set.
+    seed: int
+        The seed of the run.
+
+    Returns
+    -------
+    int
+        A 64 bits seed.
+    """
+    digest = hashlib.sha256(repr((instance, algorithm, parameters_index, seed)).encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def scores_directory(directory: str, key: tuple) -> str:
+    """This function returns where the scores of a key are saved, one
+    directory per benchmark and scoring values.
+
+    ...
+
+    Parameters
+    ----------
+    directory: str
+        The experiment directory.
+    key: tuple
+        What the scores are computed from, see use.instance.scores_key.
+
+    Returns
+    -------
+    str
+        The directory of the scores.
+    """
+    return os.path.join(directory, hashlib.sha256(repr(key).encode()).hexdigest()[:16])
+
+
+def prepare_instances(instances: List[str], parameters: List[dict], directory: str) -> Dict[tuple, int]:
+    """This function computes the overlap scores of each instance once, for
+    each scoring values of the parameters sets, and saves them in the
+    experiment directory, where the workers load them. The scores already
+    saved by a previous experiment are not computed again.
+
+    ...
+
+    Parameters
+    ----------
+    instances: list
+        A list of benchmark files.
+    parameters: list
+        A list of parameters sets, dicts {config name: value}.
+    directory: str
+        The experiment directory.
+
+    Returns
+    -------
+    dict
+        The number of fragments of each scores key.
+    """
+    fragments_numbers = dict()
+    for instance in instances:
+        fragments = read_fragments(instance)
+        for overrides in parameters:
+            cfg = settings(dict(overrides, BECHMARK_FILE=instance))
+            key = scores_key(cfg)
+            if key in fragments_numbers:
+                continue
+            fragments_numbers[key] = len(fragments)
+
+            path = scores_directory(directory, key)
+            if os.path.isfile(os.path.join(path, scores_file(key))):
+                print("\tSCORES OF {} FOUND --> {}".format(instance, path))
+                continue
+            print("\tCALCULATING THE OVERLAP SCORES OF {} ({} FRAGMENTS).".format(
+                instance, len(fragments)))
+            save_scores(path, key, compute_scores(fragments, cfg))
+    return fragments_numbers
+
+
+def load_prepared_scores(directory: str, key: tuple):
+    """This function loads the scores of a key saved in the experiment
+    directory, the last ones loaded by the process are kept in memory, the
+    jobs of an instance being handed one after the other.
+
+    ...
+
+    Parameters
+    ----------
+    directory: str
+        The experiment directory.
+    key: tuple
+        What the scores are computed from, see use.instance.scores_key.
+
+    Returns
+    -------
+    list
+        A list of lists(matrix) of float, or a ScoreMatrix.
+    """
+    if key in _LOADED:
+        _LOADED.move_to_end(key)
+        return _LOADED[key]
+    while len(_LOADED) >= _WARM:
+        _LOADED.popitem(last=False)
+    _LOADED[key] = load_scores(scores_directory(directory, key), key)
+    return _LOADED[key]
+
+
+def init_worker(backends: Dict[str, str], warm: int = 1) -> None:
+    """This function prepares a worker process: it uses the kernels chosen
+    by the parent, without benchmark, and keeps the scores of the last warm
+    instances in memory.
+
+    ...
+
+    Parameters
+    ----------
+    backends: dict
+        The backend of each kernel, as Kernels.names.
+    warm: int, optional
+        The number of score matrices kept in memory.
+
+    Returns
+    -------
+    None
+    """
+    global _WARM
+    _WARM = max(warm, 1)
+    select_backend(backends)
+
+
+def run_job(job: tuple) -> dict:
+    """This function runs one algorithm once, with its own random stream,
+    and returns its results, the progress of the run is not printed.
+
+    ...
+
+    Parameters
+    ----------
+    job: tuple
+        (instance, algorithm, parameters index, parameters, seed, fragments
+        number, experiment directory).
+
+    Returns
+    -------
+    dict
+        The results of the run: its front as [oaf, odf, contigs] lists, its
+        lowest contigs number, its generations and final hypervolume (with
+        the reference point of the run, unless REFERENCE_POINT is set, so
+        summary compares the fronts instead), its wall, CPU and scores loading times in seconds, and for a generated
+        instance, the best adjacency accuracy against the true ordering.
+    """
+    # Imported here, since the scripts import the config the same way.
+    from run_nsga2 import nsga2_search
+    from run_bat_algorithm import moba_search
+
+    instance, algorithm, parameters_index, overrides, seed, fragments_number, directory = job
+    cfg = settings(dict(overrides, BECHMARK_FILE=instance))
+
+    start = perf_counter()
+    scores = load_prepared_scores(directory, scores_key(cfg))
+    scores_seconds = perf_counter() - start
+
+    stream = stream_seed(instance, algorithm, parameters_index, seed)
+    random.seed(stream)
+    start, cpu_start = perf_counter(), process_time()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        if algorithm == "NSGA-II":
+            archive, monitor = nsga2_search(scores, fragments_number, cfg)
+        else:
+            moba = moba_search(scores, fragments_number, cfg)
+            archive, monitor = moba.archive, moba.monitor
+    wall_seconds, cpu_seconds = perf_counter() - start, process_time() - cpu_start
+
+    front = sorted([sol.oaf, sol.odf, sol.contigs]
+                   for sol in archive.solutions())
+    accuracy = None
+    if os.path.isfile(instance + ORDER_EXTENSION):
+        order = read_order(instance)
+        accuracy = max((adjacency_accuracy(sol.genome, order)
+                        for sol in archive.solutions()), default=None)
+    return {
+        "instance": instance,
+        "algorithm": algorithm,
+        "parameters_index": parameters_index,
+        "parameters": overrides,
+        "seed": seed,
+        "stream_seed": stream,
+        "fragments": fragments_number,
+        "front": front,
+        "best_contigs": min(point[2] for point in front) if front else None,
+        "generations": monitor.history[-1][0] if monitor.history else 0,
+        "hypervolume": monitor.history[-1][1] if monitor.history else 0.0,
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": cpu_seconds,
+        "scores_seconds": scores_seconds,
+        "accuracy": accuracy,
+    }
+
+
+def _records(results: str) -> List[dict]:
+    # Every run in the results file, from this and the interrupted experiments.
+    records = list()
+    if os.path.isfile(results):
+        with open(results) as file:
+            for line in file:
+                if line.strip():
+                    records.append(json.loads(line))
+    return records
+
+
+def _done(results: str) -> set:
+    # The runs already in the results file, from an interrupted experiment.
+    return {(record["instance"], record["algorithm"], record["parameters_index"], record["seed"])
+            for record in _records(results)}
+
+
+def run_experiments(instances: List[str], algorithms: List[str], parameters: List[dict], seeds: List[int], workers: int = 0, results: str = "experiments.jsonl", directory: str = "experiments") -> List[dict]:
+    """This function runs each algorithm with each parameters set and each
+    seed on each instance, the runs spread over a pool of processes.
+    The scores of an instance are computed once, then loaded once by each
+    worker. Each finished run is appended as a JSON line to the results
+    file, and the runs already there are not run again, the summary is
+    of every run in the file.
+
+    ...
+
+    Parameters
+    ----------
+    instances: list
+        A list of benchmark files.
+    algorithms: list
+        A list of algorithms, NSGA-II and/or MOBA.
+    parameters: list
+        A list of parameters sets, dicts {config name: value}, [{}] for the
+        config as it is.
+    seeds: list
+        A list of int, the seeds of the runs.
+    workers: int, optional
+        The number of worker processes, 0 for one per CPU.
+    results: str, optional
+        The results file.
+    directory: str, optional
+        The experiment directory, where the scores are saved.
+
+    Returns
+    -------
+    list
+        The results of the runs done now, see run_job.
+    """
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            raise ValueError("The algorithm {} is unknown, expected one of {}.".format(
+                algorithm, ALGORITHMS))
+    parameters = parameters or [dict()]
+    for overrides in parameters:
+        settings(overrides)
+
+    print("STEP-1 :: CALCULATING THE OVERLAP SCORES OF {} INSTANCES.".format(len(instances)))
+    fragments_numbers = prepare_instances(instances, parameters, directory)
+
+    done = _done(results)
+    jobs = list()
+    for instance in instances:
+        for algorithm in algorithms:
+            for index, overrides in enumerate(parameters):
+                for seed in seeds:
+                    if (instance, algorithm, index, seed) in done:
+                        continue
+                    key = scores_key(settings(dict(overrides, BECHMARK_FILE=instance)))
+                    jobs.append((instance, algorithm, index, dict(overrides), seed,
+                                 fragments_numbers[key], directory))
+    print("STEP-2 :: RUNNING {} JOBS, {} DONE ALREADY --> {}".format(len(jobs), len(done), results))
+
+    records = list()
+    os.makedirs(os.path.dirname(results) or ".", exist_ok=True)
+    with Pool(workers or None, init_worker, (kernels().names,)) as pool, open(results, "a") as file:
+        for record in pool.imap_unordered(run_job, jobs):
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            records.append(record)
+            print("\t{}/{} --> {} {} P-{} S-{} :: {} CONTIGS, {:.1f} SECONDS".format(
+                len(records), len(jobs), record["instance"], record["algorithm"], record["parameters_index"],
+                record["seed"], record["best_contigs"], record["wall_seconds"]))
+
+    print("STEP-3 :: SUMMARY OF {} RUNS.".format(len(done) + len(records)))
+    summary(_records(results))
+    return records
+
+
+def normalized_hypervolumes(fronts: List[List[list]]) -> List[float]:
+    """This function measures the fronts of runs on one instance against
+    each other, by their hypervolume once the oaf and the odf are normalized
+    by the bounds of all the fronts, so the hypervolumes share a reference
+    point and don't depend on the scale of the instance.
+
+    ...
+
+    Parameters
+    ----------
+    fronts: list
+        A list of fronts, each a list of [oaf, odf, contigs] lists.
+
+    Returns
+    -------
+    list
+        The hypervolume of each front, higher is better.
+    """
+    points = [point for front in fronts for point in front]
+    if not points:
+        return [0.0] * len(fronts)
+    low_oaf, high_oaf = min(p[0] for p in points), max(p[0] for p in points)
+    low_odf, high_odf = min(p[1] for p in points), max(p[1] for p in points)
+    span_oaf, span_odf = (high_oaf - low_oaf) or 1.0, (high_odf - low_odf) or 1.0
+    # Slightly beyond the worst points, so they add to the hypervolume.
+    reference_point = (-0.1, 1.1)
+    return [Indicators.hypervolume([((p[0] - low_oaf) / span_oaf, (p[1] - low_odf) / span_odf) for p in front],
+                                   reference_point) for front in fronts]
+
+
+def summary(records: List[dict]) -> List[Tuple]:
+    """This function prints, and returns, the mean and the best of the runs
+    of each instance, algorithm and parameters set. The hypervolumes are
+    those of the fronts normalized over all the runs of their instance, so
+    they compare between the parameters sets and the seeds.
+
+    ...
+
+    Parameters
+    ----------
+    records: list
+        The results of the runs, see run_job.
+
+    Returns
+    -------
+    list
+        A list of (instance, algorithm, parameters index, runs, mean contigs,
+        best contigs, mean hypervolume, mean wall seconds).
+    """
+    # The normalized hypervolume of each run, against all the runs of its instance.
+    instances = dict()
+    for record in records:
+        instances.setdefault(record["instance"], list()).append(record)
+    hypervolumes = dict()
+    for group in instances.values():
+        for record, hypervolume in zip(group, normalized_hypervolumes([record["front"] for record in group])):
+            hypervolumes[id(record)] = hypervolume
+
+    groups = dict()
+    for record in records:
+        groups.setdefault((record["instance"], record["algorithm"],
+                           record["parameters_index"]), list()).append(record)
+
+    rows = list()
+    for (instance, algorithm, index), group in sorted(groups.items()):
+        contigs = [record["best_contigs"] for record in group if record["best_contigs"] is not None]
+        rows.append((instance, algorithm, index, len(group),
+                     mean(contigs) if contigs else None, min(contigs, default=None),
+                     mean(hypervolumes[id(record)] for record in group),
+                     mean(record["wall_seconds"] for record in group)))
+        print("\t{} {} P-{} :: {} RUNS, CONTIGS MEAN {} BEST {}, HYPERVOLUME {:.4g}, {:.1f} SECONDS".format(
+            *rows[-1][:4], round(rows[-1][4], 2) if contigs else None, *rows[-1][5:]))
+    return rows
@@ -0,0 +1,192 @@
+import random
+from math import ceil
+from typing import List, Tuple
+
+# The nucleotides, and the ones a substitution may give for each of them.
+NUCLEOTIDES = "acgt"
+_SUBSTITUTES = {n: NUCLEOTIDES.replace(n, "") for n in NUCLEOTIDES}
+
+# The true ordering of an instance is written aside it, with this extension.
+ORDER_EXTENSION = ".order"
+
+
+def random_genome(length: int, generator: random.Random, gc_content: float = 0.5) -> str:
+    """This function builds a random reference genome.
+
+    ...
+
+    Parameters
+    ----------
+    length: int
+        The number of nucleotides.
+    generator: Random
+        The random generator.
+    gc_content: float, optional
+        The part of the nucleotides that are c or g.
+
+    Returns
+    -------
+    str
+        The genome, in lower case like the benchmark files.
+    """
+    weights = [(1 - gc_content) / 2, gc_content / 2, gc_content / 2, (1 - gc_content) / 2]
+    return "".join(generator.choices(NUCLEOTIDES, weights, k=length))
+
+
+def _mutate(read: str, error_rate: float, generator: random.Random) -> str:
+    # Each nucleotide is substituted, deleted, or followed by an insertion,
+    # with error_rate / 3 each.
+    if error_rate <= 0:
+        return read
+    out = list()
+    for nucleotide in read:
+        draw = generator.random()
+        if draw >= error_rate:
+            out.append(nucleotide)
+        elif draw < error_rate / 3:
+            out.append(generator.choice(_SUBSTITUTES[nucleotide]))
+        elif draw >= 2 * error_rate / 3:
+            out.append(nucleotide)
+            out.append(generator.choice(NUCLEOTIDES))
+    return "".join(out)
+
+
+def shred(genome: str, read_length: int, coverage: float, error_rate: float, generator: random.Random) -> List[Tuple[int, str]]:
+    """This function cuts reads of the same length at random positions of
+    a genome, until the mean coverage is reached, and adds sequencing errors.
+    The reads are returned in a random order, as in a sequencing run.
+
+    ...
+
+    Parameters
+    ----------
+    genome: str
+        The reference genome.
+    read_length: int
+        The length of the reads, before the insertions and the deletions.
+    coverage: float
+        The mean number of reads covering a nucleotide.
+    error_rate: float
+        The probability of an error at each nucleotide, substitution, deletion
+        or insertion.
+    generator: Random
+        The random generator.
+
+    Returns
+    -------
+    list
+        A list of (start in the genome, read) tuples.
+    """
+    read_length = min(read_length, len(genome))
+    count = max(ceil(coverage * len(genome) / read_length), 1)
+    last = len(genome) - read_length
+    # The first and the last nucleotides are always covered.
+    starts = [0, last][:count] + [generator.randint(0, last)
+                                  for _ in range(count - 2)]
+    generator.shuffle(starts)
+    return [(start, _mutate(genome[start:start + read_length], error_rate, generator)) for start in starts]
+
+
+def write_instance(path: str, genome_length: int, read_length: int, coverage: float, error_rate: float = 0.0, seed: int = 0, gc_content: float = 0.5) -> List[int]:
+    """This function generates a synthetic instance, written as the benchmark
+    files read by read_fragments, with its true ordering written aside, in
+    path + ORDER_EXTENSION: one line per fragment, from the start of the genome,
+    with the fragment index and its start and end in the genome.
+    The same seed gives the same instance.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The instance file.
+    genome_length: int
+        The number of nucleotides of the reference genome.
+    read_length: int
+        The length of the reads.
+    coverage: float
+        The mean number of reads covering a nucleotide.
+    error_rate: float, optional
+        The probability of an error at each nucleotide.
+    seed: int, optional
+        The seed of the random generator.
+    gc_content: float, optional
+        The part of the nucleotides that are c or g.
+
+    Returns
+    -------
+    list
+        The true ordering, the fragments indexes sorted by start in the genome.
+    """
+    generator = random.Random(seed)
+    genome = random_genome(genome_length, generator, gc_content)
+    reads = shred(genome, read_length, coverage, error_rate, generator)
+
+    with open(path, "w") as file:
+        for index, (_, read) in enumerate(reads):
+            file.write(">frag{:04d}\n{}\n".format(index, read))
+
+    order = sorted(range(len(reads)), key=lambda index: reads[index][0])
+    with open(path + ORDER_EXTENSION, "w") as file:
+        for index in order:
+            start = reads[index][0]
+            file.write("{} {} {}\n".format(index, start, start + min(read_length, genome_length)))
+    return order
+
+
+def read_order(path: str) -> List[int]:
+    """This function reads the true ordering written by write_instance.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The instance file, or its ordering file.
+
+    Returns
+    -------
+    list
+        The fragments indexes sorted by start in the genome.
+    """
+    if not path.endswith(ORDER_EXTENSION):
+        path += ORDER_EXTENSION
+    with open(path) as file:
+        return [int(line.split()[0]) for line in file if line.strip()]
+
+
+def adjacency_accuracy(genome: List[int], order: List[int]) -> float:
+    """This function measures a solution against the true ordering, as the
+    part of its adjacent fragments that follow each other in the genome.
+
+    ...
+
+    Parameters
+    ----------
+    genome: list
+        The solution, a list of fragments indexes.
+    order: list
+        The true ordering.
+
+    Returns
+    -------
+    float
+        The accuracy, 1 for the true ordering.
+    """
+    if len(genome) < 2:
+        return 1.0
+    rank = {index: position for position, index in enumerate(order)}
+    right = sum(1 for i in range(len(genome) - 1)
+                if rank[genome[i + 1]] == rank[genome[i]] + 1)
+    return right / (len(genome) - 1)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m use.generator PATH GENOME_LENGTH READ_LENGTH COVERAGE [ERROR_RATE [SEED]]
+    arguments = sys.argv[1:]
+    order = write_instance(arguments[0], int(arguments[1]), int(arguments[2]), float(arguments[3]),
+                           float(arguments[4]) if len(arguments) > 4 else 0.0,
+                           int(arguments[5]) if len(arguments) > 5 else 0)
+    print("{} FRAGMENTS --> {}".format(len(order), arguments[0]))
@@ -0,0 +1,75 @@
+from typing import List, Union
+
+from models.Fragment import Fragment
+from models.ScoreMatrix import ScoreMatrix
+from use.scoring import overlap_scores, oriented_overlap_scores, apply_exact_overlaps
+from use.score_store import incremental_overlap_scores
+from use.tiled_scoring import tiled_overlap_scores
+from use.distributed import distributed_overlap_scores
+
+
+def scores_key(cfg) -> tuple:
+    """This function returns what the overlap scores of a run are computed
+    from, i.e the benchmark file and the scoring values, to never reuse the
+    scores of another benchmark.
+
+    ...
+
+    Parameters
+    ----------
+    cfg: module
+        The config module, or an object with the same attributes.
+
+    Returns
+    -------
+    tuple
+        The key of the scores.
+    """
+    return (cfg.BECHMARK_FILE, cfg.MATCH_SCORE, cfg.MISMATCH_SCORE, cfg.GAP_COST,
+            cfg.SCORE_STORAGE, cfg.SCORE_THRESHOLD, cfg.EXACT_OVERLAP_MIN_LENGTH, cfg.ORIENTED_SCORES)
+
+
+def compute_scores(fragments: List[Fragment], cfg) -> Union[List[List[float]], ScoreMatrix]:
+    """This function computes the overlap scores of the fragments, the way
+    the config asks for: from the score store, tile by tile, distributed,
+    or all at once in memory, or for both strands of each fragment with
+    ORIENTED_SCORES. The exact overlaps of EXACT_OVERLAP_MIN_LENGTH
+    are scored the same way by all of them.
+
+    ...
+
+    Parameters
+    ----------
+    fragments: list
+        A list of Fragment.
+    cfg: module
+        The config module, or an object with the same attributes.
+
+    Returns
+    -------
+    list
+        A list of lists(matrix) of float, or a ScoreMatrix.
+    """
+    if cfg.ORIENTED_SCORES:
+        # The four strands combinations of each pair, aligned in memory.
+        return oriented_overlap_scores(fragments, cfg.MATCH_SCORE, cfg.MISMATCH_SCORE, cfg.GAP_COST)
+    if cfg.SCORE_STORE:
+        scores, computed = incremental_overlap_scores(fragments, cfg.SCORE_STORE, cfg.MATCH_SCORE, cfg.MISMATCH_SCORE,
+                                                      cfg.GAP_COST, cfg.SCORE_STORAGE or "dense", cfg.SCORE_THRESHOLD)
+        print("\t{} PAIRS ALIGNED, THE OTHERS FROM THE STORE --> {}".format(
+            computed, cfg.SCORE_STORE))
+    elif cfg.TILED_SCORES and cfg.DISTRIBUTED:
+        scores = distributed_overlap_scores(fragments, cfg.MATCH_SCORE, cfg.MISMATCH_SCORE, cfg.GAP_COST, cfg.TILED_SCORES,
+                                            cfg.TILE_SIZE, cfg.DISTRIBUTED_WORKERS, cfg.COORDINATOR_HOST, cfg.COORDINATOR_PORT)
+    elif cfg.TILED_SCORES:
+        scores, computed = tiled_overlap_scores(fragments, cfg.MATCH_SCORE, cfg.MISMATCH_SCORE,
+                                                cfg.GAP_COST, cfg.TILED_SCORES, cfg.TILE_SIZE)
+        print("\t{} TILES COMPUTED, THE OTHERS WERE DONE --> {}".format(
+            computed, cfg.TILED_SCORES))
+    else:
+        return overlap_scores(fragments, cfg.MATCH_SCORE, cfg.MISMATCH_SCORE, cfg.GAP_COST,
+                              cfg.SCORE_STORAGE, cfg.SCORE_THRESHOLD, cfg.EXACT_OVERLAP_MIN_LENGTH)
+    if cfg.EXACT_OVERLAP_MIN_LENGTH > 0:
+        scores = apply_exact_overlaps(scores, fragments, cfg.MATCH_SCORE,
+                                      cfg.EXACT_OVERLAP_MIN_LENGTH, cfg.SCORE_THRESHOLD)
+    return scores
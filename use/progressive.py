@@ -0,0 +1,395 @@
+import os
+import threading
+from queue import Queue, Empty
+from array import array
+from collections import defaultdict
+from multiprocessing import Pool
+from typing import List, Tuple, Dict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from models.Fragment import Fragment
+from models.ScoreMatrix import ScoreMatrix
+from use.backends import kernels, select_backend
+from use.scoring import exact_overlaps
+
+
+def kmer_scores(codes: List[bytes], k: int, match_score: float, min_shared: int = 2) -> Tuple[ScoreMatrix, Dict[Tuple[int, int], int]]:
+    """This function approximates the overlap scores from the k-mers shared
+    by the fragments, found with an index of the k-mers: two fragments
+    sharing c distinct k-mers are taken as overlapping on c + k - 1
+    nucleotides, scored (c + k - 1) * match_score, the other pairs 0.
+    It takes a time linear in the total lenght of the fragments, and the
+    pairs sharing a k-mer, instead of an alignment for each pair.
+
+    ...
+
+    Parameters
+    ----------
+    codes: list
+        The codes of the fragments.
+    k: int
+        The lenght of the k-mers.
+    match_score: float
+        The score of a matching nucleotide.
+    min_shared: int, optional
+        The k-mers two fragments must share to be scored, against random matches.
+
+    Returns
+    -------
+    ScoreMatrix
+        The approximate dense matrix.
+    dict
+        The pairs (i, j), i < j, scored, and their shared k-mers.
+    """
+    index = defaultdict(list)
+    for f, code in enumerate(codes):
+        for kmer in {code[p:p + k] for p in range(len(code) - k + 1)}:
+            index[kmer].append(f)
+
+    shared = defaultdict(int)
+    for frags in index.values():
+        for a in range(len(frags) - 1):
+            for b in range(a + 1, len(frags)):
+                shared[(frags[a], frags[b])] += 1
+
+    matrix = ScoreMatrix(len(codes))
+    candidates = dict()
+    for (i, j), count in shared.items():
+        if count >= min_shared:
+            candidates[(i, j)] = count
+            matrix.set(i, j, (count + k - 1) * match_score)
+    return matrix, candidates
+
+
+# The state of a worker process: the codes, the pairs not aligned by the
+# rows, the bit mask of the pairs already exact, the scoring values.
+_WORKER = dict()
+
+
+def _pair_index(i: int, j: int, size: int) -> int:
+    # The index of the pair i < j, in the order (0, 1), (0, 2), ..., (1, 2), ...
+    return i * (2 * size - i - 1) // 2 + j - i - 1
+
+
+def _init_worker(codes: List[bytes], skipped: set, exact: bytes, scoring: tuple, backends: Dict[str, str]) -> None:
+    select_backend(backends)
+    _WORKER.update(codes=codes, skipped=skipped, exact=exact, scoring=scoring)
+
+
+def _align(task: tuple) -> Tuple[array, array, array]:
+    # A task is ("pairs", [(i, j), ...]) or ("rows", first, last), for the
+    # rows, the pairs neither aligned first, nor scored by their exact
+    # overlap, nor exact already in the state resumed from.
+    codes, skipped, exact, scoring = _WORKER["codes"], _WORKER["skipped"], _WORKER["exact"], _WORKER["scoring"]
+    size = len(codes)
+    if task[0] == "pairs":
+        pairs = task[1]
+    else:
+        pairs = list()
+        for i in range(task[1], task[2]):
+            for j in range(i + 1, size):
+                index = _pair_index(i, j, size)
+                if (i, j) not in skipped and not exact[index >> 3] & (1 << (index & 7)):
+                    pairs.append((i, j))
+    rows, cols, values = array("l"), array("l"), array("f")
+    for i, j in pairs:
+        rows.append(i)
+        cols.append(j)
+        values.append(kernels().waterman(codes[i], codes[j], *scoring))
+    return rows, cols, values
+
+
+class ProgressiveScores:
+    """This is a ProgressiveScores class, that lets the search start on an
+    approximate scores matrix, from the shared k-mers, while the exact scores
+    are calculated by background worker processes, and refined into the same
+    matrix as they arrive.
+    The pairs sharing k-mers, the ones that make the oaf, are aligned first,
+    the highest approximate scores first, then all the other pairs, row by row.
+    The arrived scores are only written into the matrix by refine, called by
+    the search between two generations, that tells when the scores changed
+    enough for the solutions to be evaluated again. An error of a worker is
+    raised by refine or wait, the matrix is then never taken as exact.
+    The matrix and the pairs already exact are saved with the checkpoints
+    (get_state), so a resumed run only aligns the other pairs.
+
+    ...
+
+    Attributes
+    ----------
+    matrix: ScoreMatrix
+        The dense scores matrix, approximate then exact.
+    pairs: int
+        The number of pairs i < j.
+    refined: int
+        The number of pairs with their exact score.
+    refresh: float
+        The change of the scores, relative to their sum, after which refine
+        asks for an evaluation.
+    refreshes: int
+        The number of times refine asked for an evaluation.
+
+    Methods
+    -------
+    __init__(fragments, match_score, mismatch_score, gap_cost, k=12, workers=0, refresh=0.05, chunk=2048, exact_min_length=0, state=None): None
+        The constructor, starts the workers.
+    refine: bool
+        Writes the arrived scores, and tells if the solutions must be evaluated again.
+    done: bool
+        Tells if all the scores are exact.
+    wait: None
+        Waits for all the exact scores, and writes them.
+    close: None
+        Stops the workers.
+    get_state: dict
+        The matrix and the pairs exact, to be saved in a checkpoint.
+    """
+
+    def __init__(self, fragments: List[Fragment], match_score: float, mismatch_score: float, gap_cost: float, k: int = 12, workers: int = 0, refresh: float = 0.05, chunk: int = 2048, exact_min_length: int = 0, state: dict = None):
+        """The constructor, calculates the approximate matrix, and starts the
+        worker processes on the exact scores.
+
+        ...
+
+        Parameters
+        ----------
+        fragments: list
+            A list of Fragment.
+        match_score: int
+            A positive int, we add in case to caracters match.
+        mismatch_score: int
+            A negative int, we add in case to caracters don't match.
+        gap_cost: int
+            A negative int, for the gap.
+        k: int, optional
+            The lenght of the k-mers of the approximation.
+        workers: int, optional
+            The number of worker processes, 0 for one per CPU but the search's.
+        refresh: float, optional
+            The change of the scores, relative to their sum, after which refine
+            asks for an evaluation.
+        chunk: int, optional
+            The number of pairs of a task.
+        exact_min_length: int, optional
+            The pairs with an exact overlap of at least this lenght are
+            scored by it, as overlap_scores does, and not aligned.
+        state: dict, optional
+            The state returned by get_state, saved with the checkpoint a run
+            resumes from, the matrix starts from it, and only the pairs not
+            exact yet are aligned.
+
+        Returns
+        -------
+        None
+        """
+        codes = [frag.codes() for frag in fragments]
+        size = len(codes)
+        self.matrix, candidates = kmer_scores(codes, k, match_score)
+        exact = exact_overlaps(codes, exact_min_length) if exact_min_length > 0 else dict()
+        for (i, j), length in exact.items():
+            self.matrix.set(i, j, length * match_score)
+            candidates.pop((i, j), None)
+        self.pairs = size * (size - 1) // 2
+        self.refined = len(exact)
+        self.refresh = refresh
+        self.refreshes = 0
+        # The sum of the scores of the pairs, and their change not evaluated yet.
+        self._mass = sum((count + k - 1) * match_score for count in candidates.values()) + \
+            sum(length * match_score for length in exact.values())
+        self._change = 0.0
+        # The bit mask of the pairs whose score is exact, by _pair_index.
+        self._exact = bytearray((self.pairs + 7) // 8)
+        for i, j in exact:
+            self._mark(i, j)
+        if state is not None:
+            self.matrix = state["matrix"]
+            self._exact = bytearray(state["exact"])
+            self.refined = state["refined"]
+            self.refreshes = state["refreshes"]
+            candidates = {pair: count for pair, count in candidates.items()
+                          if not self._is_exact(*pair)}
+            self._mass = sum(max(self.matrix.get(i, j), 0.0)
+                             for i in range(size - 1) for j in range(i + 1, size))
+        self._arrived = Queue()
+        # The error of a worker, raised again by each refine and wait.
+        self._error = None
+
+        ordered = sorted(candidates, key=lambda pair: -candidates[pair])
+        tasks = [("pairs", ordered[p:p + chunk])
+                 for p in range(0, len(ordered), chunk)]
+        # Rows with about chunk pairs each, the rows at the top being the longest.
+        first = 0
+        while first < size - 1:
+            last = first + 1
+            count = size - 1 - first
+            while last < size - 1 and count + size - 1 - last <= chunk:
+                count += size - 1 - last
+                last += 1
+            tasks.append(("rows", first, last))
+            first = last
+
+        workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self._pool = Pool(workers, _init_worker, (codes, set(candidates) | set(exact), bytes(self._exact),
+                                                  (match_score, mismatch_score, gap_cost), kernels().names))
+        self._results = self._pool.imap_unordered(_align, tasks)
+        self._tasks = len(tasks)
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def _collect(self) -> None:
+        # Hands the results of the workers to refine, or the error of one,
+        # then None once all are done.
+        try:
+            for result in self._results:
+                self._arrived.put(result)
+        except Exception as error:
+            self._arrived.put(error)
+        finally:
+            self._arrived.put(None)
+
+    def _mark(self, i: int, j: int) -> None:
+        index = _pair_index(i, j, self.matrix.size)
+        self._exact[index >> 3] |= 1 << (index & 7)
+
+    def _is_exact(self, i: int, j: int) -> bool:
+        index = _pair_index(i, j, self.matrix.size)
+        return bool(self._exact[index >> 3] & (1 << (index & 7)))
+
+    def _write(self, rows: array, cols: array, values: array) -> None:
+        # Writes exact scores, marks them exact, and adds their change.
+        if np is not None:
+            view = np.frombuffer(self.matrix.values, dtype=np.float32).reshape(
+                self.matrix.size, self.matrix.size)
+            i = np.frombuffer(rows, dtype=rows.typecode)
+            j = np.frombuffer(cols, dtype=cols.typecode)
+            exact = np.frombuffer(values, dtype=np.float32)
+            old = view[i, j]
+            view[i, j] = exact
+            view[j, i] = exact
+            self._change += float(np.abs(exact - old).sum())
+            self._mass += float((np.maximum(exact, 0) - np.maximum(old, 0)).sum())
+            index = i * (2 * self.matrix.size - i - 1) // 2 + j - i - 1
+            np.bitwise_or.at(np.frombuffer(self._exact, dtype=np.uint8), index >> 3,
+                             (1 << (index & 7)).astype(np.uint8))
+        else:
+            for i, j, value in zip(rows, cols, values):
+                old = self.matrix.get(i, j)
+                self.matrix.set(i, j, value)
+                self._change += abs(value - old)
+                self._mass += max(value, 0.0) - max(old, 0.0)
+                self._mark(i, j)
+        self.refined += len(values)
+
+    def _drain(self, block: bool) -> None:
+        if self._error is not None:
+            raise self._error
+        while self._tasks:
+            try:
+                result = self._arrived.get(block)
+            except Empty:
+                return
+            if isinstance(result, Exception):
+                self._error = result
+                raise result
+            if result is None:
+                self._tasks = 0
+                if self.refined != self.pairs:
+                    self._error = RuntimeError("The workers ended with {} of {} pairs exact.".format(
+                        self.refined, self.pairs))
+                    raise self._error
+                return
+            self._write(*result)
+
+    def refine(self) -> bool:
+        """This function writes the exact scores arrived since the last call
+        into the matrix, and tells if the scores changed enough, since the
+        last time it returned True, for the solutions to be evaluated again,
+        always once the last scores are written.
+
+        ...
+
+        Returns
+        -------
+        bool
+            True if the solutions must be evaluated again.
+
+        Raises
+        ------
+        Exception
+            The error of a worker, or a RuntimeError if the workers ended
+            without all the exact scores.
+        """
+        self._drain(False)
+        if self._change > 0 and (self.done() or self._change >= self.refresh * max(self._mass, 1e-9)):
+            self._change = 0.0
+            self.refreshes += 1
+            return True
+        return False
+
+    def done(self) -> bool:
+        """This function tells if all the scores are exact, and written.
+
+        ...
+
+        Returns
+        -------
+        bool
+            True if the matrix is exact.
+        """
+        return self._tasks == 0 and self.refined == self.pairs
+
+    def wait(self) -> None:
+        """This function waits for all the exact scores, and writes them.
+
+        ...
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        Exception
+            The error of a worker, or a RuntimeError if the workers ended
+            without all the exact scores.
+        """
+        self._drain(True)
+
+    def close(self) -> None:
+        """This function stops the workers, the scores not arrived are lost.
+
+        ...
+
+        Returns
+        -------
+        None
+        """
+        self._pool.terminate()
+        self._pool.join()
+
+    def get_state(self) -> dict:
+        """This function returns the matrix, with the scores written so far,
+        and the pairs whose score is exact, to be saved in a checkpoint. The
+        scores arrived but not written yet are aligned again on resume.
+
+        ...
+
+        Returns
+        -------
+        dict
+            The state.
+        """
+        return {
+            "matrix": self.matrix,
+            "exact": bytes(self._exact),
+            "refined": self.refined,
+            "refreshes": self.refreshes,
+        }
+
+    def __str__(self):
+        return "{} OF {} PAIRS EXACT ({:.1%}), {} REFRESHES".format(
+            self.refined, self.pairs, self.refined / self.pairs if self.pairs else 1.0, self.refreshes)
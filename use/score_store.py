@@ -0,0 +1,181 @@
+import os
+import struct
+from array import array
+from hashlib import blake2b
+from typing import List, Tuple, Optional
+
+from models.Fragment import Fragment
+from models.ScoreMatrix import ScoreMatrix
+from use.scoring import waterman_algorithm
+
+
+# Every score store file starts with this, to reject unrelated files.
+MAGIC = b"PYBOSCR1"
+# The number of fragments, then the match, mismatch and gap scores.
+HEADER = struct.Struct("<Iddd")
+DIGEST_SIZE = 16
+
+
+def fragment_digest(fragment: Fragment) -> bytes:
+    """This function returns the content hash of a fragment, computed from
+    its nucleotides codes, read from left to right.
+
+    ...
+
+    Parameters
+    ----------
+    fragment: Fragment
+        The fragment.
+
+    Returns
+    -------
+    bytes
+        The DIGEST_SIZE bytes hash.
+    """
+    return blake2b(fragment.packed.codes(), digest_size=DIGEST_SIZE).digest()
+
+
+def load_store(path: str, match_score: float, mismatch_score: float, gap_cost: float) -> Optional[Tuple[List[bytes], ScoreMatrix]]:
+    """This function loads a score store, i.e the fragments hashes and the
+    condensed scores matrix computed for them.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The store's full path.
+    match_score: int
+        The match score the scores must have been computed with.
+    mismatch_score: int
+        The mismatch score the scores must have been computed with.
+    gap_cost: int
+        The gap cost the scores must have been computed with.
+
+    Returns
+    -------
+    tuple
+        The list of the fragments hashes, and the condensed ScoreMatrix,
+        or None if there is no store, or if it was computed with other scores.
+    """
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a score store.".format(path))
+        size, match, mismatch, gap = HEADER.unpack(file.read(HEADER.size))
+        if (match, mismatch, gap) != (match_score, mismatch_score, gap_cost):
+            return None
+
+        digests = file.read(size * DIGEST_SIZE)
+        digests = [digests[k:k + DIGEST_SIZE]
+                   for k in range(0, len(digests), DIGEST_SIZE)]
+        matrix = ScoreMatrix(size, "condensed")
+        matrix.values = array("f")
+        matrix.values.fromfile(file, size * (size - 1) // 2)
+
+    return digests, matrix
+
+
+def save_store(path: str, digests: List[bytes], matrix: ScoreMatrix, match_score: float, mismatch_score: float, gap_cost: float) -> None:
+    """This function writes a score store, the file is written aside then
+    renamed, so the old store stays whole if the process is killed.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The store's full path.
+    digests: list
+        The fragments hashes.
+    matrix: ScoreMatrix
+        The condensed scores matrix.
+    match_score: int
+        The match score the scores were computed with.
+    mismatch_score: int
+        The mismatch score the scores were computed with.
+    gap_cost: int
+        The gap cost the scores were computed with.
+
+    Returns
+    -------
+    None
+    """
+    temp = path + ".tmp"
+    with open(temp, "wb") as file:
+        file.write(MAGIC)
+        file.write(HEADER.pack(len(digests), match_score,
+                               mismatch_score, gap_cost))
+        file.write(b"".join(digests))
+        matrix.values.tofile(file)
+    os.replace(temp, path)
+
+
+def incremental_overlap_scores(fragments: List[Fragment], path: str, match_score: int, mismatch_score: int, gap_cost: int, storage: str = "dense", threshold: float = 0.0) -> Tuple[ScoreMatrix, int]:
+    """This function calculates the overlap scores matrix like overlap_scores,
+    but reuses the scores of a store computed on a previous run.
+    The fragments are found in the store by their content hash, whatever
+    their order, so only the pairs with a new or changed fragment are aligned.
+    The store is then updated with the new fragments.
+
+    ...
+
+    Parameters
+    ----------
+    fragments: list
+        A list of fragments.
+    path: str
+        The store's full path, it's created if it doesn't exist.
+    match_score: int
+        A positive int, we add in case to caracters match.
+    mismatch_score: int
+        A negative int, we add in case to caracters don't match.
+    gap_cost: int
+        A negative int, for the gap.
+    storage: str, optional
+        The storage of the returned ScoreMatrix.
+    threshold: float, optional
+        For the sparse storage, the scores kept must be greater than it.
+
+    Returns
+    -------
+    ScoreMatrix
+        The scores matrix.
+    int
+        The number of pairs aligned, the others came from the store.
+    """
+    len_frag = len(fragments)
+    digests = [fragment_digest(frag) for frag in fragments]
+
+    stored = load_store(path, match_score, mismatch_score, gap_cost)
+    old_index = dict()
+    if stored is not None:
+        old_digests, old_matrix = stored
+        for index, digest in enumerate(old_digests):
+            old_index.setdefault(digest, index)
+    # The index of each fragment in the store, None if it is new.
+    previous = [old_index.get(digest) for digest in digests]
+
+    codes = dict()
+    matrix = ScoreMatrix(len_frag, "condensed")
+    computed = 0
+    for i in range(0, len_frag - 1):
+        for j in range(i + 1, len_frag):
+            if previous[i] is not None and previous[j] is not None and previous[i] != previous[j]:
+                matrix.set(i, j, old_matrix.get(previous[i], previous[j]))
+            else:
+                # Unpack the fragments only once, and only if needed.
+                for k in (i, j):
+                    if k not in codes:
+                        codes[k] = fragments[k].packed.codes()
+                matrix.set(i, j, waterman_algorithm(
+                    codes[i], codes[j], match_score, mismatch_score, gap_cost))
+                computed += 1
+
+    save_store(path, digests, matrix, match_score, mismatch_score, gap_cost)
+
+    if storage != "condensed":
+        matrix = ScoreMatrix.from_scores(matrix, storage, threshold)
+    return matrix, computed
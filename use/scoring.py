@@ -1,18 +1,30 @@
-from typing import List
+from typing import List, Sequence, Union, Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from models.Fragment import Fragment
+from models.OrientedScores import OrientedScores
+from models.ScoreMatrix import ScoreMatrix
+from use.suffix_index import OverlapIndex
+from use.backends import kernels
 
 
-def waterman_algorithm(str_1: str, str_2: str, match_score: float, mismatch_score: float, gap_cost: float) -> float:
+def waterman_algorithm(str_1: Sequence, str_2: Sequence, match_score: float, mismatch_score: float, gap_cost: float) -> float:
     """Take a look at The smith waterman algorithm.
+    The sequences can be strings, or the bytes codes of the fragments,
+    since only the equality of the caracters is checked.
+    The matrix is filled by the kernel of the chosen backend, see use.backends.
 
     ...
 
     Parameters
     ----------
-    str_1: str
+    str_1: str or bytes
         The first sequence(string)
-    str_1: str
+    str_1: str or bytes
         The second sequence(string
     match_score: int
         A positive int, we add in case to caracters match.
@@ -27,31 +39,7 @@ def waterman_algorithm(str_1: str, str_2: str, match_score: float, mismatch_scor
         An float, represeting the lenght of The Longest Common Substring.
     """
 
-    len_1 = len(str_1)
-    len_2 = len(str_2)
-    # The scoring result
-    result = 0.0
-
-    # Make a mtrix, to store the matches,
-    # and mismatches, and to calculate the final result.
-    # Both the row, and column number 0, are skiped.
-    # Check The Longest Common Subsequence problem.
-    H = [[0.0 for k in range(len_2 + 1)] for l in range(len_1 + 1)]
-
-    for i in range(len_1 + 1):
-        for j in range(len_2 + 1):
-            # skip this one because it doesn't represent any thing.
-            if (i == 0) or (j == 0):
-                H[i][j] = 0.0
-            else:
-                match = H[i - 1][j - 1] + \
-                    (match_score if str_1[i - 1] ==
-                     str_2[j - 1] else + mismatch_score)
-                delete = H[i - 1][j] + gap_cost
-                insert = H[i][j - 1] + gap_cost
-                result = H[i][j] = max(match, delete, insert, 0.0)
-
-    return result
+    return kernels().waterman(str_1, str_2, match_score, mismatch_score, gap_cost)
 
 
 def overlap(frag_1: Fragment, frag_2: Fragment, match_score: int, mismatch_score: int, gap_cost: int) -> float:
@@ -59,6 +47,8 @@ def overlap(frag_1: Fragment, frag_2: Fragment, match_score: int, mismatch_score
     in our case means the longest common nucleotides sequence,
     based on the same method of the waterman_algorithm.
     Take a look at The smith waterman algorithm.
+    The codes of both fragments are unpacked at each call, to score many
+    pairs, unpack them once, as overlap_scores does.
 
     ...
 
@@ -80,12 +70,85 @@ def overlap(frag_1: Fragment, frag_2: Fragment, match_score: int, mismatch_score
     float
        The value of the walterman algorith applied on the fragments sequences.
     """
-    return waterman_algorithm(frag_1.sequence, frag_2.sequence, match_score, mismatch_score, gap_cost)
+    return waterman_algorithm(frag_1.codes(), frag_2.codes(), match_score, mismatch_score, gap_cost)
+
+
+def exact_overlaps(codes: List[bytes], min_length: int) -> Dict[Tuple[int, int], int]:
+    """This function finds the longest exact suffix-prefix overlap of each
+    pair of fragments, in both directions, of at least min_length, with an
+    OverlapIndex.
+
+    ...
+
+    Parameters
+    ----------
+    codes: list
+        The codes of the fragments.
+    min_length: int
+        The shortest overlap found.
+
+    Returns
+    -------
+    dict
+        The pairs (i, j), i < j, and the lenght of their longest exact overlap.
+    """
+    exact = dict()
+    for (i, j), length in OverlapIndex(codes).suffix_prefix_overlaps(min_length).items():
+        key = (min(i, j), max(i, j))
+        exact[key] = max(exact.get(key, 0), length)
+    return exact
+
+
+def apply_exact_overlaps(scores: Union[List[List[float]], ScoreMatrix], fragments: List[Fragment], match_score: float, min_length: int, threshold: float = 0.0) -> Union[List[List[float]], ScoreMatrix]:
+    """This function scores the pairs with an exact overlap of at least
+    min_length as overlap_scores does with exact_min_length, in scores
+    computed another way (score store, tiles, workers), so all the ways
+    give the same scores.
+
+    ...
+
+    Parameters
+    ----------
+    scores: list
+        A list of list(matrix) of float, or a ScoreMatrix.
+    fragments: list
+        A list of fragments.
+    match_score: int
+        A positive int, we add in case to caracters match.
+    min_length: int
+        The shortest exact overlap scored without alignment.
+    threshold: float, optional
+        For the sparse storage, the scores kept must be greater than it.
+
+    Returns
+    -------
+    list
+        The same scores, or a new ScoreMatrix for the sparse storage,
+        which can't be changed.
+    """
+    exact = exact_overlaps([frag.codes() for frag in fragments], min_length)
+    sparse = isinstance(scores, ScoreMatrix) and scores.storage == "sparse"
+    if sparse:
+        scores = ScoreMatrix.from_scores(scores, "condensed")
+    for (i, j), length in exact.items():
+        if isinstance(scores, ScoreMatrix):
+            scores.set(i, j, length * match_score)
+        else:
+            scores[i][j] = scores[j][i] = length * match_score
+    if sparse:
+        scores = ScoreMatrix.from_scores(scores, "sparse", threshold)
+    return scores
 
 
-def overlap_scores(fragments: List[Fragment], match_score: int, mismatch_score: int, gap_cost: int) -> List[List[float]]:
+def overlap_scores(fragments: List[Fragment], match_score: int, mismatch_score: int, gap_cost: int, storage: str = None, threshold: float = 0.0, exact_min_length: int = 0) -> Union[List[List[float]], ScoreMatrix]:
     """This function calculates the overlap scores between each fragment
     and another, then the scores are all stored in a matrix.
+    With exact_min_length, the exact suffix-prefix overlaps of at least
+    that lenght are first found with an OverlapIndex, such a pair is scored
+    lenght * match_score, the score of its ungapped overlap, and only the
+    other pairs are aligned with the waterman_algorithm. This is not the
+    value the waterman_algorithm gives the pair, the last cell of its
+    matrix, so it changes the objectives, not only the time.
 
     PS:
     an overlap score between a fragment and itself is set to -1,
@@ -104,23 +167,148 @@ def overlap_scores(fragments: List[Fragment], match_score: int, mismatch_score:
         A negative int, we add in case to caracters don't match.
     gap_cost: int
         A negative int, for the gap.
+    storage: str, optional
+        If given, the scores are stored in a ScoreMatrix with this storage
+        (dense, condensed or sparse), instead of a list of lists.
+    threshold: float, optional
+        For the sparse storage, the scores kept must be greater than it.
+    exact_min_length: int, optional
+        The shortest exact overlap scored without alignment, 0 to align all the pairs.
     Returns
     -------
     list
-        A list of lists(matrix) of float, that contains the overlaping scores.
+        A list of lists(matrix) of float, that contains the overlaping scores,
+        or a ScoreMatrix if a storage is given.
     """
 
     len_frag = len(fragments)
+    # Unpack each fragment once, and not for each pair.
+    codes = [frag.codes() for frag in fragments]
+
+    # The longest exact overlap of each pair, in both directions.
+    exact = exact_overlaps(codes, exact_min_length) if exact_min_length > 0 else dict()
 
-    # Creating the matrix
-    scores = [[-1.0 for i in range(len_frag)] for j in range(len_frag)]
+    # Creating the matrix, the sparse one is built from the condensed one
+    # once all the scores are known.
+    if storage is None:
+        scores = [[-1.0 for i in range(len_frag)] for j in range(len_frag)]
+    else:
+        scores = ScoreMatrix(
+            len_frag, "condensed" if storage == "sparse" else storage)
 
     for i in range(0, len_frag - 1):
         for j in range(i + 1, len_frag):
             # Since waterman_algorithm(a, b) == waterman_algorithm(b, a)
             # we don't have to calculate twice, therefore we do
             # the calculations once, and we assign twice.
-            scores[i][j] = scores[j][i] = overlap(
-                fragments[i], fragments[j], match_score, mismatch_score, gap_cost)
+            if (i, j) in exact:
+                value = exact[(i, j)] * match_score
+            else:
+                value = waterman_algorithm(
+                    codes[i], codes[j], match_score, mismatch_score, gap_cost)
+            if storage is None:
+                scores[i][j] = scores[j][i] = value
+            else:
+                scores.set(i, j, value)
+
+    if storage == "sparse":
+        scores = ScoreMatrix.from_scores(scores, storage, threshold)
+
+    return scores
+
+
+def oriented_waterman(str_1: bytes, reverse_1: bytes, str_2: bytes, reverse_2: bytes, match_score: float, mismatch_score: float, gap_cost: float) -> List[float]:
+    """This function applies the waterman_algorithm to the four strands
+    combinations of two fragments at once.
+    With NumPy, the four matrices are filled together, row by row, where
+    a whole row is computed with a running maximum, since with a linear gap
+    H[i][j] = max(T[j], H[i][j - 1] + gap_cost) = max over k <= j of T[k] + gap_cost*(j - k).
+    Without NumPy, it falls back to four waterman_algorithm calls.
+
+    ...
+
+    Parameters
+    ----------
+    str_1: bytes
+        The codes of the first fragment.
+    reverse_1: bytes
+        The codes of the reverse complement of the first fragment.
+    str_2: bytes
+        The codes of the second fragment.
+    reverse_2: bytes
+        The codes of the reverse complement of the second fragment.
+    match_score: int
+        A positive int, we add in case to caracters match.
+    mismatch_score: int
+        A negative int, we add in case to caracters don't match.
+    gap_cost: int
+        A negative int, for the gap.
+
+    Returns
+    -------
+    list
+        The scores of (str_1, str_2), (str_1, reverse_2), (reverse_1, str_2)
+        and (reverse_1, reverse_2).
+    """
+    if np is None or not str_1 or not str_2:
+        return [waterman_algorithm(first, second, match_score, mismatch_score, gap_cost)
+                for first in (str_1, reverse_1) for second in (str_2, reverse_2)]
+
+    rows = np.stack([np.frombuffer(str_1, np.uint8),
+                     np.frombuffer(reverse_1, np.uint8)])
+    columns = np.stack([np.frombuffer(str_2, np.uint8),
+                        np.frombuffer(reverse_2, np.uint8)])
+    len_2 = columns.shape[1]
+    gaps = gap_cost * np.arange(1, len_2 + 1)
+
+    # The previous row of the four matrices, the column 0 included.
+    H = np.zeros((2, 2, len_2 + 1))
+    for i in range(rows.shape[1]):
+        substitution = np.where(
+            rows[:, i, None, None] == columns[None, :, :], match_score, mismatch_score)
+        T = np.maximum(np.maximum(H[:, :, :-1] + substitution,
+                                  H[:, :, 1:] + gap_cost), 0.0)
+        H[:, :, 1:] = np.maximum.accumulate(T - gaps, axis=2) + gaps
+
+    return H[:, :, -1].ravel().tolist()
+
+
+def oriented_overlap_scores(fragments: List[Fragment], match_score: int, mismatch_score: int, gap_cost: int) -> OrientedScores:
+    """This function calculates the overlap scores between each fragment
+    and another, for both strands of each one, i.e the four combinations
+    of a fragment or its reverse complement, with another fragment or its
+    reverse complement.
+    The codes, and the reverse complement codes, of each fragment are
+    unpacked once, and the four combinations of a pair come from one
+    oriented_waterman call.
+
+    ...
+
+    Parameters
+    ----------
+    fragments: list
+        A list of fragments.
+    match_score: int
+        A positive int, we add in case to caracters match.
+    mismatch_score: int
+        A negative int, we add in case to caracters don't match.
+    gap_cost: int
+        A negative int, for the gap.
+
+    Returns
+    -------
+    OrientedScores
+        The scores of every pair, for the four strands combinations.
+    """
+
+    len_frag = len(fragments)
+    codes = [frag.codes() for frag in fragments]
+    reverse = [frag.reverse_complement_codes() for frag in fragments]
+
+    scores = OrientedScores(len_frag)
+    for i in range(0, len_frag - 1):
+        for j in range(i + 1, len_frag):
+            scores.set_combinations(i, j, oriented_waterman(
+                codes[i], reverse[i], codes[j], reverse[j], match_score, mismatch_score, gap_cost))
 
     return scores
@@ -0,0 +1,539 @@
+import os
+import json
+import hashlib
+import threading
+from math import factorial
+from time import time, sleep
+from queue import Queue, Full
+from multiprocessing import TimeoutError
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from multiprocessing import Pool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+from typing import List, Optional
+
+from models.Fragment import Fragment
+from use.tools import read_fragments
+from use.backends import kernels
+from use.instance import scores_key, compute_scores
+from use.checkpoint import save_scores, scores_file
+from use.experiments import ALGORITHMS, settings, scores_directory, init_worker, run_job
+
+
+# The config names a job may set in its "parameters", the values of the
+# algorithms and of the scoring, and none of the files, the listeners and
+# the processes of the service.
+PARAMETERS = (
+    "CROSS_OVER_PROBABILITY", "MUTATION_PROBABILITY", "LOCAL_SEARCH", "LOCAL_SEARCH_RATE",
+    "LOCAL_SEARCH_TIME_LIMIT", "ADAPTIVE_OPERATORS", "OPERATORS", "OPERATOR_LEARNING_RATE",
+    "OPERATOR_MINIMUM_PROBABILITY", "GENERATIONS_NUMBER", "NSGA_POPULATION_SIZE", "STEADY_STATE",
+    "SCREENING", "SCREENING_CHUNKS", "OVECTIVE_FUNCTIONS_NUMBER", "MATCH_SCORE", "MISMATCH_SCORE",
+    "GAP_COST", "SCORE_STORAGE", "SCORE_THRESHOLD", "EXACT_OVERLAP_MIN_LENGTH", "ORIENTED_SCORES",
+    "DIMENTION_NUMBER", "MOBA_POPULATION_SIZE", "LOUDNESS", "RATE_PLUSSE", "ALPHA", "GAMA",
+    "MINIMUM_FREQUANCY", "MAXIMUM_FREQUANCY", "STAGNATION_PATIENCE", "STAGNATION_TOLERANCE",
+    "TIME_LIMIT", "REFERENCE_FRONT", "REFERENCE_POINT", "ARCHIVE_SIZE", "SEEDING_RATE",
+    "SEEDING_MIN_DISTANCE",
+)
+
+
+def prepare_scores(name: str, path: Optional[str], sequences: Optional[List[str]], overrides: dict, directory: str) -> int:
+    """This function computes and saves the overlap scores of the fragments
+    of a job, in a worker process, unless they were saved already, e.g by a
+    previous run of the service.
+
+    ...
+
+    Parameters
+    ----------
+    name: str
+        The name of the fragments, the digest of their file or sequences.
+    path: str
+        The fragments file, or None.
+    sequences: list
+        The fragments sequences, if there is no file.
+    overrides: dict
+        The parameters of the job.
+    directory: str
+        The service directory.
+
+    Returns
+    -------
+    int
+        The number of the fragments.
+    """
+    if path is not None:
+        fragments = read_fragments(path)
+    else:
+        fragments = [Fragment(sequence, len(sequence), index)
+                     for index, sequence in enumerate(sequences)]
+    cfg = settings(dict(overrides, BECHMARK_FILE=name))
+    key = scores_key(cfg)
+    if not os.path.isfile(os.path.join(scores_directory(directory, key), scores_file(key))):
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            scores = compute_scores(fragments, cfg)
+        save_scores(scores_directory(directory, key), key, scores)
+    return len(fragments)
+
+
+def check_size(fragments_number: int, algorithm: str, cfg) -> None:
+    """This function checks that the fragments have more orderings than the
+    initial population of the algorithm needs, else the population can't be
+    built.
+
+    ...
+
+    Parameters
+    ----------
+    fragments_number: int
+        The number of the fragments.
+    algorithm: str
+        NSGA-II or MOBA.
+    cfg: SimpleNamespace
+        The values of the job, see use.experiments.settings.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    ValueError
+        If there are too few fragments.
+    """
+    if algorithm == "NSGA-II":
+        needed = cfg.NSGA_POPULATION_SIZE
+    else:
+        needed = cfg.MOBA_POPULATION_SIZE * cfg.DIMENTION_NUMBER + 1
+    if factorial(fragments_number) < needed:
+        raise ValueError("{} fragments are too few for {}, whose initial population needs {} orderings.".format(
+            fragments_number, algorithm, needed))
+
+
+class AssemblyService:
+    """This is an AssemblyService class, a long running service that runs
+    the assembly jobs on a bounded pool of worker processes, so the jobs don't
+    pay the start of a process, the reading of the fragments and the overlap
+    scores again.
+    A job is queued, then a dispatcher thread computes the scores of its
+    fragments once, in a worker, saved in the service directory and known by
+    their digest, and runs the algorithm in a worker, where the last score
+    matrices loaded are kept in memory. The results are kept by job id, until
+    they are asked for.
+
+    ...
+
+    Attributes
+    ----------
+    directory: str
+        The service directory, where the scores are saved.
+    workers: int
+        The number of worker processes, and of jobs run at the same time.
+    timeout: float
+        The seconds a job may take in a worker, 0 for no limit.
+    queue: Queue
+        The jobs waiting for a worker, bounded.
+    submitted: int
+        The number of jobs accepted.
+    scores_computed: int
+        The number of fragments sets whose scores were prepared.
+
+    Methods
+    -------
+    __init__(workers=0, queue_size=64, warm=4, directory="service", timeout=0): None
+        The constructor, starts the worker pool.
+    submit(request): str
+        Queues a job, and returns its id.
+    job(job_id): dict
+        The state of a job, with its result once done.
+    status: dict
+        The state of the service.
+    close: None
+        Stops the worker pool.
+    """
+
+    # The finished jobs kept for their results, the oldest are dropped first.
+    FINISHED_JOBS = 1000
+
+    def __init__(self, workers: int = 0, queue_size: int = 64, warm: int = 4, directory: str = "service", timeout: float = 0):
+        """The constructor, starts the worker pool and the dispatcher threads.
+
+        ...
+
+        Parameters
+        ----------
+        workers: int, optional
+            The number of worker processes, 0 for one per CPU.
+        queue_size: int, optional
+            The number of jobs that can wait for a worker.
+        warm: int, optional
+            The number of score matrices each worker keeps in memory.
+        directory: str, optional
+            The service directory, where the scores are saved.
+        timeout: float, optional
+            The seconds a job may take in a worker, for the scores and for
+            the run each, 0 for no limit. A job past it fails, its worker
+            is only free again once the job returns.
+
+        Returns
+        -------
+        None
+        """
+        self.directory = directory
+        self.timeout = timeout
+        self.workers = workers or os.cpu_count() or 1
+        self.queue = Queue(max(queue_size, 1))
+        self.submitted = 0
+        self.scores_computed = 0
+        # job id --> state of the job, in the submission order.
+        self._jobs = OrderedDict()
+        self._finished = 0
+        self._lock = threading.Lock()
+        # scores key --> fragments number, and the lock of each key, so the
+        # scores of the same fragments are prepared only once.
+        self._prepared = dict()
+        self._preparing = dict()
+        # instance file --> (modification time, size, digest, fragments
+        # number), so a file is read again only once it changed.
+        self._files = dict()
+
+        self._pool = Pool(self.workers, init_worker,
+                          (kernels().names, warm))
+        for _ in range(self.workers):
+            threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def submit(self, request: dict) -> str:
+        """This function checks and queues a job.
+
+        ...
+
+        Parameters
+        ----------
+        request: dict
+            The job: "instance", a fragments file, or "fragments", a list of
+            sequences, "algorithm", NSGA-II or MOBA, and optionally
+            "parameters", a dict {config name: value} of the names in
+            PARAMETERS, "budget", a CPU time limit in seconds, and "seed", an int.
+
+        Returns
+        -------
+        str
+            The job id.
+
+        Raises
+        ------
+        ValueError
+            If the job is not valid.
+        queue.Full
+            If too many jobs are waiting.
+        """
+        algorithm = request.get("algorithm", "NSGA-II")
+        if algorithm not in ALGORITHMS:
+            raise ValueError("The algorithm {} is unknown, expected one of {}.".format(
+                algorithm, ALGORITHMS))
+        overrides = request.get("parameters") or dict()
+        if not isinstance(overrides, dict):
+            raise ValueError("The parameters must be a JSON object.")
+        for name in overrides:
+            if name not in PARAMETERS:
+                raise ValueError("The parameter {} can't be set by a job, expected one of {}.".format(
+                    name, PARAMETERS))
+        overrides = dict(overrides)
+        budget = request.get("budget")
+        if budget is not None:
+            if isinstance(budget, bool) or not isinstance(budget, (int, float)) or budget < 0:
+                raise ValueError("The budget must be a number of seconds.")
+            overrides["TIME_LIMIT"] = budget
+        cfg = settings(overrides)
+        seed = request.get("seed", 0)
+        if isinstance(seed, bool) or not isinstance(seed, int):
+            raise ValueError("The seed must be an int.")
+
+        # The fragments are known by their digest, the same fragments share their scores.
+        path, sequences = request.get("instance"), request.get("fragments")
+        if (path is None) == (sequences is None):
+            raise ValueError("A job needs either an instance file or fragments.")
+        if path is not None:
+            if not os.path.isfile(path):
+                raise ValueError("The instance {} is not a file.".format(path))
+            digest, fragments_number = self._instance(path)
+            check_size(fragments_number, algorithm, cfg)
+        else:
+            if not isinstance(sequences, list) or len(sequences) < 2 or \
+                    not all(isinstance(sequence, str) and sequence for sequence in sequences):
+                raise ValueError("The fragments must be a list of at least two sequences.")
+            fragments_number = len(sequences)
+            check_size(fragments_number, algorithm, cfg)
+            sequences = [sequence.upper() for sequence in sequences]
+            digest = hashlib.sha256("\n".join(sequences).encode()).hexdigest()
+
+        with self._lock:
+            self.submitted += 1
+            job_id = "{}-{}".format(self.submitted, digest[:8])
+            job = {"id": job_id, "status": "queued", "algorithm": algorithm,
+                   "instance": path, "submitted": time()}
+            self._jobs[job_id] = job
+        try:
+            self.queue.put_nowait((job, "sha256:" + digest[:16], path, sequences,
+                                   fragments_number, algorithm, overrides, seed))
+        except Full:
+            with self._lock:
+                del self._jobs[job_id]
+            raise
+        return job_id
+
+    def job(self, job_id: str) -> Optional[dict]:
+        """This function returns the state of a job: queued, running, done
+        with its result, or failed with its error.
+
+        ...
+
+        Parameters
+        ----------
+        job_id: str
+            The job id.
+
+        Returns
+        -------
+        dict
+            The state of the job, or None if it is unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def status(self) -> dict:
+        """This function returns the state of the service.
+
+        ...
+
+        Returns
+        -------
+        dict
+            The workers, the queued, running and finished jobs, and the
+            fragments sets whose scores are prepared.
+        """
+        with self._lock:
+            states = [job["status"] for job in self._jobs.values()]
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "queued": states.count("queued"),
+                "running": states.count("running"),
+                "done": states.count("done"),
+                "failed": states.count("failed"),
+                "prepared": len(self._prepared),
+                "scores_computed": self.scores_computed,
+            }
+
+    def _instance(self, path: str) -> tuple:
+        # The digest and the fragments number of an instance file, read
+        # again only if the file changed since.
+        stat = os.stat(path)
+        with self._lock:
+            known = self._files.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2:]
+        with open(path, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        fragments_number = len(read_fragments(path))
+        with self._lock:
+            self._files[path] = (stat.st_mtime_ns, stat.st_size, digest, fragments_number)
+        return digest, fragments_number
+
+    def _prepare(self, name: str, path: str, sequences: List[str], fragments_number: int, overrides: dict) -> None:
+        # The scores are computed in a worker, unless they were saved already,
+        # e.g by a previous run of the service.
+        key = scores_key(settings(dict(overrides, BECHMARK_FILE=name)))
+        with self._lock:
+            lock = self._preparing.setdefault(key, threading.Lock())
+        with lock:
+            if key in self._prepared:
+                return
+            if not os.path.isfile(os.path.join(scores_directory(self.directory, key), scores_file(key))):
+                self._apply(prepare_scores, (name, path, sequences, overrides, self.directory))
+                with self._lock:
+                    self.scores_computed += 1
+            self._prepared[key] = fragments_number
+
+    def _apply(self, function, arguments: tuple):
+        # Runs a function in a worker, the dispatcher waits timeout seconds at most.
+        return self._pool.apply_async(function, arguments).get(self.timeout or None)
+
+    def _dispatch(self) -> None:
+        # Each dispatcher runs one job at a time, as many as the workers.
+        while True:
+            job, name, path, sequences, fragments_number, algorithm, overrides, seed = self.queue.get()
+            with self._lock:
+                job["status"] = "running"
+                job["started"] = time()
+            try:
+                self._prepare(name, path, sequences, fragments_number, overrides)
+                result = self._apply(run_job, ((name, algorithm, 0, overrides, seed,
+                                                fragments_number, self.directory),))
+                state = {"status": "done", "result": result}
+            except TimeoutError:
+                state = {"status": "failed",
+                         "error": "The job took more than {} seconds.".format(self.timeout)}
+            except Exception as error:
+                state = {"status": "failed", "error": repr(error)}
+            with self._lock:
+                job.update(state, finished=time())
+                self._finished += 1
+                self._forget()
+            print("\tJOB {} --> {}".format(job["id"], state["status"].upper()))
+
+    def _forget(self) -> None:
+        # Drops the oldest finished jobs, once there are too many.
+        if self._finished <= self.FINISHED_JOBS:
+            return
+        for job_id in list(self._jobs):
+            if self._finished <= self.FINISHED_JOBS:
+                break
+            if self._jobs[job_id]["status"] in ("done", "failed"):
+                del self._jobs[job_id]
+                self._finished -= 1
+
+    def close(self) -> None:
+        """This function stops the worker pool, the running jobs are lost.
+
+        ...
+
+        Returns
+        -------
+        None
+        """
+        self._pool.terminate()
+        self._pool.join()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # POST /jobs, GET /jobs/<id> and GET /status, the bodies in JSON.
+
+    def _reply(self, code: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._reply(404, {"error": "unknown path"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("A job must be a JSON object.")
+            job_id = self.server.service.submit(request)
+        except Full:
+            return self._reply(503, {"error": "too many queued jobs"})
+        except ValueError as error:
+            return self._reply(400, {"error": str(error)})
+        self._reply(202, {"id": job_id})
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/status":
+            return self._reply(200, self.server.service.status())
+        if path.startswith("/jobs/"):
+            job = self.server.service.job(path[len("/jobs/"):])
+            if job is not None:
+                return self._reply(200, job)
+        self._reply(404, {"error": "unknown job"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 8642, workers: int = 0, queue_size: int = 64, warm: int = 4, directory: str = "service", timeout: float = 0) -> None:
+    """This function runs the service over HTTP, until it is interrupted.
+
+    ...
+
+    Parameters
+    ----------
+    host: str, optional
+        The address to listen on, the local host by default.
+    port: int, optional
+        The port to listen on.
+    workers: int, optional
+        The number of worker processes, 0 for one per CPU.
+    queue_size: int, optional
+        The number of jobs that can wait for a worker.
+    warm: int, optional
+        The number of score matrices each worker keeps in memory.
+    directory: str, optional
+        The service directory, where the scores are saved.
+    timeout: float, optional
+        The seconds a job may take in a worker, 0 for no limit.
+
+    Returns
+    -------
+    None
+    """
+    service = AssemblyService(workers, queue_size, warm, directory, timeout)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.service = service
+    print("SERVING ON http://{}:{} WITH {} WORKERS.".format(
+        *server.server_address[:2], service.workers))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def submit_job(url: str, request: dict) -> str:
+    """This function submits a job to a running service.
+
+    ...
+
+    Parameters
+    ----------
+    url: str
+        The service address, e.g http://127.0.0.1:8642.
+    request: dict
+        The job, see AssemblyService.submit.
+
+    Returns
+    -------
+    str
+        The job id.
+    """
+    data = json.dumps(request).encode()
+    with urlopen(Request(url.rstrip("/") + "/jobs", data, {"Content-Type": "application/json"})) as response:
+        return json.loads(response.read())["id"]
+
+
+def job_result(url: str, job_id: str, wait: float = 0.5, timeout: float = None) -> dict:
+    """This function waits for a job of a running service to finish.
+
+    ...
+
+    Parameters
+    ----------
+    url: str
+        The service address, e.g http://127.0.0.1:8642.
+    job_id: str
+        The job id.
+    wait: float, optional
+        The seconds between two requests.
+    timeout: float, optional
+        The seconds after which the job is returned unfinished, None to wait.
+
+    Returns
+    -------
+    dict
+        The state of the job, with its result if done.
+    """
+    start = time()
+    while True:
+        with urlopen("{}/jobs/{}".format(url.rstrip("/"), job_id)) as response:
+            job = json.loads(response.read())
+        if job["status"] in ("done", "failed") or (timeout is not None and time() - start >= timeout):
+            return job
+        sleep(wait)
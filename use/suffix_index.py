@@ -0,0 +1,214 @@
+from typing import List, Dict, Tuple
+
+
+def suffix_array(text: List[int]) -> List[int]:
+    """This function builds the suffix array of a text, i.e the starting
+    positions of its suffixes in the lexicographic order, by prefix doubling:
+    the suffixes are sorted by their first k values, then 2k, untill they
+    are all told apart, so O(n log² n) for a text of n values.
+
+    ...
+
+    Parameters
+    ----------
+    text: list
+        A list of non negative int.
+
+    Returns
+    -------
+    list
+        The suffix array.
+    """
+    n = len(text)
+    if n == 0:
+        return list()
+
+    rank = list(text)
+    positions = list(range(n))
+    k = 1
+    while True:
+        # A suffix shorter than k sorts first, so 0 for it, and rank + 1 else.
+        width = max(rank) + 2
+        keys = [rank[i] * width + (rank[i + k] + 1 if i + k < n else 0)
+                for i in range(n)]
+        positions.sort(key=keys.__getitem__)
+
+        new_rank = [0] * n
+        count = 0
+        for index in range(1, n):
+            if keys[positions[index]] != keys[positions[index - 1]]:
+                count += 1
+            new_rank[positions[index]] = count
+        rank = new_rank
+
+        if count == n - 1:
+            return positions
+        k *= 2
+
+
+def lcp_array(text: List[int], positions: List[int]) -> List[int]:
+    """This function builds the LCP array of a suffix array with the Kasai
+    algorithm in O(n), lcp[k] is the lenght of the longest common prefix of
+    the suffixes positions[k - 1] and positions[k], lcp[0] is 0.
+
+    ...
+
+    Parameters
+    ----------
+    text: list
+        A list of int.
+    positions: list
+        The suffix array of the text.
+
+    Returns
+    -------
+    list
+        The LCP array.
+    """
+    n = len(text)
+    rank = [0] * n
+    for index, position in enumerate(positions):
+        rank[position] = index
+
+    lcp = [0] * n
+    h = 0
+    for position in range(n):
+        if rank[position] > 0:
+            previous = positions[rank[position] - 1]
+            while position + h < n and previous + h < n and text[position + h] == text[previous + h]:
+                h += 1
+            lcp[rank[position]] = h
+            if h > 0:
+                h -= 1
+        else:
+            h = 0
+    return lcp
+
+
+class OverlapIndex:
+    """This is an OverlapIndex class, a generalized suffix array of all the
+    fragments, with its LCP array, built once to find the exact overlaps
+    between the suffix of a fragment and the prefix of another one.
+    The fragments are concatenated, each one followed by its own separator,
+    lower than any nucleotide, so no common prefix goes past a fragment.
+
+    ...
+
+    Attributes
+    ----------
+    lengths: list
+        The lenght of each fragment.
+    text: list
+        The concatenated fragments, the separator of the fragment k is k,
+        and a nucleotide of code c is c + the number of fragments.
+    positions: list
+        The suffix array of the text.
+    lcp: list
+        The LCP array of the suffix array.
+
+    Methods
+    -------
+    __init__(codes): None
+        The constructor, builds the index.
+    suffix_prefix_overlaps(min_length): dict
+        The longest exact suffix-prefix overlap of every pair of fragments.
+    """
+
+    def __init__(self, codes: List[bytes]):
+        """The constructor.
+
+        ...
+
+        Parameters
+        ----------
+        codes: list
+            The codes of the fragments, as returned by Fragment.codes.
+
+        Returns
+        -------
+        None
+        """
+        count = len(codes)
+        self.lengths = [len(code) for code in codes]
+        # The fragment, and the end of the fragment, of each position.
+        self._fragment = list()
+        self._end = list()
+
+        self.text = list()
+        start = 0
+        for k, code in enumerate(codes):
+            self.text.extend(c + count for c in code)
+            self.text.append(k)
+            end = start + len(code)
+            self._fragment.extend([k] * (len(code) + 1))
+            self._end.extend([end] * (len(code) + 1))
+            start = end + 1
+
+        self.positions = suffix_array(self.text)
+        self.lcp = lcp_array(self.text, self.positions)
+
+    def suffix_prefix_overlaps(self, min_length: int) -> Dict[Tuple[int, int], int]:
+        """This function finds, for every pair of fragments (i, j), the longest
+        suffix of i equal to a prefix of j, of at least min_length nucleotides.
+        A suffix s of i, followed by its separator, is sorted right before all
+        the suffixes starting with s, so the suffix array is swept once, with a
+        stack of the suffixes of the fragments that are still a prefix of the
+        current suffix (their lenght is not above the LCP seen since them).
+        The time is near linear, plus the number of overlaps reported.
+
+        ...
+
+        Parameters
+        ----------
+        min_length: int
+            The shortest overlap reported, at least 1.
+
+        Returns
+        -------
+        dict
+            A dict {(i, j): lenght} of the overlaps.
+        """
+        min_length = max(min_length, 1)
+        overlaps = dict()
+        # The (lenght, fragment) of the suffixes still prefix of the current one.
+        stack = list()
+        # Equal suffixes are sorted by their separators, so a whole fragment
+        # can come before a suffix equal to it, the whole fragments of the
+        # current run of equal suffixes are kept here for them.
+        run = list()
+        run_length = 0
+        ends = self._end
+        fragment = self._fragment
+
+        for index, position in enumerate(self.positions):
+            h = self.lcp[index]
+            while stack and stack[-1][0] > h:
+                stack.pop()
+
+            length = ends[position] - position
+            if length == 0:
+                # A separator.
+                stack.clear()
+                continue
+            if length != h or length != run_length:
+                run = list()
+                run_length = length
+
+            j = fragment[position]
+            if length >= min_length:
+                for k in run:
+                    if k != j and overlaps.get((j, k), 0) < length:
+                        overlaps[(j, k)] = length
+
+            if length == self.lengths[j]:
+                # The whole fragment j, so every suffix in the stack is a prefix of j.
+                for suffix_length, i in stack:
+                    if i != j and overlaps.get((i, j), 0) < suffix_length:
+                        overlaps[(i, j)] = suffix_length
+                run.append(j)
+
+            if length >= min_length:
+                # The stack stays in increasing lenght, since h <= length.
+                stack.append((length, j))
+
+        return overlaps
@@ -0,0 +1,318 @@
+import os
+import json
+import mmap
+from hashlib import blake2b
+from typing import List, Tuple, Iterator
+
+from models.Fragment import Fragment
+from models.ScoreMatrix import ScoreMatrix
+from use.scoring import waterman_algorithm
+from use.score_store import fragment_digest
+
+
+FLOAT_SIZE = 4
+
+
+def fragments_digest(fragments: List[Fragment]) -> str:
+    """This function returns one hash for a whole list of fragments, in
+    their order, to never continue a job on other fragments.
+
+    ...
+
+    Parameters
+    ----------
+    fragments: list
+        A list of fragments.
+
+    Returns
+    -------
+    str
+        The hexadecimal hash.
+    """
+    digest = blake2b(digest_size=16)
+    for frag in fragments:
+        digest.update(fragment_digest(frag))
+    return digest.hexdigest()
+
+
+def tiles(size: int, tile_size: int) -> Iterator[Tuple[int, int, int]]:
+    """This function lists the tiles of the upper triangle of a size×size
+    matrix, a tile is a block of tile_size rows and tile_size columns.
+
+    ...
+
+    Parameters
+    ----------
+    size: int
+        The number of fragments.
+    tile_size: int
+        The number of rows, and columns, of a tile.
+
+    Returns
+    -------
+    iterator
+        An iterator of (tile number, first row block, first column block),
+        where row block <= column block.
+    """
+    blocks = (size + tile_size - 1) // tile_size
+    for block_i in range(blocks):
+        for block_j in range(block_i, blocks):
+            yield block_i * blocks + block_j, block_i, block_j
+
+
+def compute_tile(codes: List[bytes], block_i: int, block_j: int, tile_size: int, match_score: float, mismatch_score: float, gap_cost: float) -> List[Tuple[int, int, float]]:
+    """This function calculates the scores of the pairs i < j of a tile.
+
+    ...
+
+    Parameters
+    ----------
+    codes: list
+        The codes of all the fragments, or any sequence read as codes[k].
+    block_i: int
+        The row block of the tile.
+    block_j: int
+        The column block of the tile.
+    tile_size: int
+        The number of rows, and columns, of a tile.
+    match_score: int
+        A positive int, we add in case to caracters match.
+    mismatch_score: int
+        A negative int, we add in case to caracters don't match.
+    gap_cost: int
+        A negative int, for the gap.
+
+    Returns
+    -------
+    list
+        A list of (i, j, score).
+    """
+    size = len(codes)
+    results = list()
+    for i in range(block_i * tile_size, min((block_i + 1) * tile_size, size)):
+        for j in range(max(block_j * tile_size, i + 1), min((block_j + 1) * tile_size, size)):
+            results.append((i, j, waterman_algorithm(
+                codes[i], codes[j], match_score, mismatch_score, gap_cost)))
+    return results
+
+
+class _LazyCodes:
+    """The codes of the fragments, unpacked when a tile needs them, and
+    forgotten once it's done, so only the fragments of one tile are unpacked."""
+
+    def __init__(self, fragments: List[Fragment]):
+        self.fragments = fragments
+        self.cache = dict()
+
+    def __len__(self):
+        return len(self.fragments)
+
+    def __getitem__(self, k: int) -> bytes:
+        if k not in self.cache:
+            self.cache[k] = self.fragments[k].packed.codes()
+        return self.cache[k]
+
+    def clear(self):
+        self.cache = dict()
+
+
+class TiledJob:
+    """This is a TiledJob class that computes an overlap scores matrix
+    tile after tile, into a memory mapped result file.
+    A manifest file aside the result lists the finished tiles, one per line,
+    a tile is listed only once its scores are flushed to the result file,
+    so an interrupted job continues from the last finished tile.
+
+    ...
+
+    Attributes
+    ----------
+    path: str
+        The result file, the size×size float32 matrix.
+    manifest_path: str
+        The manifest file, path + ".manifest".
+    size: int
+        The number of fragments.
+    tile_size: int
+        The number of rows, and columns, of a tile.
+    done: set
+        The numbers of the finished tiles.
+
+    Methods
+    -------
+    __init__(path, fragments, match_score, mismatch_score, gap_cost, tile_size=256): None
+        The constructor, opens the job, or creates it.
+    pending: list
+        The tiles that are not finished yet.
+    write_tile(tile, results): None
+        Writes the scores of a tile, and marks it as finished.
+    matrix: ScoreMatrix
+        The dense matrix over the result file.
+    """
+
+    def __init__(self, path: str, fragments: List[Fragment], match_score: float, mismatch_score: float, gap_cost: float, tile_size: int = 256):
+        """The constructor, a job with the same fragments, scores and tile
+        size is continued, any other one is started again.
+
+        ...
+
+        Parameters
+        ----------
+        path: str
+            The result file's full path.
+        fragments: list
+            A list of fragments.
+        match_score: int
+            A positive int, we add in case to caracters match.
+        mismatch_score: int
+            A negative int, we add in case to caracters don't match.
+        gap_cost: int
+            A negative int, for the gap.
+        tile_size: int, optional
+            The number of rows, and columns, of a tile.
+
+        Returns
+        -------
+        None
+        """
+        self.path = path
+        self.manifest_path = path + ".manifest"
+        self.size = len(fragments)
+        self.tile_size = tile_size
+        self.done = set()
+
+        header = {
+            "size": self.size,
+            "tile_size": tile_size,
+            "scores": [match_score, mismatch_score, gap_cost],
+            "fragments": fragments_digest(fragments),
+        }
+        length = max(self.size * self.size * FLOAT_SIZE, FLOAT_SIZE)
+
+        if self._read_manifest(header) and os.path.getsize(path) == length:
+            file = open(path, "r+b")
+        else:
+            file = open(path, "w+b")
+            file.truncate(length)
+            with open(self.manifest_path, "w") as manifest:
+                manifest.write(json.dumps(header) + "\n")
+            self.done = set()
+
+        self._mmap = mmap.mmap(file.fileno(), length)
+        file.close()
+        self._matrix = ScoreMatrix.from_buffer(self.size, self._mmap)
+        for i in range(self.size):
+            self._matrix.values[i * self.size + i] = -1.0
+
+    def _read_manifest(self, header: dict) -> bool:
+        # Loads the finished tiles, if the manifest belongs to the same job.
+        if not (os.path.isfile(self.manifest_path) and os.path.isfile(self.path)):
+            return False
+        with open(self.manifest_path) as manifest:
+            try:
+                if json.loads(manifest.readline()) != header:
+                    return False
+            except ValueError:
+                return False
+            for line in manifest:
+                # A line cut by a kill is not a finished tile.
+                if line.endswith("\n"):
+                    self.done.add(int(line))
+        return True
+
+    def pending(self) -> List[Tuple[int, int, int]]:
+        """This function returns the tiles that are not finished yet.
+
+        ...
+
+        Returns
+        -------
+        list
+            A list of (tile number, row block, column block).
+        """
+        return [tile for tile in tiles(self.size, self.tile_size) if tile[0] not in self.done]
+
+    def write_tile(self, tile: int, results: List[Tuple[int, int, float]]) -> None:
+        """This function writes the scores of a finished tile to the result
+        file, flushes it, then lists the tile in the manifest.
+
+        ...
+
+        Parameters
+        ----------
+        tile: int
+            The tile number.
+        results: list
+            A list of (i, j, score).
+
+        Returns
+        -------
+        None
+        """
+        values = self._matrix.values
+        size = self.size
+        for i, j, score in results:
+            values[i * size + j] = values[j * size + i] = score
+        self._mmap.flush()
+
+        with open(self.manifest_path, "a") as manifest:
+            manifest.write("{}\n".format(tile))
+            manifest.flush()
+            os.fsync(manifest.fileno())
+        self.done.add(tile)
+
+    def matrix(self) -> ScoreMatrix:
+        """This function returns the dense ScoreMatrix over the result file.
+
+        ...
+
+        Returns
+        -------
+        ScoreMatrix
+            The scores matrix.
+        """
+        return self._matrix
+
+
+def tiled_overlap_scores(fragments: List[Fragment], match_score: int, mismatch_score: int, gap_cost: int, path: str, tile_size: int = 256) -> Tuple[ScoreMatrix, int]:
+    """This function calculates the overlap scores matrix like overlap_scores,
+    but as a TiledJob: the tiles are computed one after another into a memory
+    mapped file, only the fragments of the current tile are unpacked, so the
+    memory used doesn't grow with the matrix, and an interrupted run continues
+    from the last finished tile.
+
+    ...
+
+    Parameters
+    ----------
+    fragments: list
+        A list of fragments.
+    match_score: int
+        A positive int, we add in case to caracters match.
+    mismatch_score: int
+        A negative int, we add in case to caracters don't match.
+    gap_cost: int
+        A negative int, for the gap.
+    path: str
+        The result file's full path.
+    tile_size: int, optional
+        The number of rows, and columns, of a tile.
+
+    Returns
+    -------
+    ScoreMatrix
+        The dense scores matrix, over the result file.
+    int
+        The number of tiles computed, the others were already done.
+    """
+    job = TiledJob(path, fragments, match_score,
+                   mismatch_score, gap_cost, tile_size)
+    codes = _LazyCodes(fragments)
+
+    pending = job.pending()
+    for tile, block_i, block_j in pending:
+        job.write_tile(tile, compute_tile(
+            codes, block_i, block_j, tile_size, match_score, mismatch_score, gap_cost))
+        codes.clear()
+
+    return job.matrix(), len(pending)
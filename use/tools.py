@@ -1,12 +1,21 @@
-from typing import List
+import os
+import gzip
+import mmap
+from typing import List, Iterable, Iterator
 from math import factorial, floor
 
 from models.Fragment import Fragment
 
 
-def read_fragments(file_name: str) -> List[Fragment]:
-    """This function is for the initial step of the application,
-    we read all the fragments, from the DNA sample file found.
+# The first two bytes of any gzip file.
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def iter_fragments(file_name: str, memory_map: bool = False) -> Iterator[Fragment]:
+    """This function reads the fragments of a FASTA file one after another,
+    without loading the whole file. The file can be plain or gzipped (found
+    from its first bytes), a sequence can be wrapped on many lines, and the
+    sequences are upper cased and cleaned from any whitespace.
 
     ...
 
@@ -14,29 +23,90 @@ def read_fragments(file_name: str) -> List[Fragment]:
     ----------
     file_name: str
         This is the DNA file's full path.
+    memory_map: bool, optional
+        Memory map a plain file instead of reading it through a buffer,
+        ignored for gzipped files.
 
     Rturns
     ------
-    list
-        A list of Fragments.
+    iterator
+        An iterator of Fragments.
     """
 
-    fragments = list()
+    with open(file_name, "rb") as file:
+        compressed = file.read(2) == GZIP_MAGIC
+
+    if compressed:
+        with gzip.open(file_name, "rb") as file:
+            yield from _parse_fasta(file)
+    elif memory_map and os.path.getsize(file_name) > 0:
+        with open(file_name, "rb") as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from _parse_fasta(iter(data.readline, b""))
+    else:
+        with open(file_name, "rb") as file:
+            yield from _parse_fasta(file)
+
+
+def _parse_fasta(lines: Iterable[bytes]) -> Iterator[Fragment]:
+    """This function parses the lines of a FASTA file into fragments,
+    a record starts with a '>' header line, and goes on untill the next one.
+
+    ...
+
+    Parameters
+    ----------
+    lines: iterable
+        The lines of the file, as bytes.
 
-    file = open(file_name, "r")
-    data = file.read().split("\n")
-    file.close()
+    Rturns
+    ------
+    iterator
+        An iterator of Fragments.
+    """
 
-    # To understand better, check the benchmarks/test.data
-    # to habe an idea about the file's format.
-    # We need to parse the list by a step of 2,
-    # to only get the sequences.
     count = 0
-    for frag in data[1::2]:
-        fragments.append(Fragment(frag, len(frag), count))
-        count += 1
+    parts = list()
+    for line in lines:
+        if line.startswith(b">"):
+            if parts:
+                sequence = b"".join(parts).decode("ascii")
+                yield Fragment(sequence, len(sequence), count)
+                count += 1
+                parts = list()
+        else:
+            # Drop all the whitespace, the trailing ones included.
+            line = b"".join(line.split())
+            if line:
+                parts.append(line.upper())
+
+    if parts:
+        sequence = b"".join(parts).decode("ascii")
+        yield Fragment(sequence, len(sequence), count)
 
-    return fragments
+
+def read_fragments(file_name: str, memory_map: bool = False) -> List[Fragment]:
+    """This function is for the initial step of the application,
+    we read all the fragments, from the DNA sample file found.
+    To understand better, check the benchmarks/test.data
+    to habe an idea about the file's format.
+
+    ...
+
+    Parameters
+    ----------
+    file_name: str
+        This is the DNA file's full path.
+    memory_map: bool, optional
+        Memory map a plain file instead of reading it through a buffer.
+
+    Rturns
+    ------
+    list
+        A list of Fragments.
+    """
+
+    return list(iter_fragments(file_name, memory_map))
 
 
 def kthperm(list_, k) -> List[int]:
@@ -69,3 +139,31 @@ def kthperm(list_, k) -> List[int]:
         P.append(x)
         list_ = list_[:i] + list_[i+1:]
     return P
+
+
+def permrank(list_, permutation) -> int:
+    """This function is the inverse of kthperm, it calculates the index
+    of a combinaison in the lexecographic order of the vector S,
+    i.e kthperm(list_, permrank(list_, permutation)) == permutation.
+    ...
+
+    Parameters
+    ----------
+    list_: list
+        The table of set that was permuted.
+    permutation: list
+        A combinaison of the elements of list_.
+
+    Rturns
+    ------
+    int
+        The index of the combination in the lexicographie order.
+    """
+
+    k = 0
+    list_ = list(list_)
+    for x in permutation:
+        i = list_.index(x)
+        k += i * factorial(len(list_) - 1)
+        del list_[i]
+    return k
@@ -0,0 +1,299 @@
+import os
+import zlib
+import struct
+import hashlib
+import threading
+from queue import Queue
+from array import array
+from typing import List, Iterator
+
+from models.Solution import Solution
+
+
+# Every trace file starts with this, to reject unrelated files.
+TRACE_MAGIC = b"PYBOTRC1"
+# The header of a record: generation, front size, new genomes, fragments
+# number, compressed length.
+_HEADER = struct.Struct("<IIIII")
+
+
+class TraceWriter:
+    """This is a TraceWriter class, that appends the first front of the
+    generations of a run to a binary trace file, read back with read_trace.
+    A record holds the objectives of the front as columns (oaf, odf as
+    doubles, contigs and genome ids as ints), and the genomes not written yet,
+    each genome being written once with an id, its order in the file, since
+    the front keeps most of its solutions from a generation to the next.
+    Only one generation every `every` is traced, and at most `max_size`
+    solutions of each front, evenly spaced by odf.
+    The records are compressed and written by a background thread, the run
+    only copies the front, an error of the thread is raised by the next
+    record or by close.
+
+    ...
+
+    Attributes
+    ----------
+    path: str
+        The trace file.
+    every: int
+        One generation traced every `every` generations.
+    max_size: int
+        The maximum number of solutions of a traced front, 0 for no limit.
+    records: int
+        The number of records written.
+    genomes: int
+        The number of genomes written.
+
+    Methods
+    -------
+    __init__(path, every=1, max_size=0, append=False, until=None): None
+        The constructor, opens the trace file.
+    record(generation, front): bool
+        Traces the first front of a generation, if its turn.
+    close: None
+        Writes the last records, and closes the trace file.
+    """
+
+    # The records waiting for the background thread, the run waits beyond.
+    QUEUE_SIZE = 64
+
+    def __init__(self, path: str, every: int = 1, max_size: int = 0, append: bool = False, until: int = None):
+        """The constructor, opens the trace file and starts the writer thread.
+
+        ...
+
+        Parameters
+        ----------
+        path: str
+            The trace file.
+        every: int, optional
+            One generation traced every `every` generations.
+        max_size: int, optional
+            The maximum number of solutions of a traced front, 0 for no limit.
+        append: bool, optional
+            Append to an existing trace, e.g for a resumed run. The trace is
+            cut after its last complete record, a record half written when
+            the run stopped is dropped.
+        until: int, optional
+            With append, the records of the generations after until are
+            dropped too, e.g the ones after the checkpoint a run resumes
+            from, since it traces them again.
+
+        Returns
+        -------
+        None
+        """
+        self.path = path
+        self.every = max(every, 1)
+        self.max_size = max_size
+        self.records = 0
+        self.genomes = 0
+        # The digests of the genomes written, and their ids.
+        self._ids = dict()
+        # The exception of the writer thread, raised in the run's thread.
+        self._error = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if append and os.path.isfile(path) and os.path.getsize(path) >= len(TRACE_MAGIC):
+            # The records kept, their genomes keep their ids, and the new
+            # ones go on after them.
+            end = len(TRACE_MAGIC)
+            for header, data, offset in _records(path, complete=True):
+                if until is not None and header[0] > until:
+                    break
+                for genome in _parse(header, data)["genomes"]:
+                    genome = array("H" if header[3] <= 0xFFFF else "I", genome)
+                    self._ids[hashlib.blake2b(genome.tobytes(), digest_size=16).digest()] = self.genomes
+                    self.genomes += 1
+                self.records += 1
+                end = offset
+            self._file = open(path, "r+b", buffering=1 << 20)
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, "wb", buffering=1 << 20)
+            self._file.write(TRACE_MAGIC)
+
+        self._queue = Queue(self.QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def record(self, generation: int, front: List[Solution]) -> bool:
+        """This function traces the first front of a generation, unless the
+        generation is skipped by the downsampling. The first generation is
+        always traced.
+
+        ...
+
+        Parameters
+        ----------
+        generation: int
+            The generation number.
+        front: list
+            A list of evaluated solutions.
+
+        Returns
+        -------
+        bool
+            True if the front was traced.
+        """
+        if self._error is not None:
+            raise self._error
+        if self.records and generation % self.every:
+            return False
+        if self.max_size and len(front) > self.max_size:
+            front = sorted(front, key=lambda sol: sol.odf)
+            step = (len(front) - 1) / max(self.max_size - 1, 1)
+            front = [front[round(k * step)] for k in range(self.max_size)]
+
+        size = len(front[0].genome) if front else 0
+        typecode = "H" if size <= 0xFFFF else "I"
+        ids = array("I")
+        new = array(typecode)
+        for sol in front:
+            genome = array(typecode, sol.genome)
+            digest = hashlib.blake2b(genome.tobytes(), digest_size=16).digest()
+            if digest not in self._ids:
+                self._ids[digest] = self.genomes
+                self.genomes += 1
+                new.extend(genome)
+            ids.append(self._ids[digest])
+
+        self._queue.put((generation, len(front), len(new) // size if size else 0, size,
+                         array("d", (sol.oaf for sol in front)),
+                         array("d", (sol.odf for sol in front)),
+                         array("I", (sol.contigs for sol in front)), ids, new))
+        self.records += 1
+        return True
+
+    def _write(self) -> None:
+        # Compresses and writes the records, until the None sent by close.
+        # After an error, e.g a full disk, the records are only taken from
+        # the queue, so the run never waits on it, and the error is kept.
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is not None:
+                continue
+            try:
+                generation, count, new_count, size, *columns = item
+                data = zlib.compress(b"".join(column.tobytes() for column in columns))
+                self._file.write(_HEADER.pack(
+                    generation, count, new_count, size, len(data)))
+                self._file.write(data)
+            except Exception as error:
+                self._error = error
+
+    def close(self) -> None:
+        """This function waits for the records to be written, and closes the
+        trace file, then raises the error of the writer thread, if any.
+
+        ...
+
+        Returns
+        -------
+        None
+        """
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            self._file.close()
+        finally:
+            if self._error is not None:
+                raise self._error
+
+    def __str__(self):
+        return "{} FRONTS, {} GENOMES, {:.1f} KB --> {}".format(
+            self.records, self.genomes, os.path.getsize(self.path) / 2**10, self.path)
+
+
+def _records(path: str, complete: bool = False) -> Iterator[tuple]:
+    # The (header, data, end offset) of each record. With complete, the
+    # reading stops quietly at the first record cut short, e.g by a crash.
+    with open(path, "rb") as file:
+        if file.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError("{} is not a trace file.".format(path))
+        while True:
+            header = file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                break
+            header = _HEADER.unpack(header)
+            data = file.read(header[4])
+            try:
+                data = zlib.decompress(data)
+            except zlib.error:
+                if complete:
+                    break
+                raise
+            yield header, data, file.tell()
+
+
+def _parse(header: tuple, data: bytes) -> dict:
+    # The columns of a record.
+    generation, count, new_count, size, _ = header
+    columns = list()
+    offset = 0
+    for typecode in ("d", "d", "I", "I", "H" if size <= 0xFFFF else "I"):
+        column = array(typecode)
+        length = count if len(columns) < 4 else new_count * size
+        end = offset + length * column.itemsize
+        column.frombytes(data[offset:end])
+        columns.append(column)
+        offset = end
+    new = columns[4].tolist()
+    return {
+        "generation": generation,
+        "oaf": columns[0].tolist(),
+        "odf": columns[1].tolist(),
+        "contigs": columns[2].tolist(),
+        "ids": columns[3].tolist(),
+        "genomes": [new[k * size:(k + 1) * size] for k in range(new_count)],
+    }
+
+
+def read_trace(path: str) -> Iterator[dict]:
+    """This function reads the fronts of a trace file written by TraceWriter,
+    one after another.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The trace file.
+
+    Returns
+    -------
+    iterator
+        An iterator of dicts {"generation": int, "oaf": list, "odf": list,
+        "contigs": list, "ids": list, "genomes": list}, where "genomes" are
+        the genomes first written by this record, with the ids following the
+        ones of the previous records.
+    """
+    for header, data, _ in _records(path):
+        yield _parse(header, data)
+
+
+def read_genomes(path: str) -> List[List[int]]:
+    """This function reads all the genomes of a trace file, by id.
+
+    ...
+
+    Parameters
+    ----------
+    path: str
+        The trace file.
+
+    Returns
+    -------
+    list
+        A list of genomes(list of int), the index being the genome id.
+    """
+    genomes = list()
+    for record in read_trace(path):
+        genomes.extend(record["genomes"])
+    return genomes
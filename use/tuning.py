@@ -0,0 +1,248 @@
+import os
+import json
+import random
+from math import sqrt
+from statistics import NormalDist
+from multiprocessing import Pool
+from typing import List, Tuple, Dict
+
+from use.backends import kernels
+from use.experiments import ALGORITHMS, settings, prepare_instances, init_worker, run_job, normalized_hypervolumes
+from use.instance import scores_key
+
+
+def sample_configurations(space: Dict[str, list], count: int, seed: int = 0) -> List[dict]:
+    """This function draws the candidate configurations of a race from a
+    grid of values, all of them if the grid is not larger than count. The
+    config as it is, {}, is always the first candidate.
+
+    ...
+
+    Parameters
+    ----------
+    space: dict
+        A dict {config name: list of values}.
+    count: int
+        The number of configurations drawn, the config as it is included.
+    seed: int, optional
+        The seed of the draw.
+
+    Returns
+    -------
+    list
+        A list of configurations, dicts {config name: value}.
+    """
+    names = sorted(space)
+    size = 1
+    for name in names:
+        size *= len(space[name])
+    indexes = range(size) if size < count else sorted(
+        random.Random(seed).sample(range(size), max(count - 1, 0)))
+
+    configurations = [dict()]
+    for index in indexes:
+        # The index written in the mixed radix of the grid, one digit per name.
+        configuration = dict()
+        for name in reversed(names):
+            index, digit = divmod(index, len(space[name]))
+            configuration[name] = space[name][digit]
+        configurations.append({name: configuration[name] for name in names})
+    return configurations
+
+
+def _ranks(qualities: List[float]) -> List[float]:
+    # The rank of each quality in its block, 1 for the highest, the ties
+    # sharing the mean of their ranks.
+    order = sorted(range(len(qualities)), key=lambda j: -qualities[j])
+    ranks = [0.0] * len(qualities)
+    first = 0
+    while first < len(order):
+        last = first
+        while last + 1 < len(order) and qualities[order[last + 1]] == qualities[order[first]]:
+            last += 1
+        for k in range(first, last + 1):
+            ranks[order[k]] = (first + last) / 2 + 1
+        first = last + 1
+    return ranks
+
+
+def _chi2_survival(statistic: float, freedom: int) -> float:
+    # P(X > statistic) for a chi-square of freedom degrees, with the
+    # Wilson-Hilferty approximation, close enough for a test at 0.95.
+    if statistic <= 0:
+        return 1.0
+    scale = 2 / (9 * freedom)
+    z = ((statistic / freedom) ** (1 / 3) - (1 - scale)) / sqrt(scale)
+    return 1 - NormalDist().cdf(z)
+
+
+def _t_quantile(probability: float, freedom: int) -> float:
+    # The quantile of a Student t of freedom degrees, with the expansion of
+    # Abramowitz and Stegun 26.7.5 around the normal quantile.
+    z = NormalDist().inv_cdf(probability)
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    return z + g1 / freedom + g2 / freedom**2 + g3 / freedom**3 + g4 / freedom**4
+
+
+def friedman_test(qualities: List[List[float]], confidence: float = 0.95) -> Tuple[float, List[float], List[int]]:
+    """This function compares the configurations over the blocks with the
+    Friedman test, and if they differ, finds the ones worse than the best
+    with the Conover post hoc test, as F-race does.
+
+    ...
+
+    Parameters
+    ----------
+    qualities: list
+        A list of blocks, each a list of the quality of each configuration,
+        higher is better.
+    confidence: float, optional
+        The confidence level of the tests.
+
+    Returns
+    -------
+    float
+        The p-value of the Friedman test.
+    list
+        The sum of the ranks of each configuration, lower is better.
+    list
+        The indexes of the configurations worse than the best.
+    """
+    blocks, size = len(qualities), len(qualities[0])
+    ranks = [_ranks(block) for block in qualities]
+    sums = [sum(block[j] for block in ranks) for j in range(size)]
+    if blocks < 2 or size < 2:
+        return 1.0, sums, list()
+
+    squares = sum(rank**2 for block in ranks for rank in block)
+    correction = blocks * size * (size + 1)**2 / 4
+    if squares - correction <= 0:
+        # Every block ties all the configurations.
+        return 1.0, sums, list()
+    statistic = (size - 1) * sum((total - blocks * (size + 1) / 2)**2
+                                 for total in sums) / (squares - correction)
+    p_value = _chi2_survival(statistic, size - 1)
+    if p_value >= 1 - confidence:
+        return p_value, sums, list()
+
+    freedom = (blocks - 1) * (size - 1)
+    spread = max(blocks * squares - sum(total**2 for total in sums), 0.0)
+    difference = _t_quantile(1 - (1 - confidence) / 2, freedom) * sqrt(2 * spread / freedom)
+    best = min(sums)
+    return p_value, sums, [j for j in range(size) if sums[j] - best > difference]
+
+
+def race(algorithm: str, space: Dict[str, list], instances: List[str], seeds: List[int], candidates: int = 32, time_limit: float = 10, first_test: int = 5, confidence: float = 0.95, budget: int = 0, workers: int = 0, results: str = "tuning.json", directory: str = "experiments") -> dict:
+    """This function tunes the parameters of an algorithm with a race
+    (F-race): the candidate configurations run on one block (an instance and
+    a seed) after another, with a short CPU time limit, and once first_test
+    blocks are done, the configurations the Friedman test finds worse than
+    the best are dropped after each block, so most runs go to the
+    configurations still in the race. The race stops when one configuration
+    is left, the blocks are done, or the budget of runs is spent.
+
+    ...
+
+    Parameters
+    ----------
+    algorithm: str
+        NSGA-II or MOBA.
+    space: dict
+        A dict {config name: list of values}, the grid of the configurations.
+    instances: list
+        A list of benchmark files.
+    seeds: list
+        A list of int, each seed gives one block per instance.
+    candidates: int, optional
+        The number of configurations drawn from the grid.
+    time_limit: float, optional
+        The CPU seconds of a run.
+    first_test: int, optional
+        The blocks done before the first test.
+    confidence: float, optional
+        The confidence level of the tests.
+    budget: int, optional
+        The maximum number of runs, 0 for no limit.
+    workers: int, optional
+        The number of worker processes, 0 for one per CPU.
+    results: str, optional
+        The JSON file of the result.
+    directory: str, optional
+        The experiment directory, where the scores are saved.
+
+    Returns
+    -------
+    dict
+        The result: the best configuration, the configurations left with
+        their mean ranks, the blocks and the runs done.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError("The algorithm {} is unknown, expected one of {}.".format(
+            algorithm, ALGORITHMS))
+    configurations = sample_configurations(space, candidates, seeds[0] if seeds else 0)
+    for configuration in configurations:
+        settings(configuration)
+
+    print("STEP-1 :: CALCULATING THE OVERLAP SCORES OF {} INSTANCES.".format(len(instances)))
+    fragments_numbers = prepare_instances(instances, configurations, directory)
+
+    # The instances are interleaved, so the first tests already see all of them.
+    blocks = [(instance, seed) for seed in seeds for instance in instances]
+    alive = list(range(len(configurations)))
+    # The quality of each configuration alive on each block done.
+    qualities = list()
+    runs = 0
+    print("STEP-2 :: RACING {} CONFIGURATIONS OF {} ON {} BLOCKS.".format(
+        len(configurations), algorithm, len(blocks)))
+    with Pool(workers or None, init_worker, (kernels().names,)) as pool:
+        for number, (instance, seed) in enumerate(blocks, 1):
+            if len(alive) == 1:
+                break
+            if budget and runs + len(alive) > budget:
+                print("\tBUDGET OF {} RUNS SPENT.".format(budget))
+                break
+            jobs = list()
+            for j in alive:
+                overrides = dict(configurations[j], TIME_LIMIT=time_limit)
+                key = scores_key(settings(dict(overrides, BECHMARK_FILE=instance)))
+                jobs.append((instance, algorithm, j, overrides, seed,
+                             fragments_numbers[key], directory))
+            records = pool.map(run_job, jobs)
+            runs += len(records)
+            block = dict(zip(alive, normalized_hypervolumes([record["front"] for record in records])))
+            qualities.append(block)
+
+            p_value, dropped = 1.0, list()
+            if number >= first_test:
+                p_value, _, worse = friedman_test(
+                    [[block[j] for j in alive] for block in qualities], confidence)
+                dropped = [alive[k] for k in worse]
+                alive = [j for j in alive if j not in dropped]
+            print("\tB-{} --> {} S-{} :: FRIEDMAN P = {:.3g}, {} DROPPED, {} CONFIGURATIONS LEFT.".format(
+                number, instance, seed, p_value, len(dropped), len(alive)))
+
+    # The configurations left, by mean rank on the blocks where they all ran.
+    ranks = [_ranks([block[j] for j in alive]) for block in qualities]
+    mean_ranks = [sum(block[k] for block in ranks) / max(len(ranks), 1)
+                  for k in range(len(alive))]
+    left = sorted(zip(alive, mean_ranks), key=lambda item: item[1])
+    result = {
+        "algorithm": algorithm,
+        "best": configurations[left[0][0]],
+        "left": [{"configuration": configurations[j], "mean_rank": rank} for j, rank in left],
+        "candidates": len(configurations),
+        "blocks": len(qualities),
+        "runs": runs,
+        "time_limit": time_limit,
+    }
+    os.makedirs(os.path.dirname(results) or ".", exist_ok=True)
+    with open(results, "w") as file:
+        json.dump(result, file, indent=2)
+
+    print("STEP-3 :: {} RUNS, INSTEAD OF {} FOR ALL THE CONFIGURATIONS ON ALL THE BLOCKS --> {}".format(
+        runs, len(configurations) * len(blocks), results))
+    print("BEST CONFIGURATION:: {}".format(result["best"] or "THE CONFIG AS IT IS"))
+    return result